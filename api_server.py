@@ -0,0 +1,314 @@
+"""HTTP analysis service for integrations (CLM, procurement portal)
+
+Runs from the same codebase as the Streamlit UI:
+
+    python api_server.py --port 8000
+
+Endpoints:
+    POST /v1/analyses                  submit a contract, returns 202 with the job ID
+    GET  /v1/analyses/<id>             job status and stage progress
+    GET  /v1/analyses/<id>/result      analysis result once finished
+    GET  /v1/analyses/<id>/report      rendered report (?format=pdf|html|docx|markdown|json)
+    GET  /healthz                      liveness and queue depth
+
+Submissions are either JSON ({"text": ...} or {"file_name": ..., "content_base64": ...},
+with optional "contract_type", "document_name" and "stages") or the raw file bytes with
+?file_name=...&contract_type=...&stages=... in the query string. stages limits the
+analysis to those stages and the ones they depend on, e.g. ["risk_assessment"].
+"""
+import argparse
+import base64
+import binascii
+import hashlib
+import hmac
+import ipaddress
+import json
+import os
+import re
+import sys
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from dotenv import load_dotenv
+
+from src.utils.analysis_service import analyze_document, analyze_text
+from src.utils.job_runner import DONE, FAILED, JobRunner, QueueFullError, job_key
+from src.utils.pipeline import resolve_stages
+from src.utils.report_renderers import RENDERERS, render_report
+from src.utils.result_store import ResultStore
+
+load_dotenv()
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+_JOB_PATH = re.compile(r"^/v1/analyses/([0-9a-f]{32})(/result|/report)?/?$")
+
+
+class ApiError(Exception):
+    def __init__(self, status: HTTPStatus, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class AnalysisService:
+    """Submission and lookup logic behind the HTTP handler"""
+
+    def __init__(self, api_key: str, workers: int = 8, max_pending: int = 32, max_jobs: int = 1024,
+                 max_upload_bytes: int = 20 * 1024 * 1024, token: Optional[str] = None,
+                 store: Optional[ResultStore] = None):
+        self.api_key = api_key
+        self.runner = JobRunner(max_workers=workers, max_jobs=max_jobs)
+        self.max_pending = max_pending
+        self.max_upload_bytes = max_upload_bytes
+        self.token = token
+        self.store = store
+
+    @classmethod
+    def from_env(cls) -> "AnalysisService":
+        return cls(
+            api_key=os.getenv("ANTHROPIC_API_KEY", ""),
+            workers=int(os.getenv("API_WORKERS", "8")),
+            max_pending=int(os.getenv("API_MAX_PENDING", "32")),
+            max_jobs=int(os.getenv("API_MAX_JOBS", "1024")),
+            max_upload_bytes=int(os.getenv("API_MAX_UPLOAD_MB", "20")) * 1024 * 1024,
+            token=os.getenv("API_SERVICE_TOKEN") or None,
+            store=ResultStore.from_env(),
+        )
+
+    def authorize(self, header: Optional[str]):
+        if not self.token:
+            return
+        supplied = (header or "")[len("Bearer "):] if (header or "").startswith("Bearer ") else ""
+        if not hmac.compare_digest(supplied.encode("utf-8"), self.token.encode("utf-8")):
+            raise ApiError(HTTPStatus.UNAUTHORIZED, "Missing or invalid bearer token",
+                           {"WWW-Authenticate": "Bearer"})
+
+    def submit(self, body: bytes, content_type: str, query: Dict[str, str]) -> str:
+        """Queue an analysis and return its job ID"""
+        if not self.api_key:
+            raise ApiError(HTTPStatus.SERVICE_UNAVAILABLE, "The service has no LLM API key configured")
+
+        contract_type = query.get("contract_type", "General")
+        requested_stages = query["stages"].split(",") if query.get("stages") else None
+        if content_type.startswith("application/json"):
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                raise ApiError(HTTPStatus.BAD_REQUEST, "Request body is not valid JSON")
+            if not isinstance(payload, dict):
+                raise ApiError(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object")
+            contract_type = str(payload.get("contract_type", contract_type))
+            if payload.get("stages") is not None:
+                if not isinstance(payload["stages"], list):
+                    raise ApiError(HTTPStatus.BAD_REQUEST, "stages must be a list of stage names")
+                requested_stages = [str(stage) for stage in payload["stages"]]
+            stages = self._resolve(requested_stages)
+
+            if payload.get("text"):
+                text = str(payload["text"])
+                return self._submit(
+                    job_key(self.api_key, contract_type, ",".join(stages or []), text),
+                    analyze_text, self.api_key, text, contract_type,
+                    document_name=payload.get("document_name"), store=self.store, stages=stages,
+                    progress_stages=stages,
+                )
+
+            file_name = str(payload.get("file_name", ""))
+            try:
+                file_bytes = base64.b64decode(payload.get("content_base64") or "", validate=True)
+            except (binascii.Error, ValueError):
+                raise ApiError(HTTPStatus.BAD_REQUEST, "content_base64 is not valid base64")
+        else:
+            stages = self._resolve(requested_stages)
+            file_name = query.get("file_name", "")
+            file_bytes = body
+
+        if not file_name.lower().endswith(SUPPORTED_EXTENSIONS):
+            raise ApiError(HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+                           f"file_name must end in one of {', '.join(SUPPORTED_EXTENSIONS)}")
+        if not file_bytes:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Provide either text or a non-empty file")
+
+        return self._submit(
+            job_key(self.api_key, contract_type, ",".join(stages or []), file_name, hashlib.sha256(file_bytes).hexdigest()),
+            analyze_document, self.api_key, file_bytes, file_name, contract_type, store=self.store, stages=stages,
+            progress_stages=stages,
+        )
+
+    @staticmethod
+    def _resolve(requested_stages: Optional[List[str]]) -> Optional[List[str]]:
+        try:
+            return resolve_stages(requested_stages) if requested_stages else None
+        except ValueError as e:
+            raise ApiError(HTTPStatus.BAD_REQUEST, str(e))
+
+    def _submit(self, key: str, fn, *args, **kwargs) -> str:
+        try:
+            return self.runner.submit(key, fn, *args, max_active=self.max_pending, **kwargs)
+        except QueueFullError as e:
+            raise ApiError(HTTPStatus.TOO_MANY_REQUESTS, f"{e}; retry later", {"Retry-After": "30"})
+
+    def status(self, job_id: str) -> Dict:
+        job = self.runner.get(job_id)
+        if job is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, "Unknown or expired analysis ID")
+        state = job.snapshot()
+        return {
+            "id": state["id"],
+            "status": state["status"],
+            "progress": round(state["progress"], 3),
+            "completed_stages": state["completed_stages"],
+            "error": state["error"],
+        }
+
+    def result(self, job_id: str) -> Dict:
+        state = self.status(job_id)
+        if state["status"] == FAILED:
+            raise ApiError(HTTPStatus.BAD_GATEWAY, f"Analysis failed: {state['error']}")
+        if state["status"] != DONE:
+            raise ApiError(HTTPStatus.CONFLICT, f"Analysis is {state['status']}", {"Retry-After": "5"})
+        return self.runner.get(job_id).result
+
+    def report(self, job_id: str, fmt: str) -> Tuple[bytes, str, str]:
+        if fmt not in RENDERERS:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"Unsupported report format: {fmt}. Choose from {', '.join(RENDERERS)}.")
+        renderer = RENDERERS[fmt]
+        return render_report(self.result(job_id), fmt), renderer.mime, renderer.extension
+
+
+class AnalysisRequestHandler(BaseHTTPRequestHandler):
+    server_version = "ContractAnalyzerAPI/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def service(self) -> AnalysisService:
+        return self.server.service
+
+    def do_GET(self):
+        self._handle(self._get)
+
+    def do_POST(self):
+        self._handle(self._post)
+
+    def _handle(self, route):
+        try:
+            url = urlparse(self.path)
+            if url.path != "/healthz":
+                self.service.authorize(self.headers.get("Authorization"))
+            route(url.path, {key: values[-1] for key, values in parse_qs(url.query).items()})
+        except ApiError as e:
+            if self.command == "POST":
+                # The request body may not have been read, so the connection cannot be reused
+                self.close_connection = True
+            self._send_json(e.status, {"error": e.message}, e.headers)
+        except Exception as e:
+            self.log_error("Unhandled error: %s", e)
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal server error"})
+
+    def _get(self, path: str, query: Dict[str, str]):
+        if path == "/healthz":
+            self._send_json(HTTPStatus.OK, {
+                "status": "ok",
+                "active_jobs": self.service.runner.active_count(),
+                "max_pending": self.service.max_pending,
+            })
+            return
+
+        match = _JOB_PATH.match(path)
+        if not match:
+            raise ApiError(HTTPStatus.NOT_FOUND, "Not found")
+        job_id, action = match.groups()
+        if action == "/result":
+            self._send_json(HTTPStatus.OK, self.service.result(job_id))
+        elif action == "/report":
+            body, mime, extension = self.service.report(job_id, query.get("format", "pdf"))
+            self._send(HTTPStatus.OK, body, mime, {
+                "Content-Disposition": f'attachment; filename="contract_analysis_{job_id}.{extension}"'
+            })
+        else:
+            self._send_json(HTTPStatus.OK, self.service.status(job_id))
+
+    def _post(self, path: str, query: Dict[str, str]):
+        if path.rstrip("/") != "/v1/analyses":
+            raise ApiError(HTTPStatus.NOT_FOUND, "Not found")
+
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            raise ApiError(HTTPStatus.LENGTH_REQUIRED, "Content-Length is required")
+        if length < 0:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Content-Length must not be negative")
+        if length > self.service.max_upload_bytes:
+            raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                           f"Uploads are limited to {self.service.max_upload_bytes // (1024 * 1024)} MB")
+        body = self.rfile.read(length)
+
+        job_id = self.service.submit(body, self.headers.get("Content-Type", ""), query)
+        location = f"/v1/analyses/{job_id}"
+        self._send_json(HTTPStatus.ACCEPTED, {
+            "id": job_id,
+            "status_url": location,
+            "result_url": f"{location}/result",
+        }, {"Location": location})
+
+    def _send_json(self, status: HTTPStatus, payload, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        self._send(status, body, "application/json; charset=utf-8", headers)
+
+    def _send(self, status: HTTPStatus, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def is_loopback(host: str) -> bool:
+    """Whether binding to host keeps the service reachable from this machine only"""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class AnalysisServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], service: AnalysisService):
+        super().__init__(address, AnalysisRequestHandler)
+        self.service = service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve contract analysis over HTTP")
+    parser.add_argument("--host", default=os.getenv("API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8000")))
+    args = parser.parse_args()
+
+    service = AnalysisService.from_env()
+    if not service.token and not is_loopback(args.host):
+        # Anyone who can reach the port could spend the API key and read results
+        parser.error(f"refusing to listen on {args.host} without API_SERVICE_TOKEN; "
+                     "set a token or bind to 127.0.0.1")
+    if not service.api_key:
+        print("Warning: ANTHROPIC_API_KEY is not set; submissions will be rejected", file=sys.stderr)
+
+    server = AnalysisServer((args.host, args.port), service)
+    print(f"Contract analysis API listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
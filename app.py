@@ -2,15 +2,24 @@ import streamlit as st
 import os
 from dotenv import load_dotenv
 import json
+import hashlib
 from datetime import datetime
 import sys
 
 # Add src to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from src.utils.gemini_analyzer import GeminiAnalyzer as ContractAnalyzer
+from src.utils.analysis_service import analyze_document, analyze_text, stored_analysis
+from src.utils.clause_explainer import ClauseExplainer, clause_key
+from src.utils.cost_accounting import AnalysisBudget, UsageLedger
 from src.utils.document_processor import DocumentProcessor
-from src.utils.report_generator import ReportGenerator
+from src.utils.encoding_detector import EncodingDetector
+from src.utils.extraction_sandbox import ExtractionLimits
+from src.utils.job_runner import DONE, FAILED, JobRunner, job_key
+from src.utils.pipeline import ANALYSIS_STAGES, resolve_stages
+from src.utils.report_model import get_report_model
+from src.utils.report_renderers import RENDERERS, render_report
+from src.utils.result_store import ResultStore
 from src.utils.templates import ContractTemplates
 
 # Load environment variables
@@ -83,6 +92,20 @@ if 'analysis_result' not in st.session_state:
     st.session_state.analysis_result = None
 if 'contract_text' not in st.session_state:
     st.session_state.contract_text = None
+if 'document' not in st.session_state:
+    st.session_state.document = None
+if 'normalized_text' not in st.session_state:
+    st.session_state.normalized_text = None
+if 'language_sections' not in st.session_state:
+    st.session_state.language_sections = []
+if 'analysis_job_id' not in st.session_state:
+    st.session_state.analysis_job_id = None
+if 'batch_id' not in st.session_state:
+    st.session_state.batch_id = None
+if 'history_cursors' not in st.session_state:
+    st.session_state.history_cursors = [None]
+if 'usage_ledger' not in st.session_state:
+    st.session_state.usage_ledger = UsageLedger()
 if 'api_key' not in st.session_state:
     st.session_state.api_key = os.getenv('ANTHROPIC_API_KEY', '')
 
@@ -106,6 +129,8 @@ def main():
         if api_key:
             st.session_state.api_key = api_key
         
+        session_usage()
+        
         st.divider()
         
         st.header("📚 About")
@@ -133,15 +158,25 @@ def main():
         st.markdown("🇮🇳 English & Hindi")
     
     # Main content
-    tab1, tab2, tab3 = st.tabs(["📤 Upload & Analyze", "📋 Contract Templates", "ℹ️ How to Use"])
+    tab_names = ["📤 Upload & Analyze", "📦 Batch Analysis", "📋 Contract Templates", "ℹ️ How to Use"]
+    if get_result_store() is not None:
+        tab_names.insert(2, "🗂️ History")
+    tabs = st.tabs(tab_names)
     
-    with tab1:
+    with tabs[0]:
         upload_and_analyze_tab()
     
-    with tab2:
+    with tabs[1]:
+        batch_analysis_tab()
+    
+    if get_result_store() is not None:
+        with tabs[2]:
+            history_tab()
+    
+    with tabs[-2]:
         templates_tab()
     
-    with tab3:
+    with tabs[-1]:
         how_to_use_tab()
 
 def upload_and_analyze_tab():
@@ -163,6 +198,13 @@ def upload_and_analyze_tab():
          "Partnership Deed", "Service Contract", "NDA", "Other"]
     )
     
+    store = get_result_store()
+    reuse_stored = store is not None and st.checkbox(
+        "Reuse a stored analysis of the same document",
+        value=True,
+        help="Skip the AI call when this exact contract text has been analyzed before"
+    )
+    
     if uploaded_file is not None:
         # Display file info
         st.success(f"✅ File uploaded: {uploaded_file.name} ({uploaded_file.size / 1024:.2f} KB)")
@@ -171,13 +213,43 @@ def upload_and_analyze_tab():
         if st.button("🔍 Extract Text from Document", type="secondary"):
             with st.spinner("Extracting text from document..."):
                 try:
-                    contract_text = DocumentProcessor.process_document(uploaded_file)
+                    document = DocumentProcessor.process_structured(
+                        uploaded_file,
+                        sandbox=os.getenv('EXTRACTION_SANDBOX', 'true').lower() == 'true',
+                        limits=ExtractionLimits.from_env()
+                    )
+                    st.session_state.document = document
+                    raw_text = document.text
+                    
+                    # Normalize text to cut tokens sent to the LLM
+                    normalized = DocumentProcessor.normalize_text(raw_text)
+                    contract_text = normalized.text
                     st.session_state.contract_text = contract_text
+                    st.session_state.normalized_text = normalized
                     
                     # Detect language
                     language = DocumentProcessor.detect_language(contract_text)
                     
                     st.success(f"✅ Text extracted successfully! Detected language: {language.title()}")
+                    sections = DocumentProcessor.language_sections(contract_text)
+                    st.session_state.language_sections = sections
+                    languages = sorted({section['language'] for section in sections})
+                    if len(languages) > 1:
+                        st.caption(f"Languages found: {', '.join(lang.title() for lang in languages)} across {len(sections)} section(s)")
+                    if uploaded_file.name.lower().endswith('.txt'):
+                        encoding = EncodingDetector.detect(uploaded_file.getvalue())
+                        st.caption(f"Detected encoding: {encoding['encoding']} (confidence {encoding['confidence']:.0%})")
+                        if encoding['confidence'] < 0.5:
+                            st.warning("⚠️ The text encoding could not be identified reliably. Re-save the file as UTF-8 if the text looks garbled.")
+                    stats = normalized.stats
+                    st.caption(
+                        f"Normalization saved {stats['chars_saved']:,} characters "
+                        f"(~{stats['tokens_saved']:,} tokens) across {stats['pages']} page(s)"
+                    )
+                    st.caption(
+                        f"Structure: {len(document.pages)} page(s), {len(document.paragraphs)} paragraph(s), "
+                        f"{len(document.headings())} heading(s), {len(document.cells)} table cell(s)"
+                    )
                     
                     # Show preview
                     with st.expander("📄 View Extracted Text (First 1000 characters)"):
@@ -192,34 +264,316 @@ def upload_and_analyze_tab():
                 st.error("⚠️ Please enter your Anthropic API key in the sidebar first!")
                 return
             
-            with st.spinner("🔄 Analyzing contract... This may take 1-2 minutes..."):
-                try:
-                    # Initialize analyzer
-                    analyzer = ContractAnalyzer(st.session_state.api_key)
-                    
-                    # Perform analysis
-                    analysis_result = analyzer.analyze_contract(
-                        st.session_state.contract_text,
-                        contract_type if contract_type != "Auto-detect" else "General"
-                    )
-                    
-                    st.session_state.analysis_result = analysis_result
-                    
-                    st.success("✅ Analysis complete!")
-                    
-                except Exception as e:
-                    st.error(f"❌ Error during analysis: {str(e)}")
-                    st.info("Please check your API key and try again.")
+            selected_type = contract_type if contract_type != "Auto-detect" else "General"
+            
+            stored = stored_analysis(store, st.session_state.api_key, st.session_state.contract_text) if reuse_stored else None
+            if stored is not None:
+                st.session_state.analysis_result = stored
+                st.info(f"🗂️ Loaded the stored analysis from {stored.get('timestamp', 'an earlier run')}.")
+            else:
+                submit_analysis(selected_type, uploaded_file.name)
+    
+    # Track a running analysis
+    if st.session_state.analysis_job_id:
+        analysis_progress()
     
     # Display results if available
     if st.session_state.analysis_result:
         display_analysis_results(st.session_state.analysis_result)
 
-def display_analysis_results(analysis_result):
-    """Display the analysis results in organized sections"""
+def submit_analysis(selected_type, document_name):
+    """Start the background analysis of the extracted contract text"""
+    # Run in the background so reruns neither lose nor duplicate the work;
+    # the same document submitted twice joins the existing job
+    st.session_state.analysis_job_id = get_job_runner().submit(
+        job_key(st.session_state.api_key, selected_type, st.session_state.contract_text),
+        run_analysis,
+        st.session_state.api_key,
+        st.session_state.contract_text,
+        selected_type,
+        document_name=document_name,
+        budget=AnalysisBudget.from_env(st.session_state.usage_ledger)
+    )
+    st.session_state.analysis_result = None
+
+def session_usage():
+    """Tokens and model cost spent in this session, against its budget if one is set"""
+    usage = st.session_state.usage_ledger.snapshot()
+    if not usage['calls']:
+        return
+    session_budget = AnalysisBudget.from_env().session_usd
+    st.metric(
+        "💰 Session model cost",
+        f"${usage['cost_usd']:.4f}",
+        help=f"{usage['analyses']} analyses, {usage['input_tokens']:,} input and {usage['output_tokens']:,} output tokens"
+    )
+    if session_budget:
+        st.progress(min(1.0, usage['cost_usd'] / session_budget), text=f"Session budget: ${session_budget:.2f}")
+
+@st.cache_resource
+def get_job_runner():
+    """Process-wide pool for analysis jobs, shared by all sessions"""
+    return JobRunner(max_workers=int(os.getenv('ANALYSIS_WORKERS', '8')))
+
+@st.cache_resource
+def get_clause_explainer():
+    """Process-wide clause explanation cache and batch queue, shared by all sessions"""
+    return ClauseExplainer.from_env()
+
+@st.cache_resource
+def get_result_store():
+    """Analysis history, or None unless RESULT_STORE_PATH is set"""
+    return ResultStore.from_env()
+
+def run_analysis(api_key, contract_text, contract_type, progress_callback=None, document_name=None, budget=None):
+    """Job body: analyze a contract on a worker thread and record it in the history"""
+    return analyze_text(api_key, contract_text, contract_type, progress_callback=progress_callback,
+                        document_name=document_name, store=get_result_store(), budget=budget)
+
+def analyze_file(api_key, file_name, file_bytes, contract_type, stages=None, budget=None, progress_callback=None):
+    """Job body for batch mode: extract, normalize and analyze one uploaded file"""
+    return analyze_document(api_key, file_bytes, file_name, contract_type, progress_callback=progress_callback,
+                            store=get_result_store(), stages=stages, budget=budget)
+
+@st.fragment(run_every=1.0)
+def analysis_progress():
+    """Poll the background analysis job and show stage progress"""
+    job = get_job_runner().get(st.session_state.analysis_job_id)
+    if job is None:
+        st.session_state.analysis_job_id = None
+        st.warning("⚠️ The analysis job is no longer available. Please run the analysis again.")
+        return
+    
+    state = job.snapshot()
+    if state['status'] == DONE:
+        st.session_state.analysis_result = state['result']
+        st.session_state.analysis_job_id = None
+        st.toast("✅ Analysis complete!")
+        st.rerun()
+    elif state['status'] == FAILED:
+        st.session_state.analysis_job_id = None
+        st.error(f"❌ Error during analysis: {state['error']}")
+        st.info("Please check your API key and try again.")
+    else:
+        labels = dict(ANALYSIS_STAGES)
+        pending = [stage for stage in job.stages if stage not in state['completed_stages']]
+        current = labels.get(pending[0], "Analyzing") if pending else "Finishing up"
+        st.progress(
+            state['progress'],
+            text=f"🔄 {current}... ({len(state['completed_stages'])}/{len(job.stages)} stages complete)"
+        )
+        
+        # Fill in the result tabs as stages finish
+        if state['stage_results']:
+            display_analysis_results(state['stage_results'], complete=False)
+
+def stage_pending(analysis_result, stage, complete=False):
+    """Show a placeholder while a stage's result has not arrived yet"""
+    if stage in analysis_result:
+        return False
+    if complete:
+        st.caption("This section was not included in this analysis.")
+        return True
+    label = dict(ANALYSIS_STAGES).get(stage, "Analyzing")
+    st.info(f"⏳ {label}... This section will appear as soon as it is ready.")
+    return True
+
+def batch_analysis_tab():
+    """Tab for analyzing a pack of contracts together"""
+    
+    st.header("Batch Contract Analysis")
+    st.markdown("Upload several contracts at once. They are extracted and analyzed concurrently, then compared side by side.")
+    
+    uploaded_files = st.file_uploader(
+        "Choose contract files",
+        type=['pdf', 'docx', 'txt'],
+        accept_multiple_files=True,
+        help="Upload up to a few dozen contracts in PDF, DOCX, or TXT format",
+        key="batch_uploader"
+    )
+    
+    concurrency = st.slider(
+        "Contracts analyzed in parallel",
+        min_value=1,
+        max_value=10,
+        value=int(os.getenv('BATCH_CONCURRENCY', '3')),
+        help="Higher values finish sooner but use more of your API rate limit"
+    )
+    
+    depth = st.radio(
+        "Analysis depth",
+        ["Full analysis", "Risk triage"],
+        horizontal=True,
+        help="Risk triage only classifies each contract and scores its risk, at a fraction of the time and cost"
+    )
+    stages = None if depth == "Full analysis" else resolve_stages({"contract_type", "risk_assessment"})
+    
+    if uploaded_files and st.button(f"🤖 Analyze {len(uploaded_files)} Contracts", type="primary"):
+        if not st.session_state.api_key:
+            st.error("⚠️ Please enter your API key in the sidebar first!")
+            return
+        
+        api_key = st.session_state.api_key
+        items = []
+        for uploaded_file in uploaded_files:
+            file_bytes = uploaded_file.getvalue()
+            key = job_key(api_key, "batch", ",".join(stages or []), uploaded_file.name, hashlib.sha256(file_bytes).hexdigest())
+            # Every document gets its own budget; the session ledger is shared
+            budget = AnalysisBudget.from_env(st.session_state.usage_ledger)
+            items.append((uploaded_file.name, key, (api_key, uploaded_file.name, file_bytes, "General", stages, budget)))
+        
+        st.session_state.batch_id = get_job_runner().submit_batch(
+            items, analyze_file, concurrency=concurrency, progress_stages=stages
+        )
+    
+    if st.session_state.batch_id:
+        batch_progress()
+
+@st.fragment(run_every=2.0)
+def batch_progress():
+    """Progress grid for the current batch, then the aggregate dashboard"""
+    runner = get_job_runner()
+    batch = runner.get_batch(st.session_state.batch_id)
+    if batch is None:
+        st.session_state.batch_id = None
+        return
+    
+    rows = []
+    results = []
+    for name, job_id in zip(batch.names, batch.job_ids):
+        job = runner.get(job_id)
+        if job is None:
+            rows.append({"Contract": name, "Status": "waiting", "Progress": 0.0, "Risk Level": ""})
+            continue
+        state = job.snapshot()
+        risk_level = ""
+        if state['status'] == DONE:
+            results.append(state['result'])
+            risk_level = get_report_model(state['result']).risk['level']
+        elif state['status'] == FAILED:
+            risk_level = state['error']
+        rows.append({"Contract": name, "Status": state['status'], "Progress": state['progress'], "Risk Level": str(risk_level)})
+    
+    finished = sum(1 for row in rows if row['Status'] in (DONE, FAILED))
+    st.progress(finished / len(rows), text=f"{finished}/{len(rows)} contracts finished")
+    st.dataframe(
+        rows,
+        use_container_width=True,
+        hide_index=True,
+        column_config={"Progress": st.column_config.ProgressColumn(min_value=0.0, max_value=1.0)}
+    )
+    
+    if results:
+        # pandas and plotly are only loaded once there is something to chart
+        from src.components.batch_dashboard import render_batch_dashboard
+        
+        st.divider()
+        st.subheader("📊 Batch Overview")
+        render_batch_dashboard(results)
+
+def history_tab():
+    """Browse and reopen analyses kept in the result store"""
+    
+    st.header("Analysis History")
+    store = get_result_store()
+    if not st.session_state.api_key:
+        st.info("Enter your API key in the sidebar to see the analyses you have run with it.")
+        return
+    # Analyses are filed under the API key they were run with; other keys' analyses stay hidden
+    owner = store.owner_for(st.session_state.api_key)
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        contract_type = st.text_input("Contract type", placeholder="e.g. NDA")
+    with col2:
+        risk_level = st.selectbox("Risk level", ["Any", "Critical", "High", "Medium", "Low"])
+    with col3:
+        party = st.text_input("Party", placeholder="Exact party name")
+    
+    filters = {
+        "contract_type": contract_type.strip() or None,
+        "risk_level": None if risk_level == "Any" else risk_level,
+        "party": party.strip() or None,
+    }
+    # Start from the first page whenever the filters change
+    if st.session_state.get('history_filters') != (owner, filters):
+        st.session_state.history_filters = (owner, filters)
+        st.session_state.history_cursors = [None]
+    
+    page = len(st.session_state.history_cursors)
+    rows, next_cursor = store.query(owner, cursor=st.session_state.history_cursors[-1], limit=20, **filters)
+    if not rows:
+        st.info("No stored analyses match these filters.")
+        return
+    
+    st.dataframe(
+        [{
+            "ID": row['id'],
+            "Document": row['document_name'] or "",
+            "Type": row['contract_type'] or "",
+            "Risk Level": row['risk_level'] or "",
+            "Risk Score": row['risk_score'],
+            "Analyzed": row['created_at'],
+        } for row in rows],
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        if page > 1 and st.button("← Newer"):
+            st.session_state.history_cursors.pop()
+            st.rerun()
+    with col2:
+        if next_cursor is not None and st.button("Older →"):
+            st.session_state.history_cursors.append(next_cursor)
+            st.rerun()
+    with col3:
+        st.caption(f"Page {page}")
+    
+    selected = st.selectbox(
+        "Open an analysis",
+        options=[row['id'] for row in rows],
+        format_func=lambda analysis_id: next(
+            f"#{row['id']} {row['document_name'] or row['contract_type'] or 'Contract'} ({row['created_at'][:10]})"
+            for row in rows if row['id'] == analysis_id
+        )
+    )
+    if st.button("📂 Open in Upload & Analyze", type="primary"):
+        st.session_state.analysis_result = store.get(selected, owner)
+        st.session_state.analysis_job_id = None
+        st.rerun()
+
+def display_analysis_results(analysis_result, complete=True):
+    """Display the analysis results in organized sections
+    
+    With complete=False the result is partial: tabs whose stages have not finished
+    show a placeholder and fill in on the next poll.
+    """
+    
+    # Normalized once per analysis and shared with every export format
+    report = get_report_model(analysis_result)
+    if complete:
+        prefetch_explanations(report)
     
     st.divider()
-    st.header("📊 Analysis Results")
+    st.header("📊 Analysis Results" if complete else "📊 Analysis Results (in progress)")
+    
+    skipped = analysis_result.get('skipped_stages')
+    if complete and skipped:
+        labels = dict(ANALYSIS_STAGES)
+        st.warning(
+            "⏱️ The analysis hit its time limit, so these sections were skipped: "
+            + ", ".join(labels.get(stage, stage) for stage in skipped)
+        )
+    
+    dropped = (analysis_result.get('usage') or {}).get('budget_dropped_stages')
+    if complete and dropped:
+        labels = dict(ANALYSIS_STAGES)
+        st.info(
+            "💰 These optional sections were left out to stay within the cost budget: "
+            + ", ".join(labels.get(stage, stage) for stage in dropped)
+        )
     
     # Create tabs for different sections
     result_tabs = st.tabs([
@@ -236,207 +590,255 @@ def display_analysis_results(analysis_result):
         st.subheader("Executive Summary")
         
         # Contract classification
-        contract_type = analysis_result.get('contract_type', {})
-        if isinstance(contract_type, dict):
+        if not stage_pending(analysis_result, 'contract_type', complete):
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("Contract Type", contract_type.get('contract_type', 'N/A'))
+                st.metric("Contract Type", report.classification['contract_type'])
             with col2:
-                st.metric("Sub-type", contract_type.get('sub_type', 'N/A'))
+                st.metric("Sub-type", report.classification['sub_type'])
             with col3:
-                st.metric("Confidence", contract_type.get('confidence', 'N/A'))
+                st.metric("Confidence", report.classification['confidence'])
         
         st.divider()
         
         # Summary text
-        summary = analysis_result.get('summary', 'No summary available')
-        st.markdown(f"<div class='info-box'>{summary}</div>", unsafe_allow_html=True)
+        if not stage_pending(analysis_result, 'summary', complete):
+            st.markdown(f"<div class='info-box'>{report.summary}</div>", unsafe_allow_html=True)
     
     # Risk Assessment Tab
     with result_tabs[1]:
         st.subheader("Risk Assessment")
-        
-        risk_assessment = analysis_result.get('risk_assessment', {})
-        
-        if isinstance(risk_assessment, dict):
-            # Overall risk score
-            col1, col2 = st.columns(2)
-            with col1:
-                overall_score = risk_assessment.get('overall_risk_score', 'N/A')
-                st.metric("Overall Risk Score", f"{overall_score}/100")
-            with col2:
-                overall_level = risk_assessment.get('overall_risk_level', 'N/A')
-                st.metric("Risk Level", overall_level)
-            
-            st.divider()
-            
-            # Critical Issues
-            critical_issues = risk_assessment.get('critical_issues', [])
-            if critical_issues:
-                st.markdown("### 🚨 Critical Issues")
-                for issue in critical_issues:
-                    st.markdown(f"<div class='risk-high'>❗ {issue}</div>", unsafe_allow_html=True)
-            
-            # High Risk Clauses
-            high_risk = risk_assessment.get('high_risk_clauses', [])
-            if high_risk:
-                st.markdown("### 🔴 High Risk Clauses")
-                for clause in high_risk:
-                    if isinstance(clause, dict):
-                        clause_text = clause.get('clause', clause.get('description', str(clause)))
-                    else:
-                        clause_text = str(clause)
-                    st.markdown(f"<div class='risk-high'>{clause_text}</div>", unsafe_allow_html=True)
-            
-            # Medium Risk Clauses
-            medium_risk = risk_assessment.get('medium_risk_clauses', [])
-            if medium_risk:
-                st.markdown("### 🟡 Medium Risk Clauses")
-                for clause in medium_risk:
-                    if isinstance(clause, dict):
-                        clause_text = clause.get('clause', clause.get('description', str(clause)))
-                    else:
-                        clause_text = str(clause)
-                    st.markdown(f"<div class='risk-medium'>{clause_text}</div>", unsafe_allow_html=True)
-            
-            # Low Risk Clauses
-            low_risk = risk_assessment.get('low_risk_clauses', [])
-            if low_risk:
-                st.markdown("### 🟢 Low Risk Clauses")
-                for clause in low_risk[:3]:  # Show only first 3
-                    if isinstance(clause, dict):
-                        clause_text = clause.get('clause', clause.get('description', str(clause)))
-                    else:
-                        clause_text = str(clause)
-                    st.markdown(f"<div class='risk-low'>{clause_text}</div>", unsafe_allow_html=True)
+        if not stage_pending(analysis_result, 'risk_assessment', complete):
+            render_risk_assessment(report)
     
     # Key Entities Tab
     with result_tabs[2]:
         st.subheader("Key Contract Entities")
-        
-        entities = analysis_result.get('entities', {})
-        if isinstance(entities, dict):
-            for key, value in entities.items():
-                if value:
-                    st.markdown(f"**{key.replace('_', ' ').title()}:**")
-                    if isinstance(value, list):
-                        for item in value:
-                            st.markdown(f"- {item}")
-                    else:
-                        st.markdown(f"{value}")
-                    st.divider()
+        if not stage_pending(analysis_result, 'entities', complete):
+            render_entities(report)
     
     # Obligations Tab
     with result_tabs[3]:
         st.subheader("Obligations, Rights & Prohibitions")
-        
-        obligations_analysis = analysis_result.get('obligations_analysis', {})
-        
-        if isinstance(obligations_analysis, dict):
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                st.markdown("#### ✅ Obligations")
-                obligations = obligations_analysis.get('obligations', [])
-                for item in obligations:
-                    if isinstance(item, dict):
-                        party = item.get('party', 'N/A')
-                        desc = item.get('description', item.get('clause', 'N/A'))
-                        st.markdown(f"**[{party}]** {desc}")
-                    else:
-                        st.markdown(f"- {item}")
-            
-            with col2:
-                st.markdown("#### 🎯 Rights")
-                rights = obligations_analysis.get('rights', [])
-                for item in rights:
-                    if isinstance(item, dict):
-                        party = item.get('party', 'N/A')
-                        desc = item.get('description', item.get('clause', 'N/A'))
-                        st.markdown(f"**[{party}]** {desc}")
-                    else:
-                        st.markdown(f"- {item}")
-            
-            with col3:
-                st.markdown("#### 🚫 Prohibitions")
-                prohibitions = obligations_analysis.get('prohibitions', [])
-                for item in prohibitions:
-                    if isinstance(item, dict):
-                        party = item.get('party', 'N/A')
-                        desc = item.get('description', item.get('clause', 'N/A'))
-                        st.markdown(f"**[{party}]** {desc}")
-                    else:
-                        st.markdown(f"- {item}")
+        if not stage_pending(analysis_result, 'obligations_analysis', complete):
+            render_obligations(report)
     
     # Unfavorable Clauses Tab
     with result_tabs[4]:
         st.subheader("Unfavorable Clauses & Recommendations")
-        
-        unfavorable = analysis_result.get('unfavorable_clauses', [])
-        alternatives = analysis_result.get('suggested_alternatives', [])
-        
-        if unfavorable:
-            for idx, clause in enumerate(unfavorable, 1):
-                if isinstance(clause, dict):
-                    with st.expander(f"Issue {idx}: {clause.get('clause', 'Clause')[:100]}..."):
-                        st.markdown(f"**Clause:** {clause.get('clause', clause.get('description', 'N/A'))}")
-                        st.markdown(f"**Problem:** {clause.get('why_problematic', clause.get('problem', 'N/A'))}")
-                        st.markdown(f"**Severity:** {clause.get('severity', 'N/A')}")
-                        
-                        if idx <= len(alternatives) and isinstance(alternatives[idx-1], dict):
-                            alt = alternatives[idx-1]
-                            st.divider()
-                            st.markdown("**💡 Recommended Alternative:**")
-                            st.info(alt.get('alternative', alt.get('recommended_alternative', 'N/A')))
-                            
-                            strategy = alt.get('negotiation_strategy', alt.get('why_better', ''))
-                            if strategy:
-                                st.markdown("**📊 Negotiation Strategy:**")
-                                st.success(strategy)
-        else:
-            st.info("No major unfavorable clauses identified.")
+        if not stage_pending(analysis_result, 'unfavorable_clauses', complete):
+            if 'suggested_alternatives' not in analysis_result:
+                if complete:
+                    st.caption("Recommended alternatives were not included in this analysis.")
+                else:
+                    st.caption("⏳ Recommended alternatives are still being generated...")
+            render_unfavorable_clauses(report)
     
     # Export Report Tab
     with result_tabs[5]:
         st.subheader("Export Analysis Report")
         
+        if not complete:
+            st.info("⏳ Reports can be exported once every stage has finished.")
+            return
+        
         st.markdown("""
-        Download a comprehensive PDF report of the contract analysis for:
+        Download a comprehensive report of the contract analysis for:
         - Legal consultation
         - Record keeping
         - Team sharing
         """)
         
-        if st.button("📥 Generate PDF Report", type="primary"):
-            with st.spinner("Generating PDF report..."):
+        export_format = st.selectbox(
+            "Report format",
+            options=list(RENDERERS.keys()),
+            format_func=lambda name: RENDERERS[name].label
+        )
+        renderer = RENDERERS[export_format]
+        
+        if st.button(f"📥 Generate {renderer.label} Report", type="primary"):
+            with st.spinner(f"Generating {renderer.label} report..."):
                 try:
-                    # Create output directory if it doesn't exist
-                    output_dir = "outputs"
-                    os.makedirs(output_dir, exist_ok=True)
-                    
-                    # Generate report
+                    # Render in memory from the cached report model; nothing is written to disk
                     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    output_path = f"{output_dir}/contract_analysis_{timestamp}.pdf"
-                    
-                    ReportGenerator.generate_analysis_report(
-                        analysis_result,
-                        st.session_state.contract_text,
-                        output_path
-                    )
+                    report_bytes = render_report(analysis_result, export_format)
                     
                     # Provide download button
-                    with open(output_path, "rb") as file:
-                        st.download_button(
-                            label="📄 Download PDF Report",
-                            data=file,
-                            file_name=f"contract_analysis_{timestamp}.pdf",
-                            mime="application/pdf"
-                        )
+                    st.download_button(
+                        label=f"📄 Download {renderer.label} Report",
+                        data=report_bytes,
+                        file_name=f"contract_analysis_{timestamp}.{renderer.extension}",
+                        mime=renderer.mime
+                    )
                     
-                    st.success("✅ PDF report generated successfully!")
+                    st.success(f"✅ {renderer.label} report generated successfully!")
                     
                 except Exception as e:
-                    st.error(f"❌ Error generating PDF: {str(e)}")
+                    st.error(f"❌ Error generating report: {str(e)}")
+        
+        stage_metrics = analysis_result.get('stage_metrics')
+        if stage_metrics:
+            with st.expander("⏱️ Model usage by stage"):
+                st.dataframe(
+                    [{
+                        "Stage": dict(ANALYSIS_STAGES).get(metric['stage'], metric['stage']),
+                        "Model": metric['model'],
+                        "Latency (s)": metric['latency_s'],
+                        "Input Tokens": metric['input_tokens'],
+                        "Output Tokens": metric['output_tokens'],
+                        "Cost (USD)": metric['cost_usd'],
+                    } for metric in stage_metrics],
+                    use_container_width=True,
+                    hide_index=True
+                )
+                usage = analysis_result.get('usage') or {}
+                total_cost = usage.get('cost_usd', sum(metric['cost_usd'] or 0 for metric in stage_metrics))
+                caption = f"Estimated model cost for this analysis: ${total_cost:.4f}"
+                if usage:
+                    caption += f" ({usage['input_tokens']:,} input and {usage['output_tokens']:,} output tokens)"
+                if usage.get('unpriced_calls'):
+                    caption += f"; {usage['unpriced_calls']} calls used models missing from the price table"
+                st.caption(caption)
+
+def render_risk_assessment(report):
+    """Risk score, critical issues and clauses grouped by risk level"""
+    risk = report.risk
+    
+    # Overall risk score
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Overall Risk Score", f"{risk['score']}/100")
+    with col2:
+        st.metric("Risk Level", risk['level'])
+    
+    st.divider()
+    
+    # Critical Issues
+    if risk['critical']:
+        st.markdown("### 🚨 Critical Issues")
+        for issue in risk['critical']:
+            st.markdown(f"<div class='risk-high'>❗ {issue}</div>", unsafe_allow_html=True)
+    
+    # Clauses shown in this tab, explained together when one is asked for
+    shown = risk['high'] + risk['medium'] + risk['low'][:3]
+    
+    # High Risk Clauses
+    if risk['high']:
+        st.markdown("### 🔴 High Risk Clauses")
+        for idx, clause_text in enumerate(risk['high']):
+            st.markdown(f"<div class='risk-high'>{clause_text}</div>", unsafe_allow_html=True)
+            with st.expander("💬 Explain this clause"):
+                render_clause_explanation(clause_text, shown, f"high_{idx}")
+    
+    # Medium Risk Clauses
+    if risk['medium']:
+        st.markdown("### 🟡 Medium Risk Clauses")
+        for idx, clause_text in enumerate(risk['medium']):
+            st.markdown(f"<div class='risk-medium'>{clause_text}</div>", unsafe_allow_html=True)
+            with st.expander("💬 Explain this clause"):
+                render_clause_explanation(clause_text, shown, f"medium_{idx}")
+    
+    # Low Risk Clauses
+    if risk['low']:
+        st.markdown("### 🟢 Low Risk Clauses")
+        for idx, clause_text in enumerate(risk['low'][:3]):  # Show only first 3
+            st.markdown(f"<div class='risk-low'>{clause_text}</div>", unsafe_allow_html=True)
+            with st.expander("💬 Explain this clause"):
+                render_clause_explanation(clause_text, shown, f"low_{idx}")
+
+def render_entities(report):
+    """Parties, dates, amounts and other extracted entities"""
+    for label, values in report.entities:
+        st.markdown(f"**{label}:**")
+        if len(values) > 1:
+            for item in values:
+                st.markdown(f"- {item}")
+        else:
+            st.markdown(values[0])
+        st.divider()
+
+def render_obligations(report):
+    """Obligations, rights and prohibitions side by side"""
+    columns = st.columns(3)
+    headings = {
+        'obligations': "#### ✅ Obligations",
+        'rights': "#### 🎯 Rights",
+        'prohibitions': "#### 🚫 Prohibitions",
+    }
+    for column, (category, heading) in zip(columns, headings.items()):
+        with column:
+            st.markdown(heading)
+            for party, desc in report.obligations[category]:
+                if party is not None:
+                    st.markdown(f"**[{party}]** {desc}")
+                else:
+                    st.markdown(f"- {desc}")
+
+def render_unfavorable_clauses(report):
+    """Unfavorable clauses with recommended alternatives"""
+    if not report.unfavorable:
+        st.info("No major unfavorable clauses identified.")
+        return
+    
+    shown = [clause['clause'] for clause in report.unfavorable]
+    for idx, clause in enumerate(report.unfavorable, 1):
+        with st.expander(f"Issue {idx}: {clause['clause'][:100]}..."):
+            st.markdown(f"**Clause:** {clause['clause']}")
+            st.markdown(f"**Problem:** {clause['problem'] or 'N/A'}")
+            st.markdown(f"**Severity:** {clause['severity']}")
+            render_clause_explanation(clause['clause'], shown, f"unfavorable_{idx}")
+            
+            if clause['alternative'] or clause['strategy']:
+                st.divider()
+                st.markdown("**💡 Recommended Alternative:**")
+                st.info(clause['alternative'] or 'N/A')
+                
+                if clause['strategy']:
+                    st.markdown("**📊 Negotiation Strategy:**")
+                    st.success(clause['strategy'])
+
+def prefetch_explanations(report):
+    """Explain high-risk and high-severity clauses in the background so they open instantly
+
+    Skipped without an API key, when EXPLAIN_PREFETCH is false, or once the
+    session budget is spent.
+    """
+    if not st.session_state.api_key or os.getenv('EXPLAIN_PREFETCH', 'true').lower() != 'true':
+        return
+    ledger = st.session_state.usage_ledger
+    remaining = AnalysisBudget.from_env(ledger).remaining(0.0)
+    if remaining is not None and remaining <= 0:
+        return
+    clauses = report.risk['high'] + [
+        clause['clause'] for clause in report.unfavorable if str(clause['severity']).lower() == 'high'
+    ]
+    if clauses:
+        get_clause_explainer().prefetch(st.session_state.api_key, clauses, ledger)
+
+def render_clause_explanation(clause_text, batch_with, widget_key):
+    """Cached plain-language explanation of a clause, or a button that fetches it
+    
+    Fetching one clause also explains the other unexplained clauses in batch_with
+    in the same request.
+    """
+    explainer = get_clause_explainer()
+    explanation = explainer.cached(clause_text)
+    if explanation is None:
+        if not st.session_state.api_key:
+            st.caption("Enter an API key in the sidebar to get plain-language explanations.")
+            return
+        if explainer.pending(st.session_state.api_key, clause_text):
+            st.caption("⏳ An explanation is being prepared...")
+        if st.button("💬 Explain this clause", key=f"explain_{widget_key}_{clause_key(clause_text)[:12]}"):
+            with st.spinner("Explaining..."):
+                try:
+                    explanation = explainer.explain(st.session_state.api_key, clause_text, batch_with,
+                                                    ledger=st.session_state.usage_ledger)
+                except Exception as e:
+                    st.error(f"❌ Could not explain this clause: {str(e)}")
+    if explanation is not None:
+        st.markdown("**💬 In plain language:**")
+        st.markdown(explanation)
 
 def templates_tab():
     """Tab for contract templates"""
@@ -535,7 +937,7 @@ def how_to_use_tab():
     
     ⚠️ **This tool provides analysis and suggestions, not legal advice.**
     
-    🔒 **Your documents are processed securely and not stored.**
+    🔒 **Your documents are processed securely and not stored.** If your deployment enables analysis history, results (not the documents themselves) are kept on the server.
     
     👨‍⚖️ **Always consult with a qualified lawyer for final decisions.**
     
@@ -557,7 +959,7 @@ def how_to_use_tab():
     ### Privacy & Security
     
     - Documents are processed in real-time
-    - No data is permanently stored
+    - No data is permanently stored unless analysis history is enabled
     - Analysis happens through secure API calls
     - Your contracts remain confidential
     """)
@@ -0,0 +1,125 @@
+"""Measure cold-start cost of the Streamlit app
+
+Each run uses a fresh interpreter, so module imports are paid again the way they
+are on a new container:
+
+    python benchmark_startup.py --runs 5
+    python benchmark_startup.py --importtime     # slowest imports of one cold start
+    python benchmark_startup.py --json           # machine-readable, for tracking over time
+
+Reported per run:
+    import_ms       importing app.py (module-level code only)
+    first_paint_ms  first full script execution, as for a user opening the page
+    rerun_ms        a second execution, as for any widget interaction
+    heavy_modules   optional heavy dependencies loaded by the first page view
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ["google.generativeai", "anthropic", "reportlab", "PyPDF2", "docx", "plotly", "pandas"]
+
+_CHILD = r"""
+import json, sys, time, warnings
+warnings.filterwarnings("ignore")
+heavy = {heavy!r}
+
+start = time.perf_counter()
+import app
+import_ms = (time.perf_counter() - start) * 1000
+
+first_paint_ms = rerun_ms = None
+try:
+    from streamlit.testing.v1 import AppTest
+except ImportError:
+    AppTest = None
+if AppTest is not None:
+    at = AppTest.from_file("app.py", default_timeout=120)
+    start = time.perf_counter()
+    at.run()
+    first_paint_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    at.run()
+    rerun_ms = (time.perf_counter() - start) * 1000
+
+print(json.dumps({{
+    "import_ms": import_ms,
+    "first_paint_ms": first_paint_ms,
+    "rerun_ms": rerun_ms,
+    "heavy_modules": [name for name in heavy if name in sys.modules],
+}}))
+"""
+
+
+def _run_once(root: str) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-c", _CHILD.format(heavy=HEAVY_MODULES)],
+        cwd=root, capture_output=True, text=True, check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _import_profile(root: str, top: int) -> list:
+    """Slowest modules by cumulative import time, from python -X importtime"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=root, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def _summary(values: list) -> dict:
+    values = [value for value in values if value is not None]
+    if not values:
+        return {}
+    return {"median": statistics.median(values), "min": min(values), "max": max(values)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark app import and first-paint latency")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts to measure")
+    parser.add_argument("--importtime", action="store_true", help="Also list the slowest imports")
+    parser.add_argument("--top", type=int, default=15, help="Imports to list with --importtime")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    runs = [_run_once(root) for _ in range(args.runs)]
+    report = {
+        "runs": args.runs,
+        "import_ms": _summary([run["import_ms"] for run in runs]),
+        "first_paint_ms": _summary([run["first_paint_ms"] for run in runs]),
+        "rerun_ms": _summary([run["rerun_ms"] for run in runs]),
+        "heavy_modules": sorted({name for run in runs for name in run["heavy_modules"]}),
+    }
+    if args.importtime:
+        report["slowest_imports_us"] = [{"module": name, "cumulative_us": us}
+                                        for us, name in _import_profile(root, args.top)]
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"Cold starts measured: {args.runs}")
+    for key, label in [("import_ms", "Import app.py"), ("first_paint_ms", "First paint"), ("rerun_ms", "Rerun")]:
+        stats = report[key]
+        if stats:
+            print(f"{label:<15} median {stats['median']:8.1f} ms   min {stats['min']:8.1f} ms   max {stats['max']:8.1f} ms")
+        else:
+            print(f"{label:<15} not measured (streamlit.testing is unavailable)")
+    print(f"Heavy modules loaded at startup: {', '.join(report['heavy_modules']) or 'none'}")
+    for row in report.get("slowest_imports_us", []):
+        print(f"  {row['cumulative_us'] / 1000:8.1f} ms  {row['module']}")
+
+
+if __name__ == "__main__":
+    main()
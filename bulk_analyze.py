@@ -0,0 +1,91 @@
+"""Overnight bulk analysis through a provider batch API
+
+All stage prompts for all contracts go out as batch jobs, at half the price of
+synchronous calls and without rate-limit pacing. Progress lives in the state
+file, so an interrupted run picks up where it stopped:
+
+    python bulk_analyze.py backlog.db contracts/*.pdf          # queue and run
+    python bulk_analyze.py backlog.db                           # resume
+    python bulk_analyze.py backlog.db --export results.jsonl    # finished results
+    python bulk_analyze.py backlog.db samples/*.txt --backend local --poll 1
+
+The anthropic backend reads FAILOVER_ANTHROPIC_API_KEY. The local backend is an
+offline stand-in for the batch API that answers with placeholder results, kept
+under --local-dir. Finished analyses also go to the result store when
+RESULT_STORE_PATH is set, filed under --history-key (default ANTHROPIC_API_KEY,
+the app's default key), so they appear in the history of app sessions using
+that key.
+"""
+import argparse
+import json
+import os
+import sys
+
+from src.utils.analysis_service import extract_contract_text
+from src.utils.bulk_analysis import AnthropicBatchBackend, BulkRunner, LocalBatchBackend
+from src.utils.result_store import ResultStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze a backlog of contracts through a batch API")
+    parser.add_argument("state", help="State file (SQLite); reuse it to resume")
+    parser.add_argument("files", nargs="*", help="Contracts to add (PDF, DOCX or TXT)")
+    parser.add_argument("--backend", choices=["anthropic", "local"], default="anthropic")
+    parser.add_argument("--local-dir", default="bulk_batches", help="Where the local stand-in keeps its batches")
+    parser.add_argument("--stages", nargs="+", help="Only these stages (and their dependencies)")
+    parser.add_argument("--poll", type=float, default=60, help="Seconds between batch status checks")
+    parser.add_argument("--max-batch-requests", type=int, default=10000)
+    parser.add_argument("--export", help="Write finished results to this JSONL file and exit")
+    parser.add_argument("--history-key", default=os.getenv("ANTHROPIC_API_KEY", ""),
+                        help="API key whose app history the results are saved to")
+    args = parser.parse_args()
+
+    if args.backend == "local":
+        backend = LocalBatchBackend(args.local_dir)
+        api_key = "offline"
+    else:
+        api_key = os.getenv("FAILOVER_ANTHROPIC_API_KEY")
+        if not api_key:
+            raise SystemExit("Set FAILOVER_ANTHROPIC_API_KEY, or use --backend local")
+        backend = AnthropicBatchBackend(api_key)
+
+    # The prompts are the Anthropic analyzer's; the runner answers them from batch responses
+    from src.utils.analyzer import ContractAnalyzer
+
+    store = ResultStore.from_env()
+    if store is not None and not args.history_key:
+        print("No --history-key or ANTHROPIC_API_KEY; results will not be saved to the result store", file=sys.stderr)
+        store = None
+    runner = BulkRunner(args.state, backend, ContractAnalyzer(api_key), stages=args.stages, store=store,
+                        max_batch_requests=args.max_batch_requests,
+                        owner=store.owner_for(args.history_key) if store is not None else None)
+
+    if args.export:
+        count = 0
+        with open(args.export, "w", encoding="utf-8") as file:
+            for result in runner.iter_results():
+                file.write(json.dumps(result, default=str) + "\n")
+                count += 1
+        print(f"Wrote {count} results to {args.export}")
+        return
+
+    documents = []
+    for path in args.files:
+        try:
+            with open(path, "rb") as file:
+                documents.append((os.path.basename(path), extract_contract_text(file.read(), path)))
+        except Exception as e:
+            print(f"Skipping {path}: {e}", file=sys.stderr)
+    if documents:
+        print(f"Queued {runner.add_documents(documents)} new contracts")
+
+    def report(progress):
+        documents = progress["documents"]
+        print(f"done {documents.get('done', 0)}, pending {documents.get('pending', 0)}, "
+              f"batches in flight {progress['batches_in_flight']}, requests {progress['requests']}", flush=True)
+
+    runner.run(poll_interval=args.poll, on_progress=report)
+
+
+if __name__ == "__main__":
+    main()
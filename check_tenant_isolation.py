@@ -0,0 +1,155 @@
+"""Check that concurrent analyses with different Gemini API keys stay isolated
+
+Runs many analyses at once, each with its own API key, against a local stand-in
+for the Gemini REST API. Every contract carries its tenant's marker, and the
+stand-in checks that each request arrives with that tenant's key:
+
+    python check_tenant_isolation.py                    # analyzers with per-key clients
+    python check_tenant_isolation.py --sessions 100 --concurrency 50
+    python check_tenant_isolation.py --legacy           # process-wide genai.configure(), for comparison
+
+Exits with status 1 if any request went out under another tenant's key.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_TENANT_RE = re.compile(r"TENANT-ID: (tenant-\d+)")
+
+CONTRACT = """SERVICE AGREEMENT
+
+TENANT-ID: {tenant}
+
+This Agreement is entered into on January 15, 2026 between {tenant} Pvt Ltd (the "Client") and
+TechSolutions Pvt Ltd (the "Service Provider").
+
+1. The Service Provider shall deliver the software by March 31, 2026. TENANT-ID: {tenant}
+
+2. The Client shall pay INR 5,00,000 within 30 days of invoice. TENANT-ID: {tenant}
+
+3. This Agreement is governed by the laws of India. TENANT-ID: {tenant}
+"""
+
+
+class Tally:
+    """Requests the stand-in has seen, by outcome"""
+
+    def __init__(self):
+        self.matched = 0
+        self.mismatched = 0
+        self.unmarked = 0
+        self.examples = []
+        self._lock = threading.Lock()
+
+    def record(self, key: str, tenant):
+        with self._lock:
+            if tenant is None:
+                self.unmarked += 1
+            elif key == tenant:
+                self.matched += 1
+            else:
+                self.mismatched += 1
+                if len(self.examples) < 5:
+                    self.examples.append(f"{tenant}'s request sent with {key}'s key")
+
+
+def make_server(tally: Tally, max_delay: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8")
+            key = self.headers.get("x-goog-api-key") or ""
+            tenants = set(_TENANT_RE.findall(body))
+            tally.record(key, tenants.pop() if len(tenants) == 1 else None)
+            # A random pause interleaves the sessions' calls
+            time.sleep(random.uniform(0, max_delay))
+            text = "[]" if "JSON array" in body else json.dumps({"tenant": key})
+            payload = json.dumps({
+                "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP"}],
+                "usageMetadata": {"promptTokenCount": 100, "candidatesTokenCount": 10},
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def run_session(tenant: str):
+    """One user's analysis, through the app's analyzer"""
+    from src.utils.gemini_analyzer import GeminiAnalyzer
+
+    GeminiAnalyzer(tenant).analyze_contract(CONTRACT.format(tenant=tenant))
+
+
+def run_legacy_session(tenant: str, endpoint: str):
+    """The old pattern: configure the process-wide client, then call it"""
+    import google.generativeai as genai
+
+    genai.configure(api_key=tenant, transport="rest", client_options={"api_endpoint": endpoint})
+    for _ in range(5):
+        genai.GenerativeModel("models/gemini-2.5-flash").generate_content(CONTRACT.format(tenant=tenant))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check API key isolation between concurrent sessions")
+    parser.add_argument("--sessions", type=int, default=40, help="Analyses to run, each with its own key")
+    parser.add_argument("--concurrency", type=int, default=20, help="Analyses running at once")
+    parser.add_argument("--max-delay", type=float, default=0.05, help="Longest stand-in response delay (s)")
+    parser.add_argument("--legacy", action="store_true", help="Use the process-wide genai.configure() instead")
+    args = parser.parse_args()
+
+    tally = Tally()
+    server = make_server(tally, args.max_delay)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+
+    os.environ.update({
+        "GEMINI_TRANSPORT": "rest",
+        "GEMINI_API_ENDPOINT": endpoint,
+        # Every prompt then carries the tenant marker from the contract
+        "PROMPT_SCOPING": "false",
+    })
+    for name in ("FAILOVER_ANTHROPIC_API_KEY", "STAGE_METRICS_PATH", "GEMINI_API_KEY", "GOOGLE_API_KEY"):
+        os.environ.pop(name, None)
+
+    tenants = [f"tenant-{index:03d}" for index in range(args.sessions)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        if args.legacy:
+            futures = [pool.submit(run_legacy_session, tenant, endpoint) for tenant in tenants]
+        else:
+            futures = [pool.submit(run_session, tenant) for tenant in tenants]
+        failures = [str(future.exception()) for future in futures if future.exception() is not None]
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    total = tally.matched + tally.mismatched
+    print(f"{args.sessions} sessions, {args.concurrency} at a time, in {elapsed:.1f}s "
+          f"({total / elapsed:.0f} requests/s)")
+    print(f"requests with the right key: {tally.matched}, with another tenant's key: {tally.mismatched}, "
+          f"without a tenant marker: {tally.unmarked}")
+    for example in tally.examples:
+        print(f"  {example}")
+    if failures:
+        print(f"{len(failures)} sessions failed, e.g. {failures[0]}")
+    if tally.mismatched or failures or not total:
+        sys.exit(1)
+    print("OK: every request used its own session's key")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""Compare candidate models on the contract prompts the analyzer sends
+
+Each model gets the same standard prompts, streamed, so time to first token can be
+told apart from generation speed:
+
+    python probe_models.py                          # Gemini models from the routing catalog
+    python probe_models.py --provider anthropic
+    python probe_models.py --models models/gemini-2.5-flash models/gemini-2.5-pro --runs 5
+    python probe_models.py --backend stub           # offline, no key or network (CI)
+    python probe_models.py --list                   # models the key can call
+    python probe_models.py --output probe.md        # also write the table (.md, .csv or .json)
+
+Credentials come from the environment: GEMINI_API_KEY (falling back to
+ANTHROPIC_API_KEY, which the app uses for its Gemini key) for Gemini, and
+FAILOVER_ANTHROPIC_API_KEY for Anthropic.
+
+Reported per model:
+    ttft        time to first streamed token, median
+    p50/p95/p99 end-to-end latency
+    tok/s       output tokens per second after the first token, median
+    json_ok     share of JSON-answer prompts whose reply parses as JSON
+    errors      calls that raised
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from src.utils.model_router import MODEL_CATALOG
+from src.utils.text_normalizer import estimate_tokens
+
+DEFAULT_CONTRACT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "sample_contracts", "service_agreement_sample.txt")
+
+
+class ProbeTask(NamedTuple):
+    """One standard prompt, named after the analysis stage it stands in for"""
+    stage: str
+    prompt: str
+    expects_json: bool
+    max_tokens: int
+
+
+def probe_tasks(contract_text: str) -> List[ProbeTask]:
+    return [
+        ProbeTask("contract_type", f"""Classify this contract as one of: Employment Agreement, Vendor Contract, Lease Agreement, Partnership Deed, Service Contract, Non-Disclosure Agreement (NDA), Purchase Agreement, Other.
+
+Contract text:
+{contract_text[:2000]}
+
+Respond with ONLY a JSON object (no markdown, no backticks) with keys contract_type, sub_type, confidence (high/medium/low).""", True, 200),
+        ProbeTask("entities", f"""Extract parties, dates, financial_terms and jurisdiction from this contract.
+
+Contract text:
+{contract_text[:3000]}
+
+Respond with ONLY a JSON object (no markdown, no backticks) with keys parties, dates, financial_terms, jurisdiction.""", True, 800),
+        ProbeTask("risk_assessment", f"""Perform a risk assessment of this contract for an Indian SME.
+
+Contract text:
+{contract_text[:4000]}
+
+Respond with ONLY JSON (no markdown, no backticks) with keys overall_risk_score (0-100), overall_risk_level, high_risk_clauses, medium_risk_clauses, low_risk_clauses.""", True, 1500),
+        ProbeTask("summary", f"""Summarize this contract for a small business owner in a few short paragraphs.
+
+Contract text:
+{contract_text[:4000]}""", False, 800),
+    ]
+
+
+def parses_as_json(text: str) -> bool:
+    """Same leniency as the analyzers: a surrounding markdown fence is allowed"""
+    cleaned = text.strip()
+    if cleaned.startswith("```json"):
+        cleaned = cleaned[7:]
+    elif cleaned.startswith("```"):
+        cleaned = cleaned[3:]
+    if cleaned.endswith("```"):
+        cleaned = cleaned[:-3]
+    try:
+        json.loads(cleaned.strip())
+        return True
+    except json.JSONDecodeError:
+        return False
+
+
+class GeminiBackend:
+    provider = "gemini"
+
+    def __init__(self, api_key: str, timeout: float):
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.genai = genai
+        self.timeout = timeout
+
+    def list_models(self) -> List[str]:
+        return [model.name for model in self.genai.list_models()
+                if "generateContent" in model.supported_generation_methods]
+
+    def stream(self, model: str, prompt: str, max_tokens: int, usage: Dict) -> Iterator[str]:
+        response = self.genai.GenerativeModel(model).generate_content(
+            prompt,
+            generation_config={"max_output_tokens": max_tokens},
+            stream=True,
+            request_options={"timeout": self.timeout},
+        )
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:  # chunk without text parts, e.g. a safety block
+                continue
+            if text:
+                yield text
+        metadata = getattr(response, "usage_metadata", None)
+        usage["output_tokens"] = getattr(metadata, "candidates_token_count", None)
+
+
+class AnthropicBackend:
+    provider = "anthropic"
+
+    def __init__(self, api_key: str, timeout: float):
+        import anthropic
+
+        self.client = anthropic.Client(api_key=api_key, timeout=timeout)
+
+    def list_models(self) -> List[str]:
+        return [model.id for model in self.client.models.list()]
+
+    def stream(self, model: str, prompt: str, max_tokens: int, usage: Dict) -> Iterator[str]:
+        with self.client.messages.stream(model=model, max_tokens=max_tokens,
+                                         messages=[{"role": "user", "content": prompt}]) as stream:
+            for text in stream.text_stream:
+                yield text
+            usage["output_tokens"] = stream.get_final_message().usage.output_tokens
+
+
+class StubBackend:
+    """Deterministic offline backend with tier-shaped latency, for CI runs of the probe
+
+    Faster tiers answer sooner and occasionally wrap their JSON in prose, so the
+    table and the suggested stage map exercise every column without a network.
+    """
+
+    _PROFILES = {  # tier: (first token s, s per chunk, share of malformed JSON)
+        "fast": (0.010, 0.0005, 0.25),
+        "standard": (0.020, 0.0010, 0.05),
+        "strong": (0.040, 0.0020, 0.0),
+    }
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self._tiers = {spec.name: tier for tier, spec in MODEL_CATALOG[provider].items()}
+
+    def list_models(self) -> List[str]:
+        return list(self._tiers)
+
+    def stream(self, model: str, prompt: str, max_tokens: int, usage: Dict) -> Iterator[str]:
+        first_token, per_chunk, malformed = self._PROFILES[self._tiers.get(model, "standard")]
+        seed = hashlib.sha256(f"{model}\n{prompt}\n{usage.get('run', 0)}".encode()).hexdigest()
+        rng = random.Random(seed)
+        if "JSON" in prompt:
+            reply = json.dumps({"model": model, "items": ["clause"] * rng.randint(5, 40)})
+            if rng.random() < malformed:
+                reply = "Here is the analysis: " + reply
+        else:
+            reply = " ".join(["summary"] * rng.randint(40, 160))
+        time.sleep(first_token * rng.uniform(0.8, 1.5))
+        chunks = [reply[i:i + 40] for i in range(0, len(reply), 40)]
+        for chunk in chunks:
+            yield chunk
+            time.sleep(per_chunk)
+        usage["output_tokens"] = min(max_tokens, estimate_tokens(reply))
+
+
+def probe_call(backend, model: str, task: ProbeTask, run: int) -> Dict:
+    usage = {"run": run}
+    started = time.perf_counter()
+    first_token_at = None
+    parts = []
+    try:
+        for text in backend.stream(model, task.prompt, task.max_tokens, usage):
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            parts.append(text)
+    except Exception as e:
+        return {"model": model, "stage": task.stage, "ok": False, "error": str(e)}
+    finished = time.perf_counter()
+
+    reply = "".join(parts)
+    output_tokens = usage.get("output_tokens") or estimate_tokens(reply)
+    first_token_at = first_token_at or finished
+    generation = finished - first_token_at
+    return {
+        "model": model,
+        "stage": task.stage,
+        "ok": True,
+        "ttft_s": first_token_at - started,
+        "latency_s": finished - started,
+        "output_tokens": output_tokens,
+        "tokens_per_s": output_tokens / generation if generation > 0 else None,
+        "json_ok": parses_as_json(reply) if task.expects_json else None,
+    }
+
+
+def _percentile(values: List[float], share: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def summarize(calls: List[Dict], key: str = "model") -> List[Dict]:
+    """Comparison rows grouped by model, or by (model, stage) with key="stage" """
+    groups: Dict[tuple, List[Dict]] = {}
+    for call in calls:
+        group = (call["model"], call["stage"]) if key == "stage" else (call["model"],)
+        groups.setdefault(group, []).append(call)
+
+    rows = []
+    for group, items in groups.items():
+        ok = [item for item in items if item["ok"]]
+        latencies = [item["latency_s"] for item in ok]
+        speeds = [item["tokens_per_s"] for item in ok if item["tokens_per_s"] is not None]
+        json_checks = [item["json_ok"] for item in ok if item["json_ok"] is not None]
+        row = {"model": group[0]}
+        if key == "stage":
+            row["stage"] = group[1]
+        row.update({
+            "calls": len(items),
+            "errors": len(items) - len(ok),
+            "ttft_s": statistics.median(item["ttft_s"] for item in ok) if ok else None,
+            "p50_s": _percentile(latencies, 0.50),
+            "p95_s": _percentile(latencies, 0.95),
+            "p99_s": _percentile(latencies, 0.99),
+            "tokens_per_s": statistics.median(speeds) if speeds else None,
+            "json_ok": sum(json_checks) / len(json_checks) if json_checks else None,
+        })
+        rows.append(row)
+    return rows
+
+
+def suggest_stage_models(stage_rows: List[Dict], min_json_ok: float = 0.95) -> Dict[str, str]:
+    """Lowest-p95 model per stage among those that never failed and answer with valid JSON"""
+    suggestion = {}
+    for stage in dict.fromkeys(row["stage"] for row in stage_rows):
+        candidates = [row for row in stage_rows
+                      if row["stage"] == stage and row["errors"] == 0 and row["p95_s"] is not None
+                      and (row["json_ok"] is None or row["json_ok"] >= min_json_ok)]
+        if candidates:
+            suggestion[stage] = min(candidates, key=lambda row: row["p95_s"])["model"]
+    return suggestion
+
+
+_COLUMNS = [("model", "model", "{}"), ("calls", "calls", "{}"), ("errors", "errors", "{}"),
+            ("ttft_s", "ttft s", "{:.3f}"), ("p50_s", "p50 s", "{:.3f}"), ("p95_s", "p95 s", "{:.3f}"),
+            ("p99_s", "p99 s", "{:.3f}"), ("tokens_per_s", "tok/s", "{:.1f}"), ("json_ok", "json_ok", "{:.0%}")]
+
+
+def _cell(row: Dict, key: str, fmt: str) -> str:
+    return "n/a" if row.get(key) is None else fmt.format(row[key])
+
+
+def format_table(rows: List[Dict]) -> str:
+    """Markdown comparison table, readable as plain text too"""
+    lines = ["| " + " | ".join(label for _, label, _ in _COLUMNS) + " |",
+             "|" + "|".join("---" for _ in _COLUMNS) + "|"]
+    for row in rows:
+        lines.append("| " + " | ".join(_cell(row, key, fmt) for key, _, fmt in _COLUMNS) + " |")
+    return "\n".join(lines)
+
+
+def write_report(path: str, rows: List[Dict], stage_rows: List[Dict], suggestion: Dict[str, str]):
+    if path.endswith(".json"):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"models": rows, "stages": stage_rows, "suggested_stage_models": suggestion}, file, indent=2)
+    elif path.endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=list(stage_rows[0]) if stage_rows else ["model"])
+            writer.writeheader()
+            writer.writerows(stage_rows)
+    else:
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(format_table(rows) + "\n")
+
+
+def create_backend(name: str, provider: str, timeout: float):
+    if name == "stub":
+        return StubBackend(provider)
+    if provider == "gemini":
+        api_key = os.getenv("GEMINI_API_KEY") or os.getenv("ANTHROPIC_API_KEY")
+        if not api_key:
+            raise SystemExit("Set GEMINI_API_KEY (or ANTHROPIC_API_KEY) to probe Gemini models, or use --backend stub")
+        return GeminiBackend(api_key, timeout)
+    api_key = os.getenv("FAILOVER_ANTHROPIC_API_KEY")
+    if not api_key:
+        raise SystemExit("Set FAILOVER_ANTHROPIC_API_KEY to probe Anthropic models, or use --backend stub")
+    return AnthropicBackend(api_key, timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure latency, throughput and JSON reliability of candidate models")
+    parser.add_argument("--provider", choices=sorted(MODEL_CATALOG), default="gemini")
+    parser.add_argument("--backend", choices=["live", "stub"], default="live",
+                        help="stub runs offline with simulated models")
+    parser.add_argument("--models", nargs="+", help="Models to probe (default: the provider's routing catalog)")
+    parser.add_argument("--runs", type=int, default=3, help="Calls per model and prompt")
+    parser.add_argument("--contract", default=DEFAULT_CONTRACT, help="Contract text used in the prompts")
+    parser.add_argument("--timeout", type=float, default=120, help="Per-call timeout in seconds")
+    parser.add_argument("--list", action="store_true", help="List the models the credentials can call and exit")
+    parser.add_argument("--by-stage", action="store_true", help="Also print one row per model and prompt")
+    parser.add_argument("--output", help="Write the comparison to a .md, .csv or .json file")
+    args = parser.parse_args()
+
+    backend = create_backend(args.backend, args.provider, args.timeout)
+    if args.list:
+        for model in backend.list_models():
+            print(model)
+        return
+
+    with open(args.contract, encoding="utf-8") as file:
+        tasks = probe_tasks(file.read())
+    models = args.models or [spec.name for spec in MODEL_CATALOG[args.provider].values()]
+
+    calls = []
+    for model in models:
+        for task in tasks:
+            for run in range(args.runs):
+                call = probe_call(backend, model, task, run)
+                calls.append(call)
+                if not call["ok"]:
+                    print(f"  {model} {task.stage}: {call['error']}", file=sys.stderr)
+
+    rows = summarize(calls)
+    stage_rows = summarize(calls, key="stage")
+    suggestion = suggest_stage_models(stage_rows)
+
+    print(format_table(rows))
+    if args.by_stage:
+        print()
+        for row in stage_rows:
+            print(f"{row['stage']:<18}{row['model']:<34}p95 {_cell(row, 'p95_s', '{:.3f}'):>7} s"
+                  f"   json_ok {_cell(row, 'json_ok', '{:.0%}'):>5}   errors {row['errors']}")
+    if suggestion:
+        # In the format the analyzers' routing variables take
+        variable = "STAGE_MODELS" if args.provider == "gemini" else "FAILOVER_STAGE_MODELS"
+        print(f"\nSuggested {variable}=" + ",".join(f"{stage}={model}" for stage, model in suggestion.items()))
+    if args.output:
+        write_report(args.output, rows, stage_rows, suggestion)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+from collections import Counter
+from typing import Dict, List
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from src.utils.clause_taxonomy import classify_clause
+from src.utils.report_model import get_report_model
+
+
+def _score(value):
+    try:
+        return float(str(value).split("/")[0])
+    except (TypeError, ValueError):
+        return None
+
+
+def batch_dataframe(results: List[Dict]) -> pd.DataFrame:
+    """One row per analyzed contract with its headline risk figures"""
+    rows = []
+    for analysis_result in results:
+        report = get_report_model(analysis_result)
+        rows.append({
+            "Contract": analysis_result.get("document_name", "Contract"),
+            "Type": report.classification["contract_type"],
+            "Risk Score": _score(report.risk["score"]),
+            "Risk Level": str(report.risk["level"]),
+            "High Risk Clauses": len(report.risk["high"]),
+            "Critical Issues": len(report.risk["critical"]),
+            "Unfavorable Clauses": len(report.unfavorable),
+        })
+    return pd.DataFrame(rows)
+
+
+def shared_clause_types(results: List[Dict]) -> pd.DataFrame:
+    """How many contracts contain each high-risk clause type"""
+    counts = Counter()
+    for analysis_result in results:
+        report = get_report_model(analysis_result)
+        types = set()
+        for clause in report.risk["high"] + report.risk["critical"]:
+            types.update(classify_clause(clause))
+        counts.update(types)
+    return pd.DataFrame(counts.most_common(), columns=["Clause Type", "Contracts"])
+
+
+def render_batch_dashboard(results: List[Dict]):
+    """Aggregate view across a batch: score distribution, shared risks, ranking"""
+    if not results:
+        st.info("No completed analyses yet.")
+        return
+
+    df = batch_dataframe(results)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Contracts Analyzed", len(df))
+    with col2:
+        average = df["Risk Score"].mean()
+        st.metric("Average Risk Score", f"{average:.0f}/100" if pd.notna(average) else "N/A")
+    with col3:
+        st.metric("High/Critical Risk", int(df["Risk Level"].str.lower().isin(["high", "critical"]).sum()))
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("#### Risk Score Distribution")
+        scored = df.dropna(subset=["Risk Score"])
+        if not scored.empty:
+            fig = px.histogram(scored, x="Risk Score", nbins=10, range_x=[0, 100], color="Risk Level")
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.caption("No numeric risk scores available.")
+    with col2:
+        st.markdown("#### Shared High-Risk Clause Types")
+        clause_types = shared_clause_types(results)
+        if not clause_types.empty:
+            fig = px.bar(clause_types, x="Contracts", y="Clause Type", orientation="h")
+            fig.update_layout(yaxis={"categoryorder": "total ascending"})
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.caption("No high-risk clauses found.")
+
+    st.markdown("#### Contracts by Risk")
+    st.dataframe(
+        df.sort_values("Risk Score", ascending=False, na_position="last"),
+        use_container_width=True,
+        hide_index=True,
+        column_config={"Risk Score": st.column_config.ProgressColumn(min_value=0, max_value=100, format="%d")},
+    )
@@ -0,0 +1,88 @@
+import os
+from typing import Callable, Dict, Iterable, Optional
+
+from src.utils.cost_accounting import AnalysisBudget
+from src.utils.document_processor import DocumentProcessor
+from src.utils.extraction_sandbox import ExtractionLimits, extract_in_sandbox
+from src.utils.pipeline import resolve_stages
+from src.utils.result_store import ResultStore
+
+
+def extract_contract_text(file_bytes: bytes, file_name: str, limits: Optional[ExtractionLimits] = None) -> str:
+    """Extract and normalize the text of an uploaded contract
+
+    Extraction runs in the sandbox unless EXTRACTION_SANDBOX is set to false.
+    """
+    limits = limits or ExtractionLimits.from_env()
+    if os.getenv("EXTRACTION_SANDBOX", "true").lower() == "true":
+        document = extract_in_sandbox(file_bytes, file_name, limits)
+    else:
+        document = DocumentProcessor.extract_structure(file_bytes, file_name, limits.max_pages)
+    return DocumentProcessor.normalize_text(document.text).text
+
+
+def stored_analysis(store: Optional[ResultStore], api_key: str, contract_text: str,
+                    stages: Optional[Iterable[str]] = None) -> Optional[Dict]:
+    """Latest analysis of this text stored under api_key that contains every requested stage, if any
+
+    Stages the stored analysis dropped to stay within budget are not covered, so a
+    budget-limited result is never reused in place of a full one.
+    """
+    stored = store.latest_for_document(contract_text, store.owner_for(api_key)) if store is not None else None
+    if stored is None:
+        return None
+    if not all(stage in stored for stage in resolve_stages(stages)):
+        return None
+    return stored
+
+
+def create_analyzer(api_key: str):
+    """Analyzer for one analysis: Gemini alone, or Gemini with Anthropic failover when configured"""
+    # The LLM SDKs are only imported once an analysis actually runs
+    from src.utils.failover_analyzer import FailoverAnalyzer
+    from src.utils.gemini_analyzer import GeminiAnalyzer
+
+    return FailoverAnalyzer.from_env(api_key) or GeminiAnalyzer(api_key)
+
+
+def analyze_text(api_key: str, contract_text: str, contract_type: str = "General",
+                 progress_callback: Optional[Callable[[str, object], None]] = None,
+                 document_name: Optional[str] = None, store: Optional[ResultStore] = None,
+                 stages: Optional[Iterable[str]] = None, budget: Optional[AnalysisBudget] = None) -> Dict:
+    """Analyze contract text and record the result in the store, if there is one
+
+    stages limits the analysis to those stages and their dependencies. budget
+    defaults to the DOCUMENT_BUDGET_USD/SESSION_BUDGET_USD limits; its ledger, if
+    any, is charged with the analysis's usage.
+    """
+    budget = budget or AnalysisBudget.from_env()
+    analyzer = create_analyzer(api_key)
+    analysis_result = analyzer.analyze_contract(contract_text, contract_type, progress_callback=progress_callback,
+                                                stages=stages, budget=budget)
+    if budget.ledger is not None:
+        budget.ledger.add(analysis_result["usage"])
+    if document_name:
+        analysis_result["document_name"] = document_name
+
+    if store is not None:
+        store.save(contract_text, analysis_result, store.owner_for(api_key))
+    return analysis_result
+
+
+def analyze_document(api_key: str, file_bytes: bytes, file_name: str, contract_type: str = "General",
+                     progress_callback: Optional[Callable[[str, object], None]] = None,
+                     store: Optional[ResultStore] = None, reuse_stored: bool = True,
+                     stages: Optional[Iterable[str]] = None, budget: Optional[AnalysisBudget] = None) -> Dict:
+    """Extract, normalize and analyze one uploaded file
+
+    A stored analysis of the same text that covers the requested stages is returned
+    instead of calling the LLM again when reuse_stored is set.
+    """
+    contract_text = extract_contract_text(file_bytes, file_name)
+
+    stored = stored_analysis(store, api_key, contract_text, stages) if reuse_stored else None
+    if stored is not None:
+        stored["document_name"] = file_name
+        return stored
+    return analyze_text(api_key, contract_text, contract_type, progress_callback=progress_callback,
+                        document_name=file_name, store=store, stages=stages, budget=budget)
@@ -1,49 +1,105 @@
 import anthropic
+import copy
 import os
 import json
+import time
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 import re
 
+from src.utils.clause_explainer import parse_explanations
+from src.utils.clause_index import ClauseIndex
+from src.utils.cost_accounting import AnalysisBudget, estimate_stage_cost, summarize_usage
+from src.utils.entity_extractor import extract_entities, merge_entities, summarize_entities
+from src.utils.hedging import Deadline, get_default_caller
+from src.utils.model_router import ModelRouter, StageMetrics, prescreen
+from src.utils.pipeline import resolve_stages, run_stages
+
 class ContractAnalyzer:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, router: Optional[ModelRouter] = None):
         self.client = anthropic.Client(api_key=api_key)
-        self.model = "claude-sonnet-4-20250514"        
-    def analyze_contract(self, contract_text: str, contract_type: str = "General") -> Dict:
-        """Main analysis function that orchestrates all analysis tasks"""
+        # Each stage goes to the model the router picks for it
+        self.router = router or ModelRouter.from_env("anthropic")
+        self.model = self.router.default_model
+        self.metrics = StageMetrics()
+        self.caller = get_default_caller()
+        self._deadline: Optional[Deadline] = None
+        self._context: Dict[str, object] = {}
+        self._clauses: Optional[ClauseIndex] = None
+        self._generate_hook: Optional[Callable[[str, str, str, Optional[int]], str]] = None
+    
+    def with_generate(self, generate: Callable[[str, str, str, Optional[int]], str]) -> "ContractAnalyzer":
+        """Copy of this analyzer whose prompts are answered by generate instead of the model
         
-        # Step 1: Contract Type Classification
-        contract_classification = self._classify_contract(contract_text)
+        generate(stage, model_name, prompt, max_tokens) returns the response text and
+        records its own metrics. This analyzer is left as it is.
+        """
+        analyzer = copy.copy(self)
+        analyzer._generate_hook = generate
+        # Nothing per-analysis is shared with the original
+        analyzer.metrics = StageMetrics()
+        analyzer._context = {}
+        analyzer._clauses = None
+        return analyzer
+    
+    def begin_analysis(self, contract_text: str, deadline: Optional[Deadline] = None):
+        """Start fresh metrics, deadline, routing context and clause index for one contract"""
+        self.metrics = StageMetrics()
+        self._deadline = deadline
+        # Routing decisions can use the pre-screen and any stage finished so far
+        self._context = {"prescreen": prescreen(contract_text)}
+        # Built once so each stage's prompt carries only the clauses it needs
+        self._clauses = ClauseIndex(contract_text)
+    
+    def record_result(self, stage: str, result):
+        """Make a finished stage's result available to the routing of later stages"""
+        self._context[stage] = result
         
-        # Step 2: Extract entities and clauses
-        entities = self._extract_entities(contract_text)
+    def analyze_contract(self, contract_text: str, contract_type: str = "General",
+                         progress_callback: Optional[Callable[[str, object], None]] = None,
+                         stages: Optional[Iterable[str]] = None,
+                         deadline_seconds: Optional[float] = None,
+                         budget: Optional[AnalysisBudget] = None) -> Dict:
+        """Main analysis function that orchestrates all analysis tasks
         
-        # Step 3: Identify obligations, rights, and prohibitions
-        obligations_analysis = self._analyze_obligations(contract_text)
+        stages selects a subset of the stage graph (e.g. {"risk_assessment"}); the
+        stages they depend on run too, and nothing else does. progress_callback, when
+        given, is called with each stage's result key and result as soon as that
+        stage finishes. Stages still pending when the deadline (deadline_seconds, or
+        ANALYSIS_DEADLINE_SECONDS) passes are skipped and listed in skipped_stages.
+        Optional stages that would overrun the budget are dropped and listed in
+        usage["budget_dropped_stages"].
+        """
         
-        # Step 4: Risk assessment
-        risk_assessment = self._assess_risks(contract_text)
+        self.begin_analysis(contract_text, Deadline(deadline_seconds) if deadline_seconds is not None
+                            else Deadline.from_env())
         
-        # Step 5: Generate simplified summary
-        summary = self._generate_summary(contract_text)
+        def report(stage: str, result):
+            self.record_result(stage, result)
+            if progress_callback is not None:
+                progress_callback(stage, result)
         
-        # Step 6: Identify unfavorable clauses
-        unfavorable_clauses = self._identify_unfavorable_clauses(contract_text)
+        admit = None
+        if budget is not None:
+            def admit(stage, results):
+                estimate = estimate_stage_cost(self.router, stage.key, self._context, contract_text)
+                return budget.admits(stage, estimate, self.metrics.total_cost)
         
-        # Step 7: Generate alternative suggestions
-        alternatives = self._generate_alternatives(unfavorable_clauses)
+        # Stages run in graph order, which is the order users read the results
+        results = run_stages(self, contract_text, stages, on_result=report, deadline=self._deadline, admit=admit)
         
         # Compile all results
-        analysis_result = {
-            "timestamp": datetime.now().isoformat(),
-            "contract_type": contract_classification,
-            "entities": entities,
-            "obligations_analysis": obligations_analysis,
-            "risk_assessment": risk_assessment,
-            "summary": summary,
-            "unfavorable_clauses": unfavorable_clauses,
-            "suggested_alternatives": alternatives
-        }
+        analysis_result = {"timestamp": datetime.now().isoformat()}
+        analysis_result.update(results)
+        analysis_result["stages"] = list(results)
+        dropped = budget.dropped if budget is not None else []
+        skipped = [stage for stage in resolve_stages(stages) if stage not in results and stage not in dropped]
+        if skipped:
+            analysis_result["skipped_stages"] = skipped
+        analysis_result["stage_metrics"] = list(self.metrics.records)
+        analysis_result["usage"] = summarize_usage(self.metrics.records)
+        if dropped:
+            analysis_result["usage"]["budget_dropped_stages"] = list(dropped)
         
         return analysis_result
     
@@ -60,7 +116,7 @@ class ContractAnalyzer:
 - Other
 
 Contract text:
-{contract_text[:2000]}
+{self._stage_text('contract_type', contract_text, 2000)}
 
 Respond with a JSON object containing:
 {{
@@ -69,36 +125,35 @@ Respond with a JSON object containing:
     "confidence": "high/medium/low"
 }}"""
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=1000,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        response_text = self._generate("contract_type", prompt, max_tokens=1000)
         
-        return self._parse_json_response(response.content[0].text)
+        return self._parse_json_response(response_text)
     
     def _extract_entities(self, contract_text: str) -> Dict:
-        """Extract named entities from the contract"""
-        prompt = f"""Extract the following entities from this contract:
-1. Parties (all parties involved with their roles)
-2. Important Dates (effective date, termination date, renewal dates)
-3. Financial Amounts (payment terms, penalties, deposits)
-4. Jurisdiction (governing law, dispute resolution location)
-5. Liabilities (who is liable for what)
-6. Key Deliverables
+        """Extract named entities from the contract
+
+        Parties, dates, rupee amounts and jurisdiction are found locally across the
+        whole document; the model is asked only for liabilities, deliverables and
+        whatever the patterns missed.
+        """
+        located = summarize_entities(contract_text, extract_entities(contract_text))
+        found = json.dumps({key: value for key, value in located.items() if key != "spans"}, ensure_ascii=False, indent=1)
+        prompt = f"""These entities were already found in the contract:
+{found}
+
+Extract the remaining entities from this contract:
+1. Liabilities (who is liable for what)
+2. Key Deliverables
+3. Any parties, important dates, financial amounts or jurisdiction terms missing from the list above
 
 Contract text:
-{contract_text[:3000]}
+{self._stage_text('entities', contract_text, 3000)}
 
-Respond with a JSON object with these keys: parties, dates, financial_terms, jurisdiction, liabilities, deliverables"""
+Respond with a JSON object with these keys: parties, dates, financial_terms, jurisdiction, liabilities, deliverables. Include only entities missing from the list above"""
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=2000,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        response_text = self._generate("entities", prompt, max_tokens=2000)
         
-        return self._parse_json_response(response.content[0].text)
+        return merge_entities(located, self._parse_json_response(response_text))
     
     def _analyze_obligations(self, contract_text: str) -> Dict:
         """Identify obligations, rights, and prohibitions"""
@@ -110,17 +165,13 @@ Respond with a JSON object with these keys: parties, dates, financial_terms, jur
 For each category, list the specific clauses with clause numbers if available.
 
 Contract text:
-{contract_text[:3000]}
+{self._stage_text('obligations_analysis', contract_text, 3000)}
 
 Respond with a JSON object with keys: obligations, rights, prohibitions. Each should be a list of objects with "party", "clause", and "description"."""
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=2000,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        response_text = self._generate("obligations_analysis", prompt, max_tokens=2000)
         
-        return self._parse_json_response(response.content[0].text)
+        return self._parse_json_response(response_text)
     
     def _assess_risks(self, contract_text: str) -> Dict:
         """Perform comprehensive risk assessment"""
@@ -146,7 +197,7 @@ Respond with a JSON object with keys: obligations, rights, prohibitions. Each sh
    - Reasonable notice periods
 
 Contract text:
-{contract_text[:4000]}
+{self._stage_text('risk_assessment', contract_text, 4000)}
 
 Respond with JSON:
 {{
@@ -159,13 +210,9 @@ Respond with JSON:
     "compliance_concerns": [potential legal compliance issues for Indian SMEs]
 }}"""
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=3000,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        response_text = self._generate("risk_assessment", prompt, max_tokens=3000)
         
-        return self._parse_json_response(response.content[0].text)
+        return self._parse_json_response(response_text)
     
     def _generate_summary(self, contract_text: str) -> str:
         """Generate a simplified summary in plain language"""
@@ -183,15 +230,9 @@ Use plain business language. Cover:
 Keep it concise but comprehensive.
 
 Contract text:
-{contract_text[:4000]}"""
+{self._stage_text('summary', contract_text, 4000)}"""
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=2000,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
-        return response.content[0].text
+        return self._generate("summary", prompt, max_tokens=2000)
     
     def _identify_unfavorable_clauses(self, contract_text: str) -> List[Dict]:
         """Identify clauses that are unfavorable to the user"""
@@ -204,17 +245,13 @@ For each unfavorable clause, provide:
 4. Severity (Low/Medium/High)
 
 Contract text:
-{contract_text[:4000]}
+{self._stage_text('unfavorable_clauses', contract_text, 4000)}
 
 Respond with a JSON array of unfavorable clauses."""
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=2500,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        response_text = self._generate("unfavorable_clauses", prompt, max_tokens=2500)
         
-        result = self._parse_json_response(response.content[0].text)
+        result = self._parse_json_response(response_text)
         return result if isinstance(result, list) else result.get("unfavorable_clauses", [])
     
     def _generate_alternatives(self, unfavorable_clauses: List[Dict]) -> List[Dict]:
@@ -235,15 +272,55 @@ For each clause, provide:
 
 Respond with a JSON array matching the input clauses."""
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=3000,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        response_text = self._generate("suggested_alternatives", prompt, max_tokens=3000)
         
-        result = self._parse_json_response(response.content[0].text)
+        result = self._parse_json_response(response_text)
         return result if isinstance(result, list) else result.get("alternatives", [])
     
+    def _generate(self, stage: str, prompt: str, max_tokens: Optional[int] = None) -> str:
+        """Run one stage's prompt on its routed model, recording latency, tokens and cost
+        
+        The call is bounded by the per-call timeout and the analysis deadline, and may
+        be hedged with a duplicate request when it runs long.
+        """
+        model_name = self.router.model_for(stage, self._context)
+        if self._generate_hook is not None:
+            return self._generate_hook(stage, model_name, prompt, max_tokens)
+        
+        def request(timeout: Optional[float]):
+            options = {"timeout": timeout} if timeout else {}
+            return self.client.messages.create(
+                model=model_name,
+                max_tokens=max_tokens or 2000,
+                messages=[{"role": "user", "content": prompt}],
+                **options
+            )
+        
+        def record(response, **extra):
+            input_tokens = response.usage.input_tokens
+            output_tokens = response.usage.output_tokens
+            self.metrics.record(stage, model_name, started, input_tokens, output_tokens,
+                                self.router.cost(model_name, input_tokens, output_tokens), **extra)
+        
+        started = time.perf_counter()
+        try:
+            response, hedged = self.caller.call(
+                stage, request, self._deadline,
+                on_discarded=lambda response: record(response, hedge_discarded=True)
+            )
+        except Exception as e:
+            self.metrics.record(stage, model_name, started, 0, 0, None, ok=False, error=str(e))
+            raise
+        
+        record(response, hedged=hedged)
+        return response.content[0].text
+    
+    def _stage_text(self, stage: str, contract_text: str, max_chars: int) -> str:
+        """The clauses of the contract relevant to a stage, within max_chars"""
+        if self._clauses is None or self._clauses.text is not contract_text:
+            self._clauses = ClauseIndex(contract_text)
+        return self._clauses.scoped_text(stage, max_chars)
+    
     def _parse_json_response(self, response_text: str) -> Dict:
         """Parse JSON from Claude's response, handling markdown code blocks"""
         # Remove markdown code blocks if present
@@ -274,10 +351,26 @@ Explain:
 3. What are your rights?
 4. What should you watch out for?"""
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=1000,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
-        return response.content[0].text
\ No newline at end of file
+        return self._generate("clause_explanation", prompt, max_tokens=1000)
+    
+    def generate_clause_explanations(self, clauses: List[str]) -> List[Optional[str]]:
+        """Plain language explanations for several clauses in one request
+
+        Returns one explanation per clause, in order, with None where the answer left
+        a clause out.
+        """
+        numbered = "\n\n".join(f'{number}. "{clause}"' for number, clause in enumerate(clauses, 1))
+        prompt = f"""Explain each of these contract clauses in simple, plain language that a small business owner would understand:
+
+{numbered}
+
+For each clause explain:
+1. What does this clause mean?
+2. What are your obligations?
+3. What are your rights?
+4. What should you watch out for?
+
+Respond with a JSON array of {len(clauses)} strings, one markdown explanation per clause, in the order given."""
+
+        response_text = self._generate("clause_explanation", prompt, max_tokens=min(8000, 1000 * len(clauses)))
+        return parse_explanations(self._parse_json_response(response_text), len(clauses))
\ No newline at end of file
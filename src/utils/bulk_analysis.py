@@ -0,0 +1,367 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import uuid
+import zlib
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from src.utils.cost_accounting import summarize_usage
+from src.utils.pipeline import STAGE_GRAPH, resolve_stages
+from src.utils.result_store import ResultStore, document_hash
+from src.utils.text_normalizer import estimate_tokens
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id TEXT PRIMARY KEY,
+    name TEXT,
+    text BLOB NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    result BLOB,
+    added_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS requests (
+    custom_id TEXT PRIMARY KEY,
+    doc_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_hash TEXT NOT NULL,
+    batch_id TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    response TEXT,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    error TEXT,
+    turnaround REAL
+);
+CREATE INDEX IF NOT EXISTS idx_requests_doc ON requests(doc_id);
+CREATE INDEX IF NOT EXISTS idx_requests_batch ON requests(batch_id);
+CREATE TABLE IF NOT EXISTS batches (
+    batch_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    request_count INTEGER NOT NULL,
+    submitted_at REAL NOT NULL,
+    ended_at REAL
+);
+"""
+
+
+class BatchRequest(NamedTuple):
+    custom_id: str
+    stage: str
+    model: str
+    prompt: str
+    max_tokens: int
+
+
+class BatchResponse(NamedTuple):
+    """Outcome of one request in a finished batch; error is set when it did not succeed"""
+    custom_id: str
+    text: Optional[str]
+    input_tokens: int = 0
+    output_tokens: int = 0
+    error: Optional[str] = None
+
+
+class AwaitingBatch(BaseException):
+    """A stage's prompt has no batch response yet
+
+    Derived from BaseException so the analyzers' per-stage error handling, which
+    turns failures into fallback results, lets it through.
+    """
+
+
+class AnthropicBatchBackend:
+    """Anthropic Message Batches API: half the price of synchronous calls, results within 24 hours"""
+
+    discount = 0.5
+
+    def __init__(self, api_key: str):
+        import anthropic
+
+        self.client = anthropic.Client(api_key=api_key)
+
+    def submit(self, requests: List[BatchRequest]) -> str:
+        batch = self.client.messages.batches.create(requests=[{
+            "custom_id": request.custom_id,
+            "params": {
+                "model": request.model,
+                "max_tokens": request.max_tokens,
+                "messages": [{"role": "user", "content": request.prompt}],
+            },
+        } for request in requests])
+        return batch.id
+
+    def ended(self, batch_id: str) -> bool:
+        return self.client.messages.batches.retrieve(batch_id).processing_status == "ended"
+
+    def results(self, batch_id: str) -> Iterator[BatchResponse]:
+        for entry in self.client.messages.batches.results(batch_id):
+            result = entry.result
+            if result.type == "succeeded":
+                message = result.message
+                yield BatchResponse(entry.custom_id, message.content[0].text,
+                                    message.usage.input_tokens, message.usage.output_tokens)
+            else:
+                error = getattr(result, "error", None)
+                yield BatchResponse(entry.custom_id, None, error=str(error) if error else result.type)
+
+
+def stand_in_response(request: BatchRequest) -> str:
+    """Well-formed placeholder answer for each stage, as the local stand-in's default"""
+    canned = {
+        "summary": "Stand-in summary of the contract.",
+        "contract_type": {"contract_type": "Service Contract", "sub_type": "stand-in", "confidence": "high"},
+        "risk_assessment": {"overall_risk_score": "50", "overall_risk_level": "Medium", "high_risk_clauses": [],
+                            "medium_risk_clauses": [], "low_risk_clauses": [], "critical_issues": [],
+                            "compliance_concerns": []},
+        "entities": {"parties": [], "dates": [], "financial_terms": [], "jurisdiction": "", "liabilities": [],
+                     "deliverables": []},
+        "obligations_analysis": {"obligations": [], "rights": [], "prohibitions": []},
+        "unfavorable_clauses": [{"clause": "Stand-in clause", "issue": "placeholder", "severity": "Medium"}],
+        "suggested_alternatives": [{"alternative": "Stand-in wording", "rationale": "placeholder"}],
+    }
+    answer = canned.get(request.stage, "Stand-in response.")
+    return answer if isinstance(answer, str) else json.dumps(answer)
+
+
+class LocalBatchBackend:
+    """Stand-in for a provider batch API, kept in a directory so it survives restarts
+
+    A batch ends complete_after seconds after submission. Answers come from
+    responder (stand_in_response by default), and a deterministic fail_rate share of
+    requests errors, so retries and resumption can be exercised offline.
+    """
+
+    discount = 0.5
+
+    def __init__(self, directory: str, complete_after: float = 0.0,
+                 responder: Optional[Callable[[BatchRequest], str]] = None, fail_rate: float = 0.0):
+        self.directory = directory
+        self.complete_after = complete_after
+        self.responder = responder or stand_in_response
+        self.fail_rate = fail_rate
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, batch_id: str) -> str:
+        return os.path.join(self.directory, f"{batch_id}.json")
+
+    def submit(self, requests: List[BatchRequest]) -> str:
+        batch_id = f"localbatch_{uuid.uuid4().hex[:16]}"
+        with open(self._path(batch_id), "w", encoding="utf-8") as file:
+            json.dump({"submitted_at": time.time(), "requests": [request._asdict() for request in requests]}, file)
+        return batch_id
+
+    def ended(self, batch_id: str) -> bool:
+        with open(self._path(batch_id), encoding="utf-8") as file:
+            return time.time() - json.load(file)["submitted_at"] >= self.complete_after
+
+    def results(self, batch_id: str) -> Iterator[BatchResponse]:
+        with open(self._path(batch_id), encoding="utf-8") as file:
+            requests = [BatchRequest(**request) for request in json.load(file)["requests"]]
+        for request in requests:
+            draw = int(hashlib.sha256(f"{batch_id}:{request.custom_id}".encode()).hexdigest()[:8], 16) / 0xFFFFFFFF
+            if draw < self.fail_rate:
+                yield BatchResponse(request.custom_id, None, error="overloaded_error")
+                continue
+            text = self.responder(request)
+            yield BatchResponse(request.custom_id, text, estimate_tokens(request.prompt), estimate_tokens(text))
+
+
+class BulkRunner:
+    """Analyzes many contracts through a provider batch API, resumable from its state file
+
+    The analyzer's own stage methods build the prompts, on a copy of it (see
+    ContractAnalyzer.with_generate) whose model calls go to a replay that answers
+    from batch responses already received and queues the rest. Each round submits every prompt whose inputs are ready (all independent
+    stages of every contract, then the stages that depend on them), polls until the
+    batches end, and replays again. Completed contracts are assembled into the same
+    analysis_result as a synchronous run and saved to the result store, if one is
+    given, under owner. Routing sees the pre-screen and the stages finished in
+    earlier rounds.
+    """
+
+    def __init__(self, state_path: str, backend, analyzer, stages: Optional[Iterable[str]] = None,
+                 store: Optional[ResultStore] = None, max_batch_requests: int = 10000, max_attempts: int = 3,
+                 owner: Optional[str] = None):
+        if store is not None and not owner:
+            raise ValueError("Results saved to the result store need an owner")
+        self.state_path = state_path
+        self.backend = backend
+        self.analyzer = analyzer
+        self.stages = resolve_stages(stages)
+        self.store = store
+        self.owner = owner
+        self.max_batch_requests = max_batch_requests
+        self.max_attempts = max_attempts
+        directory = os.path.dirname(os.path.abspath(state_path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(state_path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.executescript(_SCHEMA)
+
+    def add_documents(self, documents: Iterable[Tuple[str, str]]) -> int:
+        """Queue (name, contract_text) pairs; documents already in the state are skipped"""
+        added = 0
+        with self.conn:
+            for name, text in documents:
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO documents (doc_id, name, text, added_at) VALUES (?, ?, ?, ?)",
+                    (document_hash(text)[:32], name, zlib.compress(text.encode("utf-8"), 6), time.time()),
+                )
+                added += cursor.rowcount
+        return added
+
+    def run(self, poll_interval: float = 60, on_progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """Submit, poll and reassemble until every contract is done or cannot progress"""
+        while True:
+            self.poll()
+            if on_progress is not None:
+                on_progress(self.progress())
+            if self._in_flight():
+                time.sleep(poll_interval)
+                continue
+            requests = self.advance()
+            if not requests:
+                break
+            self.submit(requests)
+        return self.progress()
+
+    def progress(self) -> Dict:
+        documents = dict(self.conn.execute("SELECT status, COUNT(*) FROM documents GROUP BY status").fetchall())
+        requests = dict(self.conn.execute("SELECT status, COUNT(*) FROM requests GROUP BY status").fetchall())
+        return {"documents": documents, "requests": requests, "batches_in_flight": self._in_flight()}
+
+    def _in_flight(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM batches WHERE status = 'in_progress'").fetchone()[0]
+
+    def poll(self):
+        """Collect the responses of every batch that has ended"""
+        for row in self.conn.execute("SELECT * FROM batches WHERE status = 'in_progress'").fetchall():
+            if not self.backend.ended(row["batch_id"]):
+                continue
+            turnaround = time.time() - row["submitted_at"]
+            with self.conn:
+                for response in self.backend.results(row["batch_id"]):
+                    self.conn.execute(
+                        "UPDATE requests SET status = ?, response = ?, input_tokens = ?, output_tokens = ?, "
+                        "error = ?, turnaround = ? WHERE custom_id = ? AND batch_id = ?",
+                        ("failed" if response.error else "succeeded", response.text, response.input_tokens,
+                         response.output_tokens, response.error, turnaround, response.custom_id, row["batch_id"]),
+                    )
+                self.conn.execute(
+                    "UPDATE requests SET status = 'failed', error = 'missing from batch results' "
+                    "WHERE batch_id = ? AND status = 'submitted'", (row["batch_id"],),
+                )
+                self.conn.execute("UPDATE batches SET status = 'ended', ended_at = ? WHERE batch_id = ?",
+                                  (time.time(), row["batch_id"]))
+
+    def advance(self) -> List[BatchRequest]:
+        """Replay every unfinished contract, finish those that are complete, return the prompts still needed"""
+        needed = []
+        for doc in self.conn.execute("SELECT doc_id, name, text FROM documents WHERE status = 'pending'").fetchall():
+            text = zlib.decompress(doc["text"]).decode("utf-8")
+            analysis_result, requests, waiting = self._replay(doc["doc_id"], text)
+            if requests or waiting:
+                needed.extend(requests)
+                continue
+            analysis_result["document_name"] = doc["name"]
+            if self.store is not None:
+                self.store.save(text, analysis_result, self.owner)
+            blob = zlib.compress(json.dumps(analysis_result, default=str).encode("utf-8"), 6)
+            with self.conn:
+                self.conn.execute("UPDATE documents SET status = 'done', result = ? WHERE doc_id = ?",
+                                  (blob, doc["doc_id"]))
+        return needed
+
+    def submit(self, requests: List[BatchRequest]):
+        for offset in range(0, len(requests), self.max_batch_requests):
+            chunk = requests[offset:offset + self.max_batch_requests]
+            batch_id = self.backend.submit(chunk)
+            # Recorded straight after submission so an interrupted run resumes polling it
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO batches (batch_id, status, request_count, submitted_at) VALUES (?, 'in_progress', ?, ?)",
+                    (batch_id, len(chunk), time.time()),
+                )
+                self.conn.executemany(
+                    "UPDATE requests SET batch_id = ?, status = 'submitted', attempts = attempts + 1, error = NULL "
+                    "WHERE custom_id = ?",
+                    [(batch_id, request.custom_id) for request in chunk],
+                )
+
+    def _replay(self, doc_id: str, text: str) -> Tuple[Dict, List[BatchRequest], bool]:
+        """Run the stages against received responses: (analysis_result, new requests, still waiting)"""
+        rows = {row["stage"]: row for row in
+                self.conn.execute("SELECT * FROM requests WHERE doc_id = ?", (doc_id,)).fetchall()}
+        requests: List[BatchRequest] = []
+
+        def replay(stage: str, model: str, prompt: str, max_tokens: Optional[int] = None) -> str:
+            prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+            row = rows.get(stage)
+            if row is not None and row["prompt_hash"] == prompt_hash:
+                if row["status"] == "succeeded":
+                    cost = analyzer.router.cost(row["model"], row["input_tokens"], row["output_tokens"])
+                    analyzer.metrics.record(stage, row["model"], time.perf_counter() - row["turnaround"],
+                                            row["input_tokens"], row["output_tokens"],
+                                            cost * self.backend.discount if cost is not None else None,
+                                            batch_id=row["batch_id"])
+                    return row["response"]
+                if row["status"] == "submitted":
+                    raise AwaitingBatch()
+                if row["status"] == "failed" and row["attempts"] >= self.max_attempts:
+                    raise RuntimeError(f"Batch request failed {row['attempts']} times: {row['error']}")
+
+            request = BatchRequest(f"{doc_id}-{stage}", stage, model, prompt, max_tokens or 2000)
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO requests (custom_id, doc_id, stage, model, prompt_hash, status, attempts) "
+                    "VALUES (?, ?, ?, ?, ?, 'queued', 0) ON CONFLICT(custom_id) DO UPDATE SET "
+                    "model = excluded.model, status = 'queued', "
+                    "attempts = CASE WHEN requests.prompt_hash = excluded.prompt_hash THEN requests.attempts ELSE 0 END, "
+                    "prompt_hash = excluded.prompt_hash",
+                    (request.custom_id, doc_id, stage, request.model, prompt_hash),
+                )
+            requests.append(request)
+            raise AwaitingBatch()
+
+        analyzer = self.analyzer.with_generate(replay)
+        analyzer.begin_analysis(text)
+        results: Dict[str, object] = {}
+        failed: Dict[str, str] = {}
+        waiting = False
+        for key in self.stages:
+            stage = STAGE_GRAPH[key]
+            if any(dep not in results for dep in stage.depends_on):
+                continue
+            try:
+                results[key] = stage.run(analyzer, text, results)
+            except AwaitingBatch:
+                waiting = True
+                continue
+            except Exception as e:
+                failed[key] = str(e)
+                continue
+            analyzer.record_result(key, results[key])
+
+        analysis_result = {"timestamp": datetime.now().isoformat()}
+        analysis_result.update(results)
+        analysis_result["stages"] = list(results)
+        skipped = [stage for stage in self.stages if stage not in results]
+        if skipped:
+            analysis_result["skipped_stages"] = skipped
+        if failed:
+            analysis_result["failed_stages"] = failed
+        analysis_result["stage_metrics"] = list(analyzer.metrics.records)
+        analysis_result["usage"] = summarize_usage(analyzer.metrics.records)
+        return analysis_result, requests, waiting
+
+    def iter_results(self) -> Iterator[Dict]:
+        """Finished analysis results, in the order the contracts were added"""
+        for row in self.conn.execute("SELECT result FROM documents WHERE status = 'done' ORDER BY added_at, doc_id"):
+            yield json.loads(zlib.decompress(row["result"]))
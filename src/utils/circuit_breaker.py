@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Health of one provider, judged from its recent calls
+
+    The breaker opens when at least failure_rate of the last `window` calls failed
+    (calls slower than slow_call_seconds count as failures). While open, callers
+    should use another provider. After open_seconds one trial call is let through:
+    success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, name: str, window: int = 20, min_calls: int = 5, failure_rate: float = 0.5,
+                 slow_call_seconds: Optional[float] = None, open_seconds: float = 30):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, name: str) -> "CircuitBreaker":
+        return cls(
+            name,
+            window=int(os.getenv("BREAKER_WINDOW", "20")),
+            min_calls=int(os.getenv("BREAKER_MIN_CALLS", "5")),
+            failure_rate=float(os.getenv("BREAKER_FAILURE_RATE", "0.5")),
+            slow_call_seconds=float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "45")) or None,
+            open_seconds=float(os.getenv("BREAKER_OPEN_SECONDS", "30")),
+        )
+
+    def allow(self) -> bool:
+        """Whether a call may go to this provider now"""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    return False
+                self.state = HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == HALF_OPEN:
+                if self._trial_in_flight:
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def record_success(self, latency: Optional[float] = None):
+        if self.slow_call_seconds is not None and latency is not None and latency > self.slow_call_seconds:
+            self.record_failure()
+            return
+        with self._lock:
+            self._trial_in_flight = False
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self._outcomes.clear()
+            self._outcomes.append(False)
+
+    def record_failure(self):
+        with self._lock:
+            self._trial_in_flight = False
+            if self.state == HALF_OPEN:
+                self._open()
+                return
+            self._outcomes.append(True)
+            if len(self._outcomes) >= self.min_calls and sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+                self._open()
+
+    def release(self):
+        """End a call without counting it either way"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            calls = len(self._outcomes)
+            return {
+                "name": self.name,
+                "state": self.state,
+                "recent_calls": calls,
+                "recent_failure_rate": round(sum(self._outcomes) / calls, 3) if calls else 0.0,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Process-wide breaker for a provider, shared by every analysis"""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker.from_env(name)
+        return _breakers[name]
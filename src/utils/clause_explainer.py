@@ -0,0 +1,179 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.utils.analysis_service import create_analyzer
+from src.utils.cost_accounting import UsageLedger, summarize_usage
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def clause_key(clause_text: str) -> str:
+    """Hash of a clause's text, ignoring case and spacing, used as its cache key"""
+    normalized = _SPACE_RE.sub(" ", clause_text).strip().lower()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _key_id(api_key: str) -> str:
+    """Hash of an API key, so requests in flight and failures stay with the key they ran under"""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+def parse_explanations(parsed, count: int) -> List[Optional[str]]:
+    """One explanation per clause from a batched answer, None where one is missing
+
+    Accepts a JSON array, an {"explanations": [...]} object or an object keyed by
+    clause number, as models answer in any of these shapes.
+    """
+    if isinstance(parsed, dict):
+        if isinstance(parsed.get("explanations"), list):
+            parsed = parsed["explanations"]
+        else:
+            parsed = [parsed.get(str(number)) for number in range(1, count + 1)]
+    if not isinstance(parsed, list):
+        return [None] * count
+    explanations = []
+    for item in parsed[:count]:
+        if isinstance(item, dict):
+            item = item.get("explanation") or "\n\n".join(str(value) for value in item.values())
+        explanations.append(str(item).strip() if item else None)
+    return explanations + [None] * (count - len(explanations))
+
+
+class ClauseExplainer:
+    """Plain-language clause explanations, generated in batches and cached by clause hash
+
+    Shared process-wide, so a clause explained once is instant for every session.
+    Clauses go out batch_size per request; asking for a clause that is already on
+    its way under the same API key joins that request instead of sending another.
+    Requests in flight and failures are kept per API key: only finished
+    explanations are shared, so no session waits on, pays for or inherits the
+    errors of another key's request.
+    """
+
+    def __init__(self, batch_size: int = 6, max_workers: int = 2, cache_size: int = 1024):
+        self.batch_size = max(1, batch_size)
+        self.cache_size = cache_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="explain")
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._errors: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._pending: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ClauseExplainer":
+        """Explainer sized by EXPLAIN_BATCH_SIZE, EXPLAIN_WORKERS and EXPLAIN_CACHE_SIZE"""
+        return cls(
+            batch_size=int(os.getenv("EXPLAIN_BATCH_SIZE", "6")),
+            max_workers=int(os.getenv("EXPLAIN_WORKERS", "2")),
+            cache_size=int(os.getenv("EXPLAIN_CACHE_SIZE", "1024")),
+        )
+
+    def cached(self, clause_text: str) -> Optional[str]:
+        key = clause_key(clause_text)
+        with self._lock:
+            explanation = self._cache.get(key)
+            if explanation is not None:
+                self._cache.move_to_end(key)
+            return explanation
+
+    def pending(self, api_key: str, clause_text: str) -> bool:
+        with self._lock:
+            return (_key_id(api_key), clause_key(clause_text)) in self._pending
+
+    def error(self, api_key: str, clause_text: str) -> Optional[str]:
+        """Why the last attempt at this clause under api_key failed, until it is retried"""
+        with self._lock:
+            return self._errors.get((_key_id(api_key), clause_key(clause_text)))
+
+    def request(self, api_key: str, clauses: Iterable[str], ledger: Optional[UsageLedger] = None,
+                retry_failed: bool = True) -> Dict[str, Future]:
+        """Queue explanations for the clauses not yet cached and return {clause key: future}
+
+        A future resolves when its batch has been answered and cached. Clauses that
+        failed before are skipped unless retry_failed is set. ledger, when given, is
+        charged with the calls.
+        """
+        key_id = _key_id(api_key)
+        futures: Dict[str, Future] = {}
+        with self._lock:
+            new: List[Tuple[str, str]] = []
+            for clause in clauses:
+                key = clause_key(clause)
+                if key in futures or key in self._cache or any(key == queued for queued, _ in new):
+                    continue
+                if (key_id, key) in self._pending:
+                    futures[key] = self._pending[key_id, key]
+                elif retry_failed or (key_id, key) not in self._errors:
+                    new.append((key, clause))
+            for start in range(0, len(new), self.batch_size):
+                batch = new[start:start + self.batch_size]
+                future = self._executor.submit(self._explain_batch, api_key, batch, ledger)
+                for key, _ in batch:
+                    self._errors.pop((key_id, key), None)
+                    self._pending[key_id, key] = future
+                    futures[key] = future
+        return futures
+
+    def prefetch(self, api_key: str, clauses: Iterable[str], ledger: Optional[UsageLedger] = None):
+        """Start explaining clauses in the background; earlier failures are not retried"""
+        self.request(api_key, clauses, ledger, retry_failed=False)
+
+    def explain(self, api_key: str, clause_text: str, batch_with: Iterable[str] = (),
+                ledger: Optional[UsageLedger] = None, timeout: Optional[float] = None) -> str:
+        """Explanation of one clause, waiting for it when it is not cached yet
+
+        Unexplained clauses from batch_with ride along in the same request, so the
+        ones a user opens next are already there.
+        """
+        explanation = self.cached(clause_text)
+        if explanation is not None:
+            return explanation
+        key = clause_key(clause_text)
+        key_id = _key_id(api_key)
+        with self._lock:
+            others = [clause for clause in batch_with if clause_key(clause) != key
+                      and clause_key(clause) not in self._cache and (key_id, clause_key(clause)) not in self._pending]
+        futures = self.request(api_key, [clause_text] + others[:self.batch_size - 1], ledger)
+        future = futures.get(key)
+        if future is not None:
+            future.result(timeout)
+        explanation = self.cached(clause_text)
+        if explanation is None:
+            raise RuntimeError(self.error(api_key, clause_text) or "No explanation was returned for this clause")
+        return explanation
+
+    def _explain_batch(self, api_key: str, batch: List[Tuple[str, str]], ledger: Optional[UsageLedger]):
+        key_id = _key_id(api_key)
+        analyzer = None
+        try:
+            analyzer = create_analyzer(api_key)
+            explanations = analyzer.generate_clause_explanations([clause for _, clause in batch])
+        except Exception as e:
+            with self._lock:
+                for key, _ in batch:
+                    self._pending.pop((key_id, key), None)
+                    self._remember_error((key_id, key), str(e))
+            raise
+        finally:
+            if ledger is not None and analyzer is not None:
+                ledger.add(summarize_usage(analyzer.metrics.records), analyses=0)
+
+        with self._lock:
+            for (key, _), explanation in zip(batch, explanations):
+                self._pending.pop((key_id, key), None)
+                if explanation:
+                    self._cache[key] = explanation
+                else:
+                    self._remember_error((key_id, key), "The model left this clause out of its answer")
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _remember_error(self, key: Tuple[str, str], error: str):
+        self._errors[key] = error
+        while len(self._errors) > self.cache_size:
+            self._errors.popitem(last=False)
@@ -0,0 +1,202 @@
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from src.utils.document_model import _paragraph_spans, heading_level
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Leading text every scoped prompt keeps: title, parties and recitals
+PREAMBLE_CHARS = 1200
+
+# Smallest room left worth filling with the start of a clause too long to fit whole
+MIN_CLIP_CHARS = 200
+
+
+class StageQuery(NamedTuple):
+    """What a stage's prompt needs from the contract"""
+    terms: str
+    top_k: int
+    preamble: bool = False
+
+
+# Stages missing here see the leading slice of the contract, as before
+STAGE_QUERIES: Dict[str, StageQuery] = {
+    "risk_assessment": StageQuery(
+        "liability liable limitation indemnify indemnity indemnification hold harmless terminate termination "
+        "breach penalty liquidated damages consequential forfeit interest late exclusive exclusivity lock "
+        "non-compete restrictive warranty guarantee arbitration jurisdiction dispute", top_k=12),
+    # Dates, amounts, parties and jurisdiction are found locally (entity_extractor);
+    # the prompt needs the clauses behind liabilities and deliverables
+    "entities": StageQuery(
+        "party parties between liability liable responsible indemnify indemnity damages loss deliver "
+        "deliverables deliverable scope services milestone acceptance completion provide supply develop "
+        "warranty support maintenance", top_k=10, preamble=True),
+    "obligations_analysis": StageQuery(
+        "shall must agree agrees undertake obligation obligations responsible responsibility ensure provide "
+        "right rights may entitled permitted not prohibited restrict without prior written consent", top_k=12),
+    "unfavorable_clauses": StageQuery(
+        "liability unlimited indemnify indemnity terminate termination without cause notice sole discretion "
+        "unilateral penalty liquidated damages forfeit interest late automatic renewal renew lock exclusive "
+        "non-compete waive waiver assign ownership intellectual property", top_k=12),
+}
+
+
+def _stem(word: str) -> str:
+    """Light suffix stripping so plural and verb forms share a term"""
+    for suffix, replacement in (("ies", "y"), ("ing", ""), ("ed", ""), ("es", ""), ("s", "")):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:len(word) - len(suffix)] + replacement
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return [_stem(word) for word in _WORD_RE.findall(text.lower())]
+
+
+def scoping_enabled() -> bool:
+    return os.getenv("PROMPT_SCOPING", "true").lower() == "true"
+
+
+class ClauseSpan(NamedTuple):
+    """A paragraph of the contract and the heading of the section it sits in"""
+    start: int
+    end: int
+    heading: Optional[Tuple[int, int]]
+
+
+class ClauseIndex:
+    """BM25 index over the paragraphs of one contract
+
+    Each paragraph is indexed together with its section heading, so "3.4 Late
+    payments ..." is found by a query about payment terms. Building it is a single
+    pass over the text.
+    """
+
+    def __init__(self, text: str, k1: float = 1.5, b: float = 0.75):
+        self.text = text
+        self.k1 = k1
+        self.b = b
+        self.clauses: List[ClauseSpan] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._lengths: List[int] = []
+
+        heading = None
+        for start, end in _paragraph_spans(text):
+            if heading_level(text[start:end]):
+                heading = (start, end)
+                continue
+            index = len(self.clauses)
+            self.clauses.append(ClauseSpan(start, end, heading))
+            terms = tokenize(text[start:end])
+            if heading is not None:
+                terms += tokenize(text[heading[0]:heading[1]])
+            self._lengths.append(len(terms))
+            for term, count in Counter(terms).items():
+                self._postings.setdefault(term, []).append((index, count))
+        self._average_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+
+    def search(self, query: str, top_k: int) -> List[Tuple[int, float]]:
+        """(clause index, score) of the best-matching clauses, best first"""
+        scores: Dict[int, float] = {}
+        clause_count = len(self.clauses)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (clause_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for index, count in postings:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[index] / self._average_length)
+                scores[index] = scores.get(index, 0.0) + idf * count * (self.k1 + 1) / (count + norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+
+    def preamble_end(self) -> int:
+        """End of the leading paragraphs that fit in PREAMBLE_CHARS"""
+        end = 0
+        for start, clause_end in _paragraph_spans(self.text):
+            if clause_end > PREAMBLE_CHARS:
+                break
+            end = clause_end
+        return end or min(len(self.text), PREAMBLE_CHARS)
+
+    def scoped_text(self, stage: str, max_chars: int) -> str:
+        """The parts of the contract a stage's prompt should include, within max_chars
+
+        Selected clauses appear in document order under their section headings,
+        with gaps marked [...]. A clause too long for the room left is clipped to
+        it. Stages without a query, queries that match nothing and selections that
+        fit no clause at all fall back to the leading max_chars of the contract.
+        """
+        query = STAGE_QUERIES.get(stage)
+        if query is None or not scoping_enabled():
+            return self.text[:max_chars]
+        hits = self.search(query.terms, query.top_k)
+        if not hits:
+            return self.text[:max_chars]
+
+        parts: List[Tuple[int, int]] = []
+        used = 0
+        if query.preamble:
+            preamble_end = self.preamble_end()
+            parts.append((0, preamble_end))
+            used = preamble_end
+        added = False
+        for index, _ in hits:
+            clause = self.clauses[index]
+            spans = [(clause.start, clause.end)]
+            if clause.heading is not None:
+                spans.insert(0, clause.heading)
+            new = [span for span in spans if not any(start <= span[0] and span[1] <= end for start, end in parts)]
+            size = sum(end - start + 2 for start, end in new)
+            if not new:
+                continue
+            if used + size > max_chars:
+                room = max_chars - used - sum(end - start + 2 for start, end in new[:-1]) - 2
+                if room < MIN_CLIP_CHARS:
+                    continue
+                start, end = new[-1]
+                cut = self.text.rfind(" ", start, start + room)
+                new[-1] = (start, cut if cut > start + room // 2 else start + room)
+                size = sum(end - start + 2 for start, end in new)
+            parts.extend(new)
+            used += size
+            added = True
+        if not added:
+            return self.text[:max_chars]
+
+        pieces = []
+        position = 0
+        for start, end in sorted(parts):
+            if self.text[position:start].strip():
+                pieces.append("[...]")
+            pieces.append(self.text[start:end])
+            position = end
+        if self.text[position:].strip():
+            pieces.append("[...]")
+        return "\n\n".join(pieces)
+
+
+def main():
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Show the clauses each analysis stage would receive")
+    parser.add_argument("contract", help="Plain-text contract")
+    parser.add_argument("--max-chars", type=int, default=4000)
+    args = parser.parse_args()
+
+    with open(args.contract, encoding="utf-8") as file:
+        text = file.read()
+    started = time.perf_counter()
+    index = ClauseIndex(text)
+    print(f"Indexed {len(index.clauses)} clauses in {(time.perf_counter() - started) * 1000:.1f} ms")
+    for stage in STAGE_QUERIES:
+        scoped = index.scoped_text(stage, args.max_chars)
+        print(f"\n=== {stage}: {len(scoped)} chars (leading slice covers {min(len(text), args.max_chars)}) ===")
+        print(scoped)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import re
+from typing import Dict, List
+
+# Clause types tracked across contracts, with the keywords that identify them
+CLAUSE_TYPES: Dict[str, List[str]] = {
+    "Liability": ["liability", "liable", "limitation of liability", "consequential damages"],
+    "Indemnity": ["indemnify", "indemnity", "indemnification", "hold harmless"],
+    "Termination": ["terminate", "termination", "notice period", "exit"],
+    "Payment": ["payment", "invoice", "fee", "interest", "late payment", "price"],
+    "Penalty": ["penalty", "liquidated damages", "forfeit"],
+    "Intellectual Property": ["intellectual property", "ip rights", "copyright", "patent", "ownership of work"],
+    "Non-Compete": ["non-compete", "non compete", "restrictive covenant", "non-solicit"],
+    "Auto-Renewal": ["auto-renew", "automatic renewal", "automatically renew", "renewal"],
+    "Confidentiality": ["confidential", "non-disclosure", "nda"],
+    "Jurisdiction & Disputes": ["jurisdiction", "arbitration", "governing law", "dispute", "courts of"],
+    "Warranty": ["warranty", "warrants", "guarantee"],
+    "Lock-in": ["lock-in", "lock in", "minimum term", "exclusivity", "exclusive"],
+}
+
+_PATTERNS = {
+    clause_type: re.compile(r"\b(?:" + "|".join(re.escape(keyword) for keyword in keywords) + ")", re.IGNORECASE)
+    for clause_type, keywords in CLAUSE_TYPES.items()
+}
+
+
+def classify_clause(text: str) -> List[str]:
+    """Clause types a piece of clause text refers to"""
+    return [clause_type for clause_type, pattern in _PATTERNS.items() if pattern.search(text)]
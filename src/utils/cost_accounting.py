@@ -0,0 +1,125 @@
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from src.utils.model_router import ModelRouter
+from src.utils.pipeline import Stage
+from src.utils.text_normalizer import estimate_tokens
+
+# Typical output tokens per stage, for estimating a stage's cost before it runs
+STAGE_OUTPUT_TOKENS: Dict[str, int] = {
+    "summary": 600,
+    "contract_type": 80,
+    "risk_assessment": 1200,
+    "entities": 600,
+    "obligations_analysis": 1200,
+    "unfavorable_clauses": 1500,
+    "suggested_alternatives": 1500,
+    "clause_explanation": 400,
+}
+
+# Instructions wrapped around the contract text in a stage prompt
+PROMPT_OVERHEAD_TOKENS = 300
+
+# Longest contract slice any stage prompt includes
+STAGE_INPUT_CHARS = 4000
+
+_USAGE_KEYS = ("calls", "input_tokens", "output_tokens", "cost_usd", "unpriced_calls")
+
+
+def summarize_usage(records: Iterable[Dict]) -> Dict:
+    """Token and cost totals over StageMetrics records
+
+    Calls to models without a price count towards unpriced_calls instead of cost.
+    """
+    usage = {"calls": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0, "unpriced_calls": 0}
+    for record in records:
+        usage["calls"] += 1
+        usage["input_tokens"] += record.get("input_tokens") or 0
+        usage["output_tokens"] += record.get("output_tokens") or 0
+        if record.get("cost_usd") is None:
+            usage["unpriced_calls"] += 1
+        else:
+            usage["cost_usd"] += record["cost_usd"]
+    usage["cost_usd"] = round(usage["cost_usd"], 6)
+    return usage
+
+
+def estimate_stage_cost(router: ModelRouter, stage: str, context: Dict, contract_text: str) -> Optional[float]:
+    """Rough USD cost of running a stage next, or None when its model has no price"""
+    model = router.model_for(stage, context)
+    input_tokens = estimate_tokens(contract_text[:STAGE_INPUT_CHARS]) + PROMPT_OVERHEAD_TOKENS
+    return router.cost(model, input_tokens, STAGE_OUTPUT_TOKENS.get(stage, 1000))
+
+
+class UsageLedger:
+    """Running usage totals across analyses, e.g. for one user session
+
+    Safe to share between the jobs of a batch.
+    """
+
+    def __init__(self):
+        self._totals = dict(summarize_usage([]), analyses=0)
+        self._lock = threading.Lock()
+
+    def add(self, usage: Dict, analyses: int = 1):
+        """Charge usage; calls made outside an analysis (e.g. clause explanations) pass analyses=0"""
+        with self._lock:
+            for key in _USAGE_KEYS:
+                self._totals[key] += usage.get(key, 0)
+            self._totals["cost_usd"] = round(self._totals["cost_usd"], 6)
+            self._totals["analyses"] += analyses
+
+    @property
+    def cost_usd(self) -> float:
+        with self._lock:
+            return self._totals["cost_usd"]
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return dict(self._totals)
+
+
+class AnalysisBudget:
+    """Spending limits for one analysis, and for the session it belongs to
+
+    Required stages always run. An optional stage runs only if its estimated cost
+    fits in what is left of both limits; stages turned down are listed in dropped.
+    """
+
+    def __init__(self, document_usd: Optional[float] = None, session_usd: Optional[float] = None,
+                 ledger: Optional[UsageLedger] = None):
+        self.document_usd = document_usd
+        self.session_usd = session_usd
+        self.ledger = ledger
+        self.dropped: List[str] = []
+
+    @classmethod
+    def from_env(cls, ledger: Optional[UsageLedger] = None) -> "AnalysisBudget":
+        """Budget of DOCUMENT_BUDGET_USD and SESSION_BUDGET_USD (unset or 0 means no limit)"""
+        return cls(
+            document_usd=float(os.getenv("DOCUMENT_BUDGET_USD", "0")) or None,
+            session_usd=float(os.getenv("SESSION_BUDGET_USD", "0")) or None,
+            ledger=ledger,
+        )
+
+    def remaining(self, spent: float) -> Optional[float]:
+        """USD left for this analysis after spending `spent` on it, or None without limits"""
+        limits = []
+        if self.document_usd is not None:
+            limits.append(self.document_usd - spent)
+        if self.session_usd is not None:
+            limits.append(self.session_usd - spent - (self.ledger.cost_usd if self.ledger is not None else 0.0))
+        return min(limits) if limits else None
+
+    def admits(self, stage: Stage, estimated_cost: Optional[float], spent: float) -> bool:
+        if any(dep in self.dropped for dep in stage.depends_on):
+            self.dropped.append(stage.key)
+            return False
+        if not stage.optional or estimated_cost is None:
+            return True
+        remaining = self.remaining(spent)
+        if remaining is not None and estimated_cost > remaining:
+            self.dropped.append(stage.key)
+            return False
+        return True
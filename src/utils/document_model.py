@@ -0,0 +1,197 @@
+import re
+from bisect import bisect_right
+from typing import Dict, List, NamedTuple, Optional
+
+from src.utils.text_normalizer import PAGE_BREAK
+
+_HEADING_RE = re.compile(
+    r"^(?:(?:ARTICLE|SECTION|CLAUSE|SCHEDULE|ANNEXURE)\s+[\w.]+.*"
+    r"|(?P<number>\d+(?:\.\d+)*)\.?\s+[A-Z][A-Z0-9 &/,'()-]{2,}"
+    r"|[A-Z][A-Z0-9 &/,'()-]{3,}:?)$"
+)
+_DOCX_HEADING_RE = re.compile(r"^Heading\s*(\d+)$", re.IGNORECASE)
+
+
+class PageSpan(NamedTuple):
+    number: int
+    start: int
+    end: int
+
+
+class ParagraphSpan(NamedTuple):
+    start: int
+    end: int
+    style: str
+    heading_level: int  # 0 for body text
+
+
+class TableCell(NamedTuple):
+    table: int
+    row: int
+    column: int
+    start: int
+    end: int
+
+
+class StructuredDocument:
+    """Extracted document as one text buffer plus page, paragraph and table spans into it"""
+
+    def __init__(self, text: str, pages: List[PageSpan], paragraphs: List[ParagraphSpan],
+                 cells: List[TableCell], source_format: str):
+        self.text = text
+        self.pages = pages
+        self.paragraphs = paragraphs
+        self.cells = cells
+        self.source_format = source_format
+        self._page_starts = [page.start for page in pages]
+        self._paragraph_starts = [paragraph.start for paragraph in paragraphs]
+
+    def span_text(self, span) -> str:
+        """Text covered by any span"""
+        return self.text[span.start:span.end]
+
+    def page_at(self, offset: int) -> Optional[PageSpan]:
+        """Page containing a text offset"""
+        index = bisect_right(self._page_starts, offset) - 1
+        return self.pages[index] if index >= 0 else None
+
+    def paragraph_at(self, offset: int) -> Optional[ParagraphSpan]:
+        """Paragraph containing a text offset"""
+        index = bisect_right(self._paragraph_starts, offset) - 1
+        if index >= 0 and offset < self.paragraphs[index].end:
+            return self.paragraphs[index]
+        return None
+
+    def headings(self) -> List[ParagraphSpan]:
+        """Paragraphs detected or styled as headings, in document order"""
+        return [paragraph for paragraph in self.paragraphs if paragraph.heading_level]
+
+    def table(self, index: int) -> List[List[str]]:
+        """Rows of cell text for one table"""
+        rows: List[List[str]] = []
+        for cell in self.cells:
+            if cell.table != index:
+                continue
+            while len(rows) <= cell.row:
+                rows.append([])
+            rows[cell.row].append(self.span_text(cell))
+        return rows
+
+    def to_dict(self) -> Dict:
+        """Compact JSON-serialisable form"""
+        return {
+            "format": self.source_format,
+            "text": self.text,
+            "pages": [list(page) for page in self.pages],
+            "paragraphs": [list(paragraph) for paragraph in self.paragraphs],
+            "cells": [list(cell) for cell in self.cells],
+        }
+
+
+class DocumentBuilder:
+    """Accumulate extracted blocks into a StructuredDocument without re-scanning text"""
+
+    def __init__(self, source_format: str):
+        self.source_format = source_format
+        self._pieces: List[str] = []
+        self._length = 0
+        self._page_start = 0
+        self._pages: List[PageSpan] = []
+        self._paragraphs: List[ParagraphSpan] = []
+        self._cells: List[TableCell] = []
+        self._tables = 0
+
+    def _append(self, text: str) -> int:
+        """Append text to the buffer, separating blocks with a newline"""
+        if self._length > self._page_start:
+            self._pieces.append("\n")
+            self._length += 1
+        start = self._length
+        self._pieces.append(text)
+        self._length += len(text)
+        return start
+
+    def add_paragraph(self, text: str, style: str = "Normal", heading_level: int = 0):
+        start = self._append(text)
+        self._paragraphs.append(ParagraphSpan(start, self._length, style, heading_level))
+
+    def add_plain_text(self, text: str):
+        """Add unstyled text, inferring paragraphs and headings from its layout"""
+        if not text:
+            return
+        base = self._append(text)
+        for start, end in _paragraph_spans(text):
+            line = text[start:end]
+            level = heading_level(line)
+            self._paragraphs.append(ParagraphSpan(
+                base + start, base + end, "Heading" if level else "Normal", level
+            ))
+
+    def add_table(self, rows: List[List[str]]):
+        table = self._tables
+        self._tables += 1
+        for row_index, row in enumerate(rows):
+            for column_index, cell_text in enumerate(row):
+                start = self._append(cell_text)
+                self._cells.append(TableCell(table, row_index, column_index, start, self._length))
+
+    def end_page(self):
+        self._pages.append(PageSpan(len(self._pages) + 1, self._page_start, self._length))
+        self._pieces.append(PAGE_BREAK)
+        self._length += 1
+        self._page_start = self._length
+
+    def build(self) -> StructuredDocument:
+        if self._length > self._page_start or not self._pages:
+            self._pages.append(PageSpan(len(self._pages) + 1, self._page_start, self._length))
+        elif self._pieces and self._pieces[-1] == PAGE_BREAK:
+            # Drop the trailing page separator
+            self._pieces.pop()
+            self._length -= 1
+        return StructuredDocument("".join(self._pieces), self._pages, self._paragraphs,
+                                  self._cells, self.source_format)
+
+
+def heading_level(line: str) -> int:
+    """Heading level inferred from a line of plain text, 0 when it is body text"""
+    line = line.strip()
+    if not line or len(line) > 80:
+        return 0
+    match = _HEADING_RE.match(line)
+    if not match:
+        return 0
+    number = match.group("number")
+    return number.count(".") + 1 if number else 1
+
+
+def docx_heading_level(style_name: str) -> int:
+    """Heading level from a Word paragraph style name"""
+    if style_name == "Title":
+        return 1
+    match = _DOCX_HEADING_RE.match(style_name or "")
+    return int(match.group(1)) if match else 0
+
+
+def _paragraph_spans(text: str):
+    """Yield (start, end) of paragraphs: blank-line separated blocks, headings on their own"""
+    start = None
+    end = 0
+    position = 0
+    for line in text.split("\n"):
+        line_end = position + len(line)
+        if not line.strip():
+            if start is not None:
+                yield start, end
+                start = None
+        elif heading_level(line):
+            if start is not None:
+                yield start, end
+            yield position, line_end
+            start = None
+        else:
+            if start is None:
+                start = position
+            end = line_end
+        position = line_end + 1
+    if start is not None:
+        yield start, end
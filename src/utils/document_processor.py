@@ -1,81 +1,159 @@
-import PyPDF2
-import docx
-from typing import Optional
+from typing import Dict, List, Optional
 import io
 
+from src.utils.document_model import DocumentBuilder, StructuredDocument, docx_heading_level
+from src.utils.encoding_detector import EncodingDetector
+from src.utils.extraction_sandbox import (
+    ExtractionError,
+    ExtractionLimits,
+    PageLimitError,
+    extract_in_sandbox,
+)
+from src.utils.language_profiler import LanguageProfiler
+from src.utils.text_normalizer import PAGE_BREAK, NormalizedText, TextNormalizer
+
 class DocumentProcessor:
     """Handle extraction of text from various document formats"""
     
     @staticmethod
-    def extract_text_from_pdf(file_bytes: bytes) -> str:
-        """Extract text from PDF file"""
+    def extract_structure_from_pdf(file_bytes: bytes, max_pages: Optional[int] = None) -> StructuredDocument:
+        """Extract pages, paragraphs and headings from PDF file"""
+        # Parsers are imported on first use so app startup does not pay for them
+        import PyPDF2
+        
         try:
             pdf_file = io.BytesIO(file_bytes)
             pdf_reader = PyPDF2.PdfReader(pdf_file)
             
-            text = ""
+            page_count = len(pdf_reader.pages)
+            if max_pages is not None and page_count > max_pages:
+                raise PageLimitError(f"PDF has {page_count} pages; the limit is {max_pages}")
+            
+            builder = DocumentBuilder("pdf")
             for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
+                builder.add_plain_text((page.extract_text() or "").strip())
+                builder.end_page()
             
-            return text.strip()
+            return builder.build()
+        except ExtractionError:
+            raise
         except Exception as e:
             raise Exception(f"Error extracting text from PDF: {str(e)}")
     
     @staticmethod
-    def extract_text_from_docx(file_bytes: bytes) -> str:
-        """Extract text from DOCX file"""
+    def extract_structure_from_docx(file_bytes: bytes) -> StructuredDocument:
+        """Extract styled paragraphs, headings and tables from DOCX file"""
+        import docx
+        from docx.oxml.ns import qn
+        from docx.table import Table
+        from docx.text.paragraph import Paragraph
+        
         try:
             docx_file = io.BytesIO(file_bytes)
             doc = docx.Document(docx_file)
             
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
+            builder = DocumentBuilder("docx")
+            # Walk the body in order so tables stay between the paragraphs around them
+            for child in doc.element.body.iterchildren():
+                if child.tag == qn('w:p'):
+                    paragraph = Paragraph(child, doc)
+                    style = paragraph.style.name if paragraph.style is not None else "Normal"
+                    builder.add_paragraph(paragraph.text, style, docx_heading_level(style))
+                elif child.tag == qn('w:tbl'):
+                    table = Table(child, doc)
+                    builder.add_table([[cell.text for cell in row.cells] for row in table.rows])
             
-            return text.strip()
+            return builder.build()
         except Exception as e:
             raise Exception(f"Error extracting text from DOCX: {str(e)}")
     
+    @staticmethod
+    def extract_structure_from_txt(file_bytes: bytes) -> StructuredDocument:
+        """Extract pages, paragraphs and headings from TXT file"""
+        builder = DocumentBuilder("txt")
+        pages = DocumentProcessor.extract_text_from_txt(file_bytes).split(PAGE_BREAK)
+        for page_text in pages[:-1]:
+            builder.add_plain_text(page_text)
+            builder.end_page()
+        builder.add_plain_text(pages[-1])
+        return builder.build()
+    
+    @staticmethod
+    def extract_text_from_pdf(file_bytes: bytes, max_pages: Optional[int] = None) -> str:
+        """Extract text from PDF file"""
+        # Keep page boundaries so the normalizer can strip headers and footers
+        return DocumentProcessor.extract_structure_from_pdf(file_bytes, max_pages).text
+    
+    @staticmethod
+    def extract_text_from_docx(file_bytes: bytes) -> str:
+        """Extract text from DOCX file"""
+        return DocumentProcessor.extract_structure_from_docx(file_bytes).text
+    
     @staticmethod
     def extract_text_from_txt(file_bytes: bytes) -> str:
         """Extract text from TXT file"""
         try:
-            return file_bytes.decode('utf-8')
-        except UnicodeDecodeError:
-            # Try with different encoding
-            try:
-                return file_bytes.decode('latin-1')
-            except Exception as e:
-                raise Exception(f"Error extracting text from TXT: {str(e)}")
+            # Detect the encoding from a bounded sample, then decode once
+            return EncodingDetector.decode(file_bytes)["text"]
+        except Exception as e:
+            raise Exception(f"Error extracting text from TXT: {str(e)}")
     
     @staticmethod
-    def process_document(uploaded_file) -> str:
-        """Process uploaded document and extract text"""
-        file_bytes = uploaded_file.read()
-        file_name = uploaded_file.name.lower()
+    def extract_structure(file_bytes: bytes, file_name: str, max_pages: Optional[int] = None) -> StructuredDocument:
+        """Extract a structured document from raw file bytes based on the file extension"""
+        file_name = file_name.lower()
         
         if file_name.endswith('.pdf'):
-            return DocumentProcessor.extract_text_from_pdf(file_bytes)
+            return DocumentProcessor.extract_structure_from_pdf(file_bytes, max_pages=max_pages)
         elif file_name.endswith('.docx'):
-            return DocumentProcessor.extract_text_from_docx(file_bytes)
+            return DocumentProcessor.extract_structure_from_docx(file_bytes)
         elif file_name.endswith('.txt'):
-            return DocumentProcessor.extract_text_from_txt(file_bytes)
+            return DocumentProcessor.extract_structure_from_txt(file_bytes)
         else:
             raise ValueError("Unsupported file format. Please upload PDF, DOCX, or TXT files.")
     
     @staticmethod
-    def detect_language(text: str) -> str:
-        """Simple language detection for English/Hindi"""
-        # Count Devanagari characters
-        hindi_chars = sum(1 for char in text if '\u0900' <= char <= '\u097F')
-        total_chars = len(text.replace(" ", "").replace("\n", ""))
+    def extract_text(file_bytes: bytes, file_name: str, max_pages: Optional[int] = None) -> str:
+        """Extract text from raw file bytes based on the file extension"""
+        return DocumentProcessor.extract_structure(file_bytes, file_name, max_pages).text
+    
+    @staticmethod
+    def process_structured(uploaded_file, sandbox: bool = False,
+                           limits: Optional[ExtractionLimits] = None) -> StructuredDocument:
+        """Process uploaded document into a structured document
+        
+        With sandbox=True extraction runs in a worker process bounded by a deadline,
+        a memory limit and a page cap, and limit violations raise ExtractionError subclasses.
+        """
+        file_bytes = uploaded_file.read()
+        file_name = uploaded_file.name.lower()
         
-        if total_chars == 0:
-            return "unknown"
+        if not file_name.endswith(('.pdf', '.docx', '.txt')):
+            raise ValueError("Unsupported file format. Please upload PDF, DOCX, or TXT files.")
         
-        hindi_ratio = hindi_chars / total_chars
+        if sandbox:
+            return extract_in_sandbox(file_bytes, file_name, limits)
         
-        if hindi_ratio > 0.3:
-            return "hindi"
-        else:
-            return "english"
\ No newline at end of file
+        max_pages = limits.max_pages if limits else None
+        return DocumentProcessor.extract_structure(file_bytes, file_name, max_pages=max_pages)
+    
+    @staticmethod
+    def process_document(uploaded_file, sandbox: bool = False,
+                         limits: Optional[ExtractionLimits] = None) -> str:
+        """Process uploaded document and extract text"""
+        return DocumentProcessor.process_structured(uploaded_file, sandbox, limits).text
+    
+    @staticmethod
+    def normalize_text(text: str) -> NormalizedText:
+        """Strip page furniture, hyphenation and whitespace before analysis"""
+        return TextNormalizer().normalize(text)
+    
+    @staticmethod
+    def detect_language(text: str) -> str:
+        """Detect the dominant language from the scripts used in the text"""
+        return LanguageProfiler().profile(text)["language"]
+    
+    @staticmethod
+    def language_sections(text: str) -> List[Dict]:
+        """Map spans of the text to the language they are written in"""
+        return LanguageProfiler().section_map(text)
@@ -0,0 +1,142 @@
+import codecs
+from typing import BinaryIO, Dict, Iterator, List, Optional
+
+# Byte-order marks, longest first so UTF-32 LE is not mistaken for UTF-16 LE.
+# The BOM-aware codecs strip the mark while decoding.
+_BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+# Bytes 0x80-0x9F that Windows-1252 maps to punctuation commonly found in contracts
+_CP1252_PUNCTUATION = frozenset(b"\x80\x85\x91\x92\x93\x94\x95\x96\x97\x99")
+_CP1252_UNDEFINED = frozenset(b"\x81\x8d\x8f\x90\x9d")
+
+
+class EncodingDetector:
+    """Detect the encoding of text uploads from a bounded sample of bytes"""
+
+    SAMPLE_SIZE = 64 * 1024
+
+    @staticmethod
+    def detect(data: bytes, sample_size: Optional[int] = None) -> Dict:
+        """Detect the encoding of raw bytes and return it with a confidence value"""
+        sample_size = sample_size or EncodingDetector.SAMPLE_SIZE
+
+        for bom, encoding in _BOMS:
+            if data.startswith(bom):
+                return {"encoding": encoding, "confidence": 1.0, "bom": True}
+
+        segments = EncodingDetector._sample(data, sample_size)
+        sample = b"".join(segments)
+        if not sample:
+            return {"encoding": "utf-8", "confidence": 1.0, "bom": False}
+
+        utf16 = EncodingDetector._score_utf16(sample)
+        if utf16:
+            return utf16
+
+        if EncodingDetector._is_utf8(segments):
+            # Pure ASCII is valid in every candidate, so it is a weaker signal
+            confidence = 0.99 if any(byte >= 0x80 for byte in sample) else 0.9
+            return {"encoding": "utf-8", "confidence": confidence, "bom": False}
+
+        return EncodingDetector._score_single_byte(sample)
+
+    @staticmethod
+    def decode(data: bytes) -> Dict:
+        """Decode bytes in a single pass using the detected encoding"""
+        detection = EncodingDetector.detect(data)
+        detection["text"] = data.decode(detection["encoding"], errors="replace")
+        return detection
+
+    @staticmethod
+    def iter_decode(stream: BinaryIO, encoding: Optional[str] = None,
+                    chunk_size: int = 1024 * 1024) -> Iterator[str]:
+        """Decode a large text export chunk by chunk without loading it whole"""
+        head = stream.read(chunk_size)
+        if encoding is None:
+            encoding = EncodingDetector.detect(head)["encoding"]
+
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        chunk = head
+        while chunk:
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+            chunk = stream.read(chunk_size)
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+    @staticmethod
+    def _sample(data: bytes, sample_size: int) -> List[bytes]:
+        """Take the head, middle and tail of large inputs so detection time is bounded"""
+        if len(data) <= sample_size:
+            return [data]
+        # Even sizes and offsets keep UTF-16 code units aligned
+        part = sample_size // 6 * 2
+        middle = len(data) // 2
+        middle -= middle % 2
+        tail = len(data) - part
+        tail -= tail % 2
+        return [data[:part], data[middle:middle + part], data[tail:]]
+
+    @staticmethod
+    def _is_utf8(segments: List[bytes]) -> bool:
+        """Validate UTF-8 per segment, tolerating sequences cut at segment seams"""
+        for index, segment in enumerate(segments):
+            if index:
+                # Skip continuation bytes left over from a sequence cut at the seam
+                skip = 0
+                while skip < 3 and skip < len(segment) and 0x80 <= segment[skip] < 0xC0:
+                    skip += 1
+                segment = segment[skip:]
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            try:
+                decoder.decode(segment, final=index == 0 and len(segments) == 1)
+            except UnicodeDecodeError:
+                return False
+        return True
+
+    @staticmethod
+    def _score_utf16(sample: bytes) -> Optional[Dict]:
+        """Recognise BOM-less UTF-16 from which byte of each code unit is near-constant"""
+        even = sample[0::2]
+        odd = sample[1::2]
+        if not even or not odd:
+            return None
+        # High bytes of ASCII (0x00) and Devanagari (0x09) code units sit on one side only
+        even_high = (even.count(0) + even.count(0x09)) / len(even)
+        odd_high = (odd.count(0) + odd.count(0x09)) / len(odd)
+
+        if odd_high > 0.3 and even_high < 0.05:
+            encoding, zero_ratio = "utf-16-le", odd_high
+        elif even_high > 0.3 and odd_high < 0.05:
+            encoding, zero_ratio = "utf-16-be", even_high
+        else:
+            return None
+
+        confidence = round(min(0.95, 0.5 + zero_ratio / 2), 2)
+        return {"encoding": encoding, "confidence": confidence, "bom": False}
+
+    @staticmethod
+    def _score_single_byte(sample: bytes) -> Dict:
+        """Choose between Windows-1252 and Latin-1 for non-UTF-8 bytes"""
+        high = [byte for byte in sample if byte >= 0x80]
+        c1 = [byte for byte in high if byte < 0xA0]
+
+        if c1 and not any(byte in _CP1252_UNDEFINED for byte in c1):
+            punctuation = sum(1 for byte in c1 if byte in _CP1252_PUNCTUATION)
+            confidence = round(0.6 + 0.35 * punctuation / len(c1), 2)
+            return {"encoding": "cp1252", "confidence": confidence, "bom": False}
+
+        # ISCII and other legacy Indic encodings have no Python codec; a sample dominated by
+        # high bytes is most likely one of them, so report it with a low confidence
+        high_ratio = len(high) / len(sample)
+        confidence = 0.2 if high_ratio > 0.5 else 0.5
+        encoding = "latin-1" if c1 else "cp1252"
+        return {"encoding": encoding, "confidence": confidence, "bom": False}
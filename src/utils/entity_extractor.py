@@ -0,0 +1,260 @@
+import re
+from datetime import date
+from typing import Dict, List, NamedTuple, Optional
+
+_MONTHS = {
+    "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6, "july": 7, "august": 8,
+    "september": 9, "october": 10, "november": 11, "december": 12,
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "jun": 6, "jul": 7, "aug": 8, "sep": 9, "sept": 9, "oct": 10,
+    "nov": 11, "dec": 12,
+}
+_MONTH = r"(?P<month>" + "|".join(sorted(_MONTHS, key=len, reverse=True)) + r")\.?"
+
+_DATE_PATTERNS = [
+    re.compile(r"\b(?P<day>\d{1,2})(?:st|nd|rd|th)?\s+(?:day\s+of\s+)?" + _MONTH + r",?\s+(?P<year>(?:19|20)\d{2})\b",
+               re.IGNORECASE),
+    re.compile(r"\b" + _MONTH + r"\s+(?P<day>\d{1,2})(?:st|nd|rd|th)?,?\s+(?P<year>(?:19|20)\d{2})\b", re.IGNORECASE),
+    # Numeric dates are day first, as written in India
+    re.compile(r"\b(?P<day>\d{1,2})[/.-](?P<month>\d{1,2})[/.-](?P<year>(?:19|20)\d{2})\b"),
+    re.compile(r"\b(?P<year>(?:19|20)\d{2})-(?P<month>\d{2})-(?P<day>\d{2})\b"),
+]
+
+_AMOUNT_RE = re.compile(
+    r"(?:₹|\bRs\.?|\bINR\b|\bRupees\b)\s*(?P<number>\d(?:[\d,]*\d)?(?:\.\d+)?)"
+    r"(?:\s*(?P<unit>lakhs?|lacs?|crores?|cr\b\.?))?",
+    re.IGNORECASE,
+)
+_UNITS = {"lakh": 100_000, "lac": 100_000, "crore": 10_000_000, "cr": 10_000_000}
+
+_BETWEEN_RE = re.compile(r"^[ \t]*BETWEEN\b[ \t:]*$", re.IGNORECASE | re.MULTILINE)
+_BLOCK_END_RE = re.compile(
+    r"^[ \t]*(?:WHEREAS|NOW,?\s+THEREFORE|RECITALS|IT IS (?:HEREBY )?AGREED|\d+\.\s+[A-Z][A-Z &]{3,}[ \t]*$)",
+    re.MULTILINE)
+_AND_LINE_RE = re.compile(r"^[ \t]*AND[ \t:]*$", re.IGNORECASE | re.MULTILINE)
+_ENUMERATION_RE = re.compile(r"^\s*(?:\d+[.)]|\(?[a-zA-Z0-9]\))\s*")
+_ROLE_RE = re.compile(
+    r"\(\s*(?:hereinafter\s+(?:referred\s+to\s+as|called)\s+)?(?:the\s+)?[\"“']([^\"”']{2,60})[\"”']", re.IGNORECASE)
+_INLINE_PARTIES_RE = re.compile(
+    r"\bbetween\s+(?P<first>[A-Z][^,;()\n]{2,120}?)(?:,[^;()]{0,200}?)?(?:\s*\([^)]{0,120}\))?,?\s+and\s+"
+    r"(?P<second>[A-Z][^,;()\n]{2,120}?)(?=\s*[,;(.\n])"
+)
+_REGISTRATION_RE = re.compile(r"\b(?P<act>Companies|Limited\s+Liability\s+Partnership)\s+Act,?\s*(?:of\s+)?(?P<year>\d{4})\b")
+
+_PLACE = r"(?P<place>[A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)?)"
+# Keywords match in any case; the place itself must be capitalized
+_GOVERNING_LAW_RE = re.compile(
+    r"(?i:governed\s+by\s+(?:and\s+construed\s+in\s+accordance\s+with\s+)?(?:the\s+)?laws?\s+"
+    r"(?:of|in\s+force\s+in)\s+(?:the\s+(?:Republic|State)\s+of\s+)?)" + _PLACE)
+_COURTS_RE = re.compile(r"\b(?i:courts?\s+(?:at|in|of)\s+)" + _PLACE)
+_SEAT_RE = re.compile(
+    r"\b(?i:(?:seat|venue|place)\s+of\s+(?:the\s+)?arbitration\s+(?:shall\s+be\s+|is\s+)?(?:at\s+|in\s+)?)" + _PLACE
+    + r"|\b(?i:arbitrat(?:ion|or)\b(?:(?!courts?\b)[^.\n]){0,160}?\b(?:in|at)\s+)" + _PLACE.replace("place", "place2"))
+_NOT_PLACES = {"the", "this", "any", "such", "accordance", "writing", "case", "respect", "relation", "competent"}
+
+
+class Entity(NamedTuple):
+    """A value found in the contract, normalized, with its span in the text
+
+    value is an ISO date for dates, rupees for amounts, and a name otherwise.
+    """
+    kind: str  # date, amount, party, registration, governing_law, courts, arbitration_seat
+    value: object
+    text: str
+    start: int
+    end: int
+    role: Optional[str] = None
+
+
+def _dates(text: str) -> List[Entity]:
+    found = []
+    for pattern in _DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            month = match.group("month")
+            month = int(month) if month.isdigit() else _MONTHS[month.lower()]
+            try:
+                value = date(int(match.group("year")), month, int(match.group("day")))
+            except ValueError:
+                continue
+            found.append(Entity("date", value.isoformat(), match.group(0), match.start(), match.end()))
+    return found
+
+
+def _amounts(text: str) -> List[Entity]:
+    found = []
+    for match in _AMOUNT_RE.finditer(text):
+        try:
+            value = float(match.group("number").replace(",", ""))
+        except ValueError:
+            continue
+        unit = (match.group("unit") or "").lower().rstrip(".")
+        multiplier = next((factor for name, factor in _UNITS.items() if unit.startswith(name)), 1)
+        end = match.end() if unit else match.end("number")
+        found.append(Entity("amount", value * multiplier, text[match.start():end], match.start(), end))
+    return found
+
+
+def _party(text: str, start: int, end: int) -> Optional[Entity]:
+    """Party named at the start of text[start:end], with its defined role if any"""
+    segment = text[start:end]
+    lead = _ENUMERATION_RE.match(segment)
+    offset = lead.end() if lead else len(segment) - len(segment.lstrip())
+    name = re.split(r",|\(|\s+having\s+|\s+a\s+company\b|\n", segment[offset:], maxsplit=1)[0].strip()
+    if len(name) < 3:
+        return None
+    role = _ROLE_RE.search(segment)
+    name_start = start + segment.index(name, offset)
+    return Entity("party", name, name, name_start, name_start + len(name), role.group(1).strip() if role else None)
+
+
+def _parties(text: str) -> List[Entity]:
+    between = _BETWEEN_RE.search(text)
+    if between:
+        block_end = _BLOCK_END_RE.search(text, between.end())
+        end = block_end.start() if block_end else min(len(text), between.end() + 3000)
+        starts = [between.end()] + [match.end() for match in _AND_LINE_RE.finditer(text, between.end(), end)]
+        ends = [match.start() for match in _AND_LINE_RE.finditer(text, between.end(), end)] + [end]
+        parties = [_party(text, segment_start, segment_end) for segment_start, segment_end in zip(starts, ends)]
+        parties = [party for party in parties if party is not None]
+        if parties:
+            return parties
+
+    match = _INLINE_PARTIES_RE.search(text, 0, 5000)
+    if not match:
+        return []
+    parties = []
+    for group in ("first", "second"):
+        name = match.group(group).strip()
+        role = _ROLE_RE.search(text, match.end(group), match.end(group) + 160)
+        parties.append(Entity("party", name, name, match.start(group), match.start(group) + len(name),
+                              role.group(1).strip() if role else None))
+    return parties
+
+
+def _registrations(text: str, parties: List[Entity]) -> List[Entity]:
+    found = []
+    for match in _REGISTRATION_RE.finditer(text):
+        act = re.sub(r"\s+", " ", match.group("act"))
+        # Registrations in the party block belong to the nearest party named before them
+        owner = next((party.value for party in reversed(parties) if party.start <= match.start() < party.start + 600), None)
+        found.append(Entity("registration", f"{act} Act, {match.group('year')}", match.group(0),
+                            match.start(), match.end(), owner))
+    return found
+
+
+def _places(text: str) -> List[Entity]:
+    found = []
+    for kind, pattern in (("governing_law", _GOVERNING_LAW_RE), ("courts", _COURTS_RE), ("arbitration_seat", _SEAT_RE)):
+        for match in pattern.finditer(text):
+            group = "place2" if "place2" in pattern.groupindex and match.group("place2") else "place"
+            place = match.group(group)
+            if place.split()[0].lower() in _NOT_PLACES:
+                continue
+            found.append(Entity(kind, place, match.group(0), match.start(group), match.end(group)))
+    return found
+
+
+def extract_entities(text: str) -> List[Entity]:
+    """Every date, rupee amount, party, registration and jurisdiction in the text, in document order"""
+    parties = _parties(text)
+    entities = _dates(text) + _amounts(text) + parties + _registrations(text, parties) + _places(text)
+    entities.sort(key=lambda entity: (entity.start, -entity.end))
+    # Where patterns overlap (e.g. two date styles), keep the longest match
+    kept: List[Entity] = []
+    for entity in entities:
+        if kept and entity.kind == kept[-1].kind and entity.start < kept[-1].end:
+            continue
+        kept.append(entity)
+    return kept
+
+
+def format_inr(amount: float) -> str:
+    """Rupees with Indian digit grouping, e.g. ₹25,00,000"""
+    rupees, paise = divmod(round(amount * 100), 100)
+    digits = str(rupees)
+    if len(digits) > 3:
+        head, tail = digits[:-3], digits[-3:]
+        head = ",".join([head[max(0, i - 2):i] for i in range(len(head), 0, -2)][::-1])
+        digits = f"{head},{tail}"
+    return f"₹{digits}" + (f".{paise:02d}" if paise else "")
+
+
+def _context(text: str, entity: Entity, before: int = 40, after: int = 60) -> str:
+    """The entity with some of the surrounding text on its line"""
+    line_start = text.rfind("\n", 0, entity.start) + 1
+    line_end = text.find("\n", entity.end)
+    line_end = len(text) if line_end == -1 else line_end
+    start = max(line_start, entity.start - before)
+    end = min(line_end, entity.end + after)
+    snippet = text[start:end].strip()
+    return ("..." if start > line_start else "") + snippet + ("..." if end < line_end else "")
+
+
+def summarize_entities(text: str, entities: List[Entity]) -> Dict:
+    """Entities in the shape of the entities stage result, plus their spans"""
+    registrations = {entity.role: entity.value for entity in entities if entity.kind == "registration" and entity.role}
+    parties, dates, amounts, places, seen = [], [], [], [], set()
+    for entity in entities:
+        if entity.kind == "party":
+            label = entity.value + (f" ({entity.role})" if entity.role else "")
+            if entity.value in registrations:
+                label += f", registered under the {registrations[entity.value]}"
+            parties.append(label)
+        elif entity.kind == "date":
+            # Signature blocks repeat the same date side by side; list it once per line
+            line = (entity.value, text.rfind("\n", 0, entity.start))
+            if line not in seen:
+                seen.add(line)
+                dates.append(f"{entity.value}: {_context(text, entity)}")
+        elif entity.kind == "amount":
+            amounts.append(f"{format_inr(entity.value)}: {_context(text, entity)}")
+        elif entity.kind in ("governing_law", "courts", "arbitration_seat"):
+            label = {"governing_law": "Governing law", "courts": "Courts", "arbitration_seat": "Arbitration"}[entity.kind]
+            place = f"{label}: {entity.value}"
+            if place not in places:
+                places.append(place)
+    return {
+        "parties": parties,
+        "dates": dates,
+        "financial_terms": amounts,
+        "jurisdiction": places,
+        "spans": [entity._asdict() for entity in entities],
+    }
+
+
+def merge_entities(located: Dict, generated: Dict) -> Dict:
+    """Locally found entities first, then what the LLM added, without repeats"""
+    merged = {key: list(value) for key, value in located.items() if key != "spans"}
+    for key, value in generated.items():
+        values = value if isinstance(value, list) else [value] if value else []
+        existing = merged.setdefault(key, [])
+        known = {str(item).strip().lower() for item in existing}
+        for item in values:
+            if str(item).strip().lower() not in known:
+                existing.append(item)
+                known.add(str(item).strip().lower())
+    merged["spans"] = located.get("spans", [])
+    return merged
+
+
+def main():
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description="Show the entities found locally in a plain-text contract")
+    parser.add_argument("contract")
+    args = parser.parse_args()
+
+    with open(args.contract, encoding="utf-8") as file:
+        text = file.read()
+    started = time.perf_counter()
+    entities = extract_entities(text)
+    elapsed = (time.perf_counter() - started) * 1000
+    summary = summarize_entities(text, entities)
+    summary.pop("spans")
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    print(f"{len(entities)} entities in {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
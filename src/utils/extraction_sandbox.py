@@ -0,0 +1,111 @@
+import multiprocessing
+import os
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # Windows has no resource module; only the deadline applies there
+    resource = None
+
+
+class ExtractionError(Exception):
+    """Raised when a document cannot be extracted inside its limits"""
+
+
+class ExtractionTimeoutError(ExtractionError):
+    """Extraction did not finish before the wall-clock deadline"""
+
+
+class ExtractionMemoryError(ExtractionError):
+    """Extraction exceeded the worker's address-space limit"""
+
+
+class PageLimitError(ExtractionError):
+    """Document has more pages than extraction allows"""
+
+
+class ExtractionLimits:
+    """Resource limits applied to a sandboxed extraction worker"""
+
+    def __init__(self, timeout_seconds: float = 30.0, memory_limit_mb: int = 1024,
+                 max_pages: Optional[int] = 500):
+        self.timeout_seconds = timeout_seconds
+        self.memory_limit_mb = memory_limit_mb
+        self.max_pages = max_pages
+
+    @classmethod
+    def from_env(cls) -> "ExtractionLimits":
+        """Build limits from EXTRACTION_* environment variables"""
+        max_pages = int(os.getenv("EXTRACTION_MAX_PAGES", "500"))
+        return cls(
+            timeout_seconds=float(os.getenv("EXTRACTION_TIMEOUT_SECONDS", "30")),
+            memory_limit_mb=int(os.getenv("EXTRACTION_MEMORY_LIMIT_MB", "1024")),
+            max_pages=max_pages if max_pages > 0 else None,
+        )
+
+
+def _extraction_worker(conn, file_bytes: bytes, file_name: str, memory_limit_mb: int,
+                       max_pages: Optional[int]):
+    """Entry point of the worker process: apply limits, extract, send the result back"""
+    if resource is not None and memory_limit_mb:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    try:
+        from src.utils.document_processor import DocumentProcessor
+        document = DocumentProcessor.extract_structure(file_bytes, file_name, max_pages=max_pages)
+        conn.send(("ok", document))
+    except MemoryError:
+        conn.send(("memory", "Document needs more memory than the extraction limit allows"))
+    except PageLimitError as e:
+        conn.send(("pages", str(e)))
+    except Exception as e:
+        conn.send(("error", str(e)))
+    finally:
+        conn.close()
+
+
+def extract_in_sandbox(file_bytes: bytes, file_name: str,
+                       limits: Optional[ExtractionLimits] = None):
+    """Extract a StructuredDocument in a separate process so a hostile file cannot stall the app"""
+    limits = limits or ExtractionLimits()
+    # spawn avoids forking a multi-threaded Streamlit server
+    context = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = context.Pipe(duplex=False)
+    worker = context.Process(
+        target=_extraction_worker,
+        args=(child_conn, file_bytes, file_name, limits.memory_limit_mb, limits.max_pages),
+        daemon=True,
+    )
+    worker.start()
+    child_conn.close()
+
+    try:
+        if not parent_conn.poll(limits.timeout_seconds):
+            raise ExtractionTimeoutError(
+                f"Extraction took longer than {limits.timeout_seconds:g} seconds and was stopped"
+            )
+        try:
+            status, payload = parent_conn.recv()
+        except EOFError:
+            worker.join(1)
+            # A worker killed by a signal was most likely stopped for exceeding memory
+            if worker.exitcode is not None and worker.exitcode < 0:
+                raise ExtractionMemoryError(
+                    f"Extraction worker was killed (signal {-worker.exitcode}); "
+                    f"the document may exceed the {limits.memory_limit_mb} MB limit"
+                )
+            raise ExtractionError(f"Extraction worker exited unexpectedly (exit code {worker.exitcode})")
+    finally:
+        parent_conn.close()
+        if worker.is_alive():
+            worker.kill()
+        worker.join(1)
+
+    if status == "ok":
+        return payload
+    if status == "memory":
+        raise ExtractionMemoryError(payload)
+    if status == "pages":
+        raise PageLimitError(payload)
+    raise ExtractionError(payload)
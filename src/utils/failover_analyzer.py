@@ -0,0 +1,111 @@
+import os
+import time
+from typing import Dict, List, Optional
+
+from src.utils.circuit_breaker import get_breaker
+from src.utils.gemini_analyzer import GeminiAnalyzer
+from src.utils.hedging import DeadlineExceeded
+from src.utils.model_router import ModelRouter, _parse_stage_map, load_price_table
+
+PROVIDERS = ("gemini", "anthropic")
+
+
+class FailoverAnalyzer(GeminiAnalyzer):
+    """Runs every stage on its primary provider and fails over to the other one
+
+    Stage prompts and result handling are the Gemini analyzer's; only the model call
+    moves between providers. Each provider has a process-wide circuit breaker, so
+    once a provider's recent calls are mostly failing or slow, stages go straight to
+    the other provider until a trial call shows it has recovered.
+    """
+
+    def __init__(self, gemini_api_key: str, anthropic_api_key: str, primary: str = "gemini",
+                 stage_primary: Optional[Dict[str, str]] = None,
+                 router: Optional[ModelRouter] = None, anthropic_router: Optional[ModelRouter] = None):
+        unknown = {primary, *(stage_primary or {}).values()} - set(PROVIDERS)
+        if unknown:
+            raise ValueError(f"Unknown provider(s): {', '.join(sorted(unknown))}. Choose from {', '.join(PROVIDERS)}.")
+        super().__init__(gemini_api_key, router=router)
+        # Imported here so the Anthropic SDK is only needed when failover is configured
+        from src.utils.analyzer import ContractAnalyzer
+        self.secondary = ContractAnalyzer(anthropic_api_key, router=anthropic_router)
+        self.primary = primary
+        self.stage_primary = dict(stage_primary or {})
+        self.breakers = {provider: get_breaker(provider) for provider in PROVIDERS}
+
+    @classmethod
+    def from_env(cls, gemini_api_key: str) -> Optional["FailoverAnalyzer"]:
+        """Failover analyzer configured by FAILOVER_* variables, or None when FAILOVER_ANTHROPIC_API_KEY is unset"""
+        anthropic_api_key = os.getenv("FAILOVER_ANTHROPIC_API_KEY")
+        if not anthropic_api_key:
+            return None
+        return cls(
+            gemini_api_key,
+            anthropic_api_key,
+            primary=os.getenv("FAILOVER_PRIMARY", "gemini").strip().lower(),
+            stage_primary={stage: provider.lower()
+                           for stage, provider in _parse_stage_map(os.getenv("FAILOVER_STAGE_PRIMARY")).items()},
+            # STAGE_MODELS names Gemini models, so the Anthropic side has its own map
+            anthropic_router=ModelRouter(
+                "anthropic",
+                stage_models=_parse_stage_map(os.getenv("FAILOVER_STAGE_MODELS")),
+                escalate=os.getenv("ROUTING_ESCALATE", "true").lower() == "true",
+                escalate_threshold=int(os.getenv("ROUTING_ESCALATE_THRESHOLD", "2")),
+                prices=load_price_table(),
+            ),
+        )
+
+    def providers_for(self, stage: str) -> List[str]:
+        """Providers to try for a stage, primary first"""
+        primary = self.stage_primary.get(stage, self.primary)
+        return [primary] + [provider for provider in PROVIDERS if provider != primary]
+
+    def provider_health(self) -> Dict[str, Dict]:
+        return {provider: breaker.snapshot() for provider, breaker in self.breakers.items()}
+
+    def _generate(self, stage: str, prompt: str, max_tokens: Optional[int] = None) -> str:
+        """Run the prompt on the first healthy provider, moving on when a call fails
+
+        When every breaker is open the stage's primary is tried anyway, so a
+        pessimistic breaker never turns into a guaranteed error.
+        """
+        providers = self.providers_for(stage)
+        error: Optional[Exception] = None
+        attempted = False
+        for provider in providers:
+            if not self.breakers[provider].allow():
+                continue
+            attempted = True
+            try:
+                return self._attempt(provider, stage, prompt, max_tokens)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                error = e
+        if not attempted:
+            return self._attempt(providers[0], stage, prompt, max_tokens)
+        raise error
+
+    def _attempt(self, provider: str, stage: str, prompt: str, max_tokens: Optional[int]) -> str:
+        breaker = self.breakers[provider]
+        started = time.monotonic()
+        try:
+            text = self._provider_generate(provider, stage, prompt, max_tokens)
+        except DeadlineExceeded:
+            # Out of time for the whole analysis; the provider is not to blame
+            breaker.release()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success(time.monotonic() - started)
+        return text
+
+    def _provider_generate(self, provider: str, stage: str, prompt: str, max_tokens: Optional[int]) -> str:
+        if provider == "gemini":
+            return super()._generate(stage, prompt, max_tokens)
+        # The secondary records into this analysis's metrics and routes on its context
+        self.secondary.metrics = self.metrics
+        self.secondary._context = self._context
+        self.secondary._deadline = self._deadline
+        return self.secondary._generate(stage, prompt, max_tokens)
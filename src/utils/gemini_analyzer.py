@@ -1,52 +1,84 @@
 import google.generativeai as genai
 import os
 import json
+import time
 from datetime import datetime
-from typing import Dict, List
+from typing import Callable, Dict, Iterable, List, Optional
+
+from src.utils.clause_explainer import parse_explanations
+from src.utils.clause_index import ClauseIndex
+from src.utils.cost_accounting import AnalysisBudget, estimate_stage_cost, summarize_usage
+from src.utils.entity_extractor import extract_entities, merge_entities, summarize_entities
+from src.utils.gemini_clients import generative_model
+from src.utils.hedging import Deadline, DeadlineExceeded, get_default_caller
+from src.utils.model_router import ModelRouter, StageMetrics, prescreen
+from src.utils.pipeline import resolve_stages, run_stages
+from src.utils.text_normalizer import estimate_tokens
 
 class GeminiAnalyzer:
-    def __init__(self, api_key: str):
-        genai.configure(api_key=api_key)
-        # Use the fastest free model that works
-        self.model = genai.GenerativeModel('models/gemini-2.5-flash')
-        
-        
-        
-    def analyze_contract(self, contract_text: str, contract_type: str = "General") -> Dict:
-        """Main analysis function that orchestrates all analysis tasks"""
+    def __init__(self, api_key: str, router: Optional[ModelRouter] = None):
+        # Models get a client for this key; the process-wide genai.configure() would
+        # let concurrent sessions with different keys use each other's
+        self.api_key = api_key
+        # Each stage goes to the model the router picks for it
+        self.router = router or ModelRouter.from_env("gemini")
+        self._models: Dict[str, genai.GenerativeModel] = {}
+        self.model = self._model(self.router.default_model)
+        self.metrics = StageMetrics()
+        self.caller = get_default_caller()
+        self._deadline: Optional[Deadline] = None
+        self._context: Dict[str, object] = {}
+        self._clauses: Optional[ClauseIndex] = None
         
-        # Step 1: Contract Type Classification
-        contract_classification = self._classify_contract(contract_text)
+    def analyze_contract(self, contract_text: str, contract_type: str = "General",
+                         progress_callback: Optional[Callable[[str, object], None]] = None,
+                         stages: Optional[Iterable[str]] = None,
+                         deadline_seconds: Optional[float] = None,
+                         budget: Optional[AnalysisBudget] = None) -> Dict:
+        """Main analysis function that orchestrates all analysis tasks
         
-        # Step 2: Extract entities and clauses
-        entities = self._extract_entities(contract_text)
+        stages selects a subset of the stage graph (e.g. {"risk_assessment"}); the
+        stages they depend on run too, and nothing else does. progress_callback, when
+        given, is called with each stage's result key and result as soon as that
+        stage finishes. Stages still pending when the deadline (deadline_seconds, or
+        ANALYSIS_DEADLINE_SECONDS) passes are skipped and listed in skipped_stages.
+        Optional stages that would overrun the budget are dropped and listed in
+        usage["budget_dropped_stages"].
+        """
         
-        # Step 3: Identify obligations, rights, and prohibitions
-        obligations_analysis = self._analyze_obligations(contract_text)
+        self.metrics = StageMetrics()
+        self._deadline = Deadline(deadline_seconds) if deadline_seconds is not None else Deadline.from_env()
+        # Routing decisions can use the pre-screen and any stage finished so far
+        self._context = {"prescreen": prescreen(contract_text)}
+        # Built once so each stage's prompt carries only the clauses it needs
+        self._clauses = ClauseIndex(contract_text)
         
-        # Step 4: Risk assessment
-        risk_assessment = self._assess_risks(contract_text)
+        def report(stage: str, result):
+            self._context[stage] = result
+            if progress_callback is not None:
+                progress_callback(stage, result)
         
-        # Step 5: Generate simplified summary
-        summary = self._generate_summary(contract_text)
+        admit = None
+        if budget is not None:
+            def admit(stage, results):
+                estimate = estimate_stage_cost(self.router, stage.key, self._context, contract_text)
+                return budget.admits(stage, estimate, self.metrics.total_cost)
         
-        # Step 6: Identify unfavorable clauses
-        unfavorable_clauses = self._identify_unfavorable_clauses(contract_text)
-        
-        # Step 7: Generate alternative suggestions
-        alternatives = self._generate_alternatives(unfavorable_clauses)
+        # Stages run in graph order, which is the order users read the results
+        results = run_stages(self, contract_text, stages, on_result=report, deadline=self._deadline, admit=admit)
         
         # Compile all results
-        analysis_result = {
-            "timestamp": datetime.now().isoformat(),
-            "contract_type": contract_classification,
-            "entities": entities,
-            "obligations_analysis": obligations_analysis,
-            "risk_assessment": risk_assessment,
-            "summary": summary,
-            "unfavorable_clauses": unfavorable_clauses,
-            "suggested_alternatives": alternatives
-        }
+        analysis_result = {"timestamp": datetime.now().isoformat()}
+        analysis_result.update(results)
+        analysis_result["stages"] = list(results)
+        dropped = budget.dropped if budget is not None else []
+        skipped = [stage for stage in resolve_stages(stages) if stage not in results and stage not in dropped]
+        if skipped:
+            analysis_result["skipped_stages"] = skipped
+        analysis_result["stage_metrics"] = list(self.metrics.records)
+        analysis_result["usage"] = summarize_usage(self.metrics.records)
+        if dropped:
+            analysis_result["usage"]["budget_dropped_stages"] = list(dropped)
         
         return analysis_result
     
@@ -63,7 +95,7 @@ class GeminiAnalyzer:
 - Other
 
 Contract text:
-{contract_text[:2000]}
+{self._stage_text('contract_type', contract_text, 2000)}
 
 Respond with ONLY a JSON object (no markdown, no backticks) containing:
 {{
@@ -73,31 +105,42 @@ Respond with ONLY a JSON object (no markdown, no backticks) containing:
 }}"""
 
         try:
-            response = self.model.generate_content(prompt)
-            return self._parse_json_response(response.text)
+            response_text = self._generate("contract_type", prompt)
+            return self._parse_json_response(response_text)
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             return {"contract_type": "Unknown", "sub_type": "Error", "confidence": "low", "error": str(e)}
     
     def _extract_entities(self, contract_text: str) -> Dict:
-        """Extract named entities from the contract"""
-        prompt = f"""Extract the following entities from this contract:
-1. Parties (all parties involved with their roles)
-2. Important Dates (effective date, termination date, renewal dates)
-3. Financial Amounts (payment terms, penalties, deposits)
-4. Jurisdiction (governing law, dispute resolution location)
-5. Liabilities (who is liable for what)
-6. Key Deliverables
+        """Extract named entities from the contract
+
+        Parties, dates, rupee amounts and jurisdiction are found locally across the
+        whole document; the model is asked only for liabilities, deliverables and
+        whatever the patterns missed.
+        """
+        located = summarize_entities(contract_text, extract_entities(contract_text))
+        found = json.dumps({key: value for key, value in located.items() if key != "spans"}, ensure_ascii=False, indent=1)
+        prompt = f"""These entities were already found in the contract:
+{found}
+
+Extract the remaining entities from this contract:
+1. Liabilities (who is liable for what)
+2. Key Deliverables
+3. Any parties, important dates, financial amounts or jurisdiction terms missing from the list above
 
 Contract text:
-{contract_text[:3000]}
+{self._stage_text('entities', contract_text, 3000)}
 
-Respond with ONLY a JSON object (no markdown, no backticks) with these keys: parties, dates, financial_terms, jurisdiction, liabilities, deliverables"""
+Respond with ONLY a JSON object (no markdown, no backticks) with these keys: parties, dates, financial_terms, jurisdiction, liabilities, deliverables. Include only entities missing from the list above"""
 
         try:
-            response = self.model.generate_content(prompt)
-            return self._parse_json_response(response.text)
+            response_text = self._generate("entities", prompt)
+            return merge_entities(located, self._parse_json_response(response_text))
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            return {"error": str(e)}
+            return dict(located, error=str(e))
     
     def _analyze_obligations(self, contract_text: str) -> Dict:
         """Identify obligations, rights, and prohibitions"""
@@ -107,13 +150,15 @@ Respond with ONLY a JSON object (no markdown, no backticks) with these keys: par
 3. PROHIBITIONS (what parties CANNOT do)
 
 Contract text:
-{contract_text[:3000]}
+{self._stage_text('obligations_analysis', contract_text, 3000)}
 
 Respond with ONLY a JSON object (no markdown, no backticks) with keys: obligations, rights, prohibitions. Each should be a list of objects with "party", "clause", and "description"."""
 
         try:
-            response = self.model.generate_content(prompt)
-            return self._parse_json_response(response.text)
+            response_text = self._generate("obligations_analysis", prompt)
+            return self._parse_json_response(response_text)
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             return {"obligations": [], "rights": [], "prohibitions": [], "error": str(e)}
     
@@ -126,7 +171,7 @@ Respond with ONLY a JSON object (no markdown, no backticks) with keys: obligatio
 3. LOW RISK clauses (minor concerns)
 
 Contract text:
-{contract_text[:4000]}
+{self._stage_text('risk_assessment', contract_text, 4000)}
 
 Respond with ONLY JSON (no markdown, no backticks):
 {{
@@ -140,8 +185,10 @@ Respond with ONLY JSON (no markdown, no backticks):
 }}"""
 
         try:
-            response = self.model.generate_content(prompt)
-            return self._parse_json_response(response.text)
+            response_text = self._generate("risk_assessment", prompt)
+            return self._parse_json_response(response_text)
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             return {
                 "overall_risk_score": "0",
@@ -170,11 +217,12 @@ Cover:
 Keep it concise.
 
 Contract text:
-{contract_text[:4000]}"""
+{self._stage_text('summary', contract_text, 4000)}"""
 
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            return self._generate("summary", prompt)
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             return f"Error generating summary: {str(e)}"
     
@@ -189,14 +237,16 @@ For each clause provide:
 4. Severity (Low/Medium/High)
 
 Contract text:
-{contract_text[:4000]}
+{self._stage_text('unfavorable_clauses', contract_text, 4000)}
 
 Respond with ONLY a JSON array (no markdown, no backticks) of unfavorable clauses."""
 
         try:
-            response = self.model.generate_content(prompt)
-            result = self._parse_json_response(response.text)
+            response_text = self._generate("unfavorable_clauses", prompt)
+            result = self._parse_json_response(response_text)
             return result if isinstance(result, list) else result.get("unfavorable_clauses", [])
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             return []
     
@@ -219,12 +269,62 @@ For each clause, provide:
 Respond with ONLY a JSON array (no markdown, no backticks) matching the input clauses."""
 
         try:
-            response = self.model.generate_content(prompt)
-            result = self._parse_json_response(response.text)
+            response_text = self._generate("suggested_alternatives", prompt)
+            result = self._parse_json_response(response_text)
             return result if isinstance(result, list) else result.get("alternatives", [])
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             return []
     
+    def _model(self, model_name: str) -> "genai.GenerativeModel":
+        if model_name not in self._models:
+            self._models[model_name] = generative_model(model_name, self.api_key)
+        return self._models[model_name]
+    
+    def _generate(self, stage: str, prompt: str, max_tokens: Optional[int] = None) -> str:
+        """Run one stage's prompt on its routed model, recording latency, tokens and cost
+        
+        The call is bounded by the per-call timeout and the analysis deadline, and may
+        be hedged with a duplicate request when it runs long.
+        """
+        model_name = self.router.model_for(stage, self._context)
+        generation_config = {"max_output_tokens": max_tokens} if max_tokens else None
+        
+        def request(timeout: Optional[float]):
+            return self._model(model_name).generate_content(
+                prompt,
+                generation_config=generation_config,
+                request_options={"timeout": timeout} if timeout else None
+            )
+        
+        def record(response, **extra):
+            usage = getattr(response, "usage_metadata", None)
+            input_tokens = getattr(usage, "prompt_token_count", None) or estimate_tokens(prompt)
+            output_tokens = getattr(usage, "candidates_token_count", None) or 0
+            self.metrics.record(stage, model_name, started, input_tokens, output_tokens,
+                                self.router.cost(model_name, input_tokens, output_tokens), **extra)
+        
+        started = time.perf_counter()
+        try:
+            response, hedged = self.caller.call(
+                stage, request, self._deadline,
+                on_discarded=lambda response: record(response, hedge_discarded=True)
+            )
+            text = response.text
+        except Exception as e:
+            self.metrics.record(stage, model_name, started, estimate_tokens(prompt), 0, None, ok=False, error=str(e))
+            raise
+        
+        record(response, hedged=hedged)
+        return text
+    
+    def _stage_text(self, stage: str, contract_text: str, max_chars: int) -> str:
+        """The clauses of the contract relevant to a stage, within max_chars"""
+        if self._clauses is None or self._clauses.text is not contract_text:
+            self._clauses = ClauseIndex(contract_text)
+        return self._clauses.scoped_text(stage, max_chars)
+    
     def _parse_json_response(self, response_text: str) -> Dict:
         """Parse JSON from Gemini's response"""
         cleaned = response_text.strip()
@@ -256,7 +356,29 @@ Explain:
 4. What to watch out for?"""
 
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            return self._generate("clause_explanation", prompt)
         except Exception as e:
-            return f"Error explaining clause: {str(e)}"
\ No newline at end of file
+            return f"Error explaining clause: {str(e)}"
+    
+    def generate_clause_explanations(self, clauses: List[str]) -> List[Optional[str]]:
+        """Plain language explanations for several clauses in one request
+
+        Returns one explanation per clause, in order, with None where the answer left
+        a clause out. Unlike the single-clause method, errors are raised so callers
+        can retry rather than cache them.
+        """
+        numbered = "\n\n".join(f'{number}. "{clause}"' for number, clause in enumerate(clauses, 1))
+        prompt = f"""Explain each of these contract clauses in simple language:
+
+{numbered}
+
+For each clause explain:
+1. What does this mean?
+2. Your obligations?
+3. Your rights?
+4. What to watch out for?
+
+Respond with ONLY a JSON array (no markdown, no backticks) of {len(clauses)} strings, one markdown explanation per clause, in the order given."""
+
+        response_text = self._generate("clause_explanation", prompt)
+        return parse_explanations(self._parse_json_response(response_text), len(clauses))
\ No newline at end of file
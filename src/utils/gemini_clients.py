@@ -0,0 +1,67 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import google.ai.generativelanguage as glm
+import google.generativeai as genai
+
+# genai.configure() sets process-wide defaults: with several users' keys in one
+# process, a call could go out under whichever key was configured last. Clients
+# here are built per API key and bound to each model, and the global
+# configuration is never touched.
+
+_CLIENT_CACHE_SIZE = 64
+_clients: "OrderedDict[str, glm.GenerativeServiceClient]" = OrderedDict()
+_clients_lock = threading.Lock()
+
+
+def client_settings() -> dict:
+    """Transport and endpoint overrides from GEMINI_TRANSPORT and GEMINI_API_ENDPOINT"""
+    settings = {}
+    if os.getenv("GEMINI_TRANSPORT"):
+        settings["transport"] = os.getenv("GEMINI_TRANSPORT")
+    if os.getenv("GEMINI_API_ENDPOINT"):
+        settings["api_endpoint"] = os.getenv("GEMINI_API_ENDPOINT")
+    return settings
+
+
+def generative_client(api_key: str, transport: Optional[str] = None,
+                      api_endpoint: Optional[str] = None) -> glm.GenerativeServiceClient:
+    """Client that sends every request with api_key, shared by the analyzers using that key
+
+    Clients are thread-safe and reused, so a tenant's connection pool survives
+    across analyses. Raises ValueError without a key: falling back to the server's
+    own key would bill the operator for a tenant's calls.
+    """
+    if not api_key:
+        raise ValueError("A Gemini API key is required")
+    settings = client_settings()
+    transport = transport or settings.get("transport")
+    api_endpoint = api_endpoint or settings.get("api_endpoint")
+    cache_key = hashlib.sha256(f"{api_key}\0{transport}\0{api_endpoint}".encode("utf-8")).hexdigest()
+    with _clients_lock:
+        client = _clients.get(cache_key)
+        if client is not None:
+            _clients.move_to_end(cache_key)
+            return client
+
+    client_options = {"api_key": api_key}
+    if api_endpoint:
+        client_options["api_endpoint"] = api_endpoint
+    client = glm.GenerativeServiceClient(transport=transport, client_options=client_options)
+    with _clients_lock:
+        client = _clients.setdefault(cache_key, client)
+        _clients.move_to_end(cache_key)
+        while len(_clients) > _CLIENT_CACHE_SIZE:
+            _clients.popitem(last=False)
+    return client
+
+
+def generative_model(model_name: str, api_key: str) -> genai.GenerativeModel:
+    """GenerativeModel bound to api_key's own client instead of the process-wide default"""
+    model = genai.GenerativeModel(model_name)
+    # The SDK only falls back to the global client while this is unset
+    model._client = generative_client(api_key)
+    return model
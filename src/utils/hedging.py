@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+
+class DeadlineExceeded(TimeoutError):
+    """The analysis ran out of time before this call could finish"""
+
+
+class Deadline:
+    """Point in time by which a whole analysis must finish"""
+
+    def __init__(self, seconds: Optional[float]):
+        self.seconds = seconds
+        self._end = time.monotonic() + seconds if seconds else None
+
+    @classmethod
+    def from_env(cls) -> "Deadline":
+        """Deadline of ANALYSIS_DEADLINE_SECONDS (0 disables it)"""
+        return cls(float(os.getenv("ANALYSIS_DEADLINE_SECONDS", "300")) or None)
+
+    def remaining(self) -> Optional[float]:
+        return None if self._end is None else max(0.0, self._end - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self._end is not None and time.monotonic() >= self._end
+
+
+class LatencyTracker:
+    """Recent successful call latencies per stage"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._window = window
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, latency: float):
+        with self._lock:
+            self._samples.setdefault(stage, deque(maxlen=self._window)).append(latency)
+
+    def p95(self, stage: str) -> Optional[float]:
+        """95th percentile latency, or None until enough calls have been seen"""
+        with self._lock:
+            samples = sorted(self._samples.get(stage, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+
+class HedgeBudget:
+    """Caps hedged requests at a fraction of all requests over a sliding window"""
+
+    def __init__(self, max_ratio: float = 0.1, window_seconds: float = 600):
+        self.max_ratio = max_ratio
+        self.window_seconds = window_seconds
+        self._calls: Deque[float] = deque()
+        self._hedges: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float):
+        for events in (self._calls, self._hedges):
+            while events and now - events[0] > self.window_seconds:
+                events.popleft()
+
+    def record_call(self):
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            self._calls.append(now)
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            if len(self._hedges) + 1 > self.max_ratio * len(self._calls):
+                return False
+            self._hedges.append(now)
+            return True
+
+
+class HedgedCaller:
+    """Runs LLM requests with a per-call timeout, the analysis deadline and optional hedging
+
+    A request still running after the stage's recent p95 latency gets a duplicate,
+    budget permitting, and the first successful response wins. The slower response
+    is handed to on_discarded once it arrives so its cost can still be recorded.
+    """
+
+    def __init__(self, call_timeout: Optional[float] = 60, hedge: bool = True, max_hedge_ratio: float = 0.1,
+                 min_samples: int = 20, max_workers: int = 32):
+        self.call_timeout = call_timeout
+        self.hedge = hedge
+        self.tracker = LatencyTracker(min_samples=min_samples)
+        self.budget = HedgeBudget(max_ratio=max_hedge_ratio)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+
+    @classmethod
+    def from_env(cls) -> "HedgedCaller":
+        return cls(
+            call_timeout=float(os.getenv("LLM_CALL_TIMEOUT_SECONDS", "60")) or None,
+            hedge=os.getenv("LLM_HEDGE", "true").lower() == "true",
+            max_hedge_ratio=float(os.getenv("LLM_HEDGE_MAX_RATIO", "0.1")),
+            min_samples=int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20")),
+            max_workers=int(os.getenv("LLM_MAX_CONCURRENCY", "32")),
+        )
+
+    def call(self, stage: str, request: Callable[[Optional[float]], object], deadline: Optional[Deadline] = None,
+             on_discarded: Optional[Callable[[object], None]] = None) -> Tuple[object, bool]:
+        """Run request(timeout) and return (response, hedged)
+
+        Raises DeadlineExceeded when the analysis deadline cuts the call short,
+        TimeoutError when the per-call timeout does, or the request's own error when
+        every attempt failed.
+        """
+        time_left = deadline.remaining() if deadline is not None else None
+        limits = [limit for limit in (self.call_timeout, time_left) if limit is not None]
+        limit = min(limits) if limits else None
+        deadline_bound = time_left is not None and limit == time_left
+        if limit is not None and limit <= 0:
+            raise DeadlineExceeded(f"No time left for {stage}")
+
+        started = time.monotonic()
+        end = started + limit if limit is not None else None
+        hedge_after = self.tracker.p95(stage) if self.hedge else None
+        hedged = False
+        error: Optional[BaseException] = None
+
+        self.budget.record_call()
+        pending = [self._executor.submit(request, limit)]
+        while pending:
+            now = time.monotonic()
+            waits = [end - now] if end is not None else []
+            if hedge_after is not None and not hedged:
+                waits.append(started + hedge_after - now)
+            done, _ = wait(pending, timeout=max(0.0, min(waits)) if waits else None, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                pending.remove(future)
+                if future.exception() is None:
+                    self.tracker.record(stage, time.monotonic() - started)
+                    self._discard(pending, on_discarded)
+                    return future.result(), hedged
+                error = future.exception()
+
+            now = time.monotonic()
+            if end is not None and now >= end:
+                self._discard(pending, on_discarded)
+                if deadline_bound:
+                    raise DeadlineExceeded(f"Analysis deadline reached during {stage}")
+                raise TimeoutError(f"{stage} call exceeded {limit:g}s")
+
+            if pending and not hedged and hedge_after is not None and now - started >= hedge_after:
+                if self.budget.try_acquire():
+                    hedged = True
+                    pending.append(self._executor.submit(request, end - now if end is not None else None))
+                else:
+                    hedge_after = None
+
+        raise error
+
+    @staticmethod
+    def _discard(futures, on_discarded: Optional[Callable[[object], None]]):
+        if on_discarded is None:
+            return
+
+        def report(future: Future):
+            if not future.cancelled() and future.exception() is None:
+                on_discarded(future.result())
+
+        for future in futures:
+            future.add_done_callback(report)
+
+
+_default_caller: Optional[HedgedCaller] = None
+_default_lock = threading.Lock()
+
+
+def get_default_caller() -> HedgedCaller:
+    """Process-wide caller, so latency history and the hedge budget span all analyses"""
+    global _default_caller
+    with _default_lock:
+        if _default_caller is None:
+            _default_caller = HedgedCaller.from_env()
+        return _default_caller
@@ -0,0 +1,230 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.utils.pipeline import ANALYSIS_STAGES
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a submission would exceed the runner's limit on unfinished jobs"""
+
+
+class Job:
+    """State of one background analysis, updated from the worker thread"""
+
+    def __init__(self, key: str, stages: List[str]):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = QUEUED
+        self.stages = stages
+        self.stage_results: Dict[str, object] = {}
+        self.result = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[["Job"], None]] = []
+
+    def record_stage(self, stage: str, result):
+        """Progress callback handed to the analyzer"""
+        with self._lock:
+            self.stage_results[stage] = result
+
+    def on_finish(self, callback: Callable[["Job"], None]) -> bool:
+        """Call callback(job) once the job finishes; returns False, without calling it, if it already has"""
+        with self._lock:
+            if self.finished:
+                return False
+            self._callbacks.append(callback)
+            return True
+
+    def _finish(self):
+        with self._lock:
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    @property
+    def progress(self) -> float:
+        if self.status == DONE:
+            return 1.0
+        return len(self.stage_results) / len(self.stages) if self.stages else 0.0
+
+    def snapshot(self) -> Dict:
+        """Consistent copy of the job state for the UI thread"""
+        with self._lock:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "progress": self.progress,
+                "completed_stages": [stage for stage in self.stages if stage in self.stage_results],
+                "stage_results": dict(self.stage_results),
+                "result": self.result,
+                "error": self.error,
+            }
+
+
+class Batch:
+    """Group of jobs submitted together with their own concurrency limit
+
+    An item's arguments (often the uploaded file's bytes) are released once it is
+    dispatched, so a finished batch keeps only names and job IDs.
+    """
+
+    def __init__(self, items: List[Tuple[str, str, tuple]], concurrency: int,
+                 progress_stages: Optional[List[str]] = None):
+        self.id = uuid.uuid4().hex
+        self.items: List[Optional[Tuple[str, str, tuple]]] = list(items)
+        self.names = [name for name, _, _ in items]
+        self.concurrency = concurrency
+        self.progress_stages = progress_stages
+        self.job_ids: List[Optional[str]] = [None] * len(items)
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def take_next(self) -> Optional[Tuple[int, str, tuple]]:
+        """Index, key and arguments of the next item to dispatch, or None when all are out"""
+        with self._lock:
+            if self._next >= len(self.items):
+                return None
+            index = self._next
+            self._next += 1
+            _, key, args = self.items[index]
+            self.items[index] = None
+            return index, key, args
+
+
+class JobRunner:
+    """Thread pool that runs analyses outside the Streamlit script thread
+
+    Jobs outlive reruns because the runner is shared process-wide. Submitting work
+    for a key that already has a queued, running or finished job returns that job
+    instead of starting a duplicate.
+    """
+
+    def __init__(self, max_workers: int = 4, max_jobs: int = 256):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._by_key: Dict[str, str] = {}
+        self._batches: "OrderedDict[str, Batch]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_jobs = max_jobs
+
+    def submit(self, key: str, fn: Callable, *args, progress_stages: Optional[List[str]] = None,
+               max_active: Optional[int] = None, **kwargs) -> str:
+        """Run fn(*args, progress_callback=..., **kwargs) in the background and return the job ID
+
+        progress_stages lists the stages the job reports, when it runs fewer than all
+        of them. With max_active set, raises QueueFullError instead of queueing a new
+        job once that many jobs are queued or running. Joining an existing job always
+        succeeds.
+        """
+        with self._lock:
+            existing = self._jobs.get(self._by_key.get(key, ""))
+            if existing is not None and existing.status != FAILED:
+                return existing.id
+            if max_active is not None and self._active_count() >= max_active:
+                raise QueueFullError(f"{max_active} analyses are already queued or running")
+
+            job = Job(key, progress_stages or [stage for stage, _ in ANALYSIS_STAGES])
+            self._jobs[job.id] = job
+            self._by_key[key] = job.id
+            self._evict()
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def active_count(self) -> int:
+        """Jobs queued or running"""
+        with self._lock:
+            return self._active_count()
+
+    def _active_count(self) -> int:
+        return sum(1 for job in self._jobs.values() if not job.finished)
+
+    def get(self, job_id: Optional[str]) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id) if job_id else None
+
+    def submit_batch(self, items: List[Tuple[str, str, tuple]], fn: Callable, concurrency: int = 3,
+                     progress_stages: Optional[List[str]] = None) -> str:
+        """Run fn for each (name, key, args) item with at most `concurrency` running at once
+
+        Items are dispatched as earlier ones finish, so a large batch never holds more
+        than its share of the shared pool.
+        """
+        batch = Batch(items, max(1, concurrency), progress_stages)
+        with self._lock:
+            self._batches[batch.id] = batch
+            while len(self._batches) > self.max_jobs:
+                self._batches.popitem(last=False)
+        for _ in range(min(batch.concurrency, len(items))):
+            self._dispatch_next(batch, fn)
+        return batch.id
+
+    def get_batch(self, batch_id: Optional[str]) -> Optional["Batch"]:
+        with self._lock:
+            return self._batches.get(batch_id) if batch_id else None
+
+    def _dispatch_next(self, batch: "Batch", fn: Callable):
+        """Dispatch items until one is left running, whose finish dispatches the next
+
+        Items that join a finished (or already evicted) job are passed over in this
+        loop rather than by recursion, so a batch of finished jobs cannot exhaust the
+        stack.
+        """
+        while True:
+            taken = batch.take_next()
+            if taken is None:
+                return
+            index, key, args = taken
+            job_id = self.submit(key, fn, *args, progress_stages=batch.progress_stages)
+            batch.job_ids[index] = job_id
+            job = self.get(job_id)
+            if job is not None and job.on_finish(lambda _job: self._dispatch_next(batch, fn)):
+                return
+
+    def _run(self, job: Job, fn: Callable, args, kwargs):
+        job.status = RUNNING
+        try:
+            job.result = fn(*args, progress_callback=job.record_stage, **kwargs)
+            job.status = DONE
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            job._finish()
+
+    def _evict(self):
+        """Drop the oldest finished jobs once more than max_jobs are tracked"""
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            job = self._jobs[job_id]
+            if job.finished:
+                del self._jobs[job_id]
+                if self._by_key.get(job.key) == job_id:
+                    del self._by_key[job.key]
+
+
+def job_key(*parts: str) -> str:
+    """Coalescing key for a job from the inputs that determine its result"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
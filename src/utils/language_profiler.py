@@ -0,0 +1,124 @@
+import re
+from typing import Dict, List, Optional
+
+# Unicode blocks for the scripts we expect in Indian contracts, with the language reported for each
+SCRIPT_BLOCKS = [
+    ("devanagari", "hindi", [(0x0900, 0x097F), (0xA8E0, 0xA8FF)]),
+    ("bengali", "bengali", [(0x0980, 0x09FF)]),
+    ("gurmukhi", "punjabi", [(0x0A00, 0x0A7F)]),
+    ("gujarati", "gujarati", [(0x0A80, 0x0AFF)]),
+    ("oriya", "odia", [(0x0B00, 0x0B7F)]),
+    ("tamil", "tamil", [(0x0B80, 0x0BFF)]),
+    ("telugu", "telugu", [(0x0C00, 0x0C7F)]),
+    ("kannada", "kannada", [(0x0C80, 0x0CFF)]),
+    ("malayalam", "malayalam", [(0x0D00, 0x0D7F)]),
+    ("arabic", "urdu", [(0x0600, 0x06FF)]),
+    ("latin", "english", [(0x0041, 0x005A), (0x0061, 0x007A), (0x00C0, 0x024F)]),
+]
+
+SCRIPT_LANGUAGES = {script: language for script, language, _ in SCRIPT_BLOCKS}
+
+# Each script is mapped to one private-use marker so a single str.translate pass classifies
+# every character in C; translate keeps length, so offsets into the result match the text
+_MARKER_BASE = 0xF0000
+_MARKERS = {script: chr(_MARKER_BASE + index) for index, (script, _, _) in enumerate(SCRIPT_BLOCKS)}
+_TRANSLATION = {
+    code_point: _MARKERS[script]
+    for script, _, ranges in SCRIPT_BLOCKS
+    for low, high in ranges
+    for code_point in range(low, high + 1)
+}
+
+_SECTION_BREAK_RE = re.compile(r"\n[ \t]*\n|\f")
+
+
+class LanguageProfiler:
+    """Profile the scripts and languages used in a document and its sections"""
+
+    def __init__(self, sample_threshold: int = 200_000, sample_windows: int = 16,
+                 window_size: int = 4_000, indic_threshold: float = 0.3):
+        self.sample_threshold = sample_threshold
+        self.sample_windows = sample_windows
+        self.window_size = window_size
+        self.indic_threshold = indic_threshold
+
+    @staticmethod
+    def classify(text: str) -> str:
+        """Replace every character of a known script with that script's marker"""
+        return text.translate(_TRANSLATION)
+
+    @staticmethod
+    def count_scripts(classified: str, start: int = 0, end: Optional[int] = None,
+                      scripts: Optional[List[str]] = None) -> Dict[str, int]:
+        """Count characters per script in a classified string"""
+        end = len(classified) if end is None else end
+        counts = {}
+        for script in scripts or _MARKERS:
+            count = classified.count(_MARKERS[script], start, end)
+            if count:
+                counts[script] = count
+        return counts
+
+    def profile(self, text: str) -> Dict:
+        """Return the dominant language and script shares, sampling very large documents"""
+        sampled = len(text) > self.sample_threshold
+        if sampled:
+            step = len(text) // self.sample_windows
+            text = "".join(text[i:i + self.window_size] for i in range(0, len(text), step))
+
+        counts = self.count_scripts(self.classify(text))
+        result = self._language_from_counts(counts)
+        result["sampled"] = sampled
+        return result
+
+    def section_map(self, text: str) -> List[Dict]:
+        """Split text into sections and merge neighbours into spans of the same language"""
+        classified = self.classify(text)
+        # Only scripts present somewhere in the document need counting per section
+        present = list(self.count_scripts(classified))
+        spans: List[Dict] = []
+        start = 0
+        if not present:
+            return spans
+
+        boundaries = [match.start() for match in _SECTION_BREAK_RE.finditer(text)]
+        boundaries.append(len(text))
+        for end in boundaries:
+            counts = self.count_scripts(classified, start, end, present)
+            if counts:
+                language = self._language_from_counts(counts)["language"]
+                if spans and spans[-1]["language"] == language:
+                    spans[-1]["end"] = end
+                    spans[-1]["letters"] += sum(counts.values())
+                else:
+                    spans.append({"start": start, "end": end, "language": language,
+                                  "letters": sum(counts.values())})
+            elif spans:
+                # Sections without letters (numbers, signature lines) stay with the previous span
+                spans[-1]["end"] = end
+            start = end
+
+        if spans:
+            spans[0]["start"] = 0
+            spans[-1]["end"] = len(text)
+        return spans
+
+    def _language_from_counts(self, counts: Dict[str, int]) -> Dict:
+        """Pick the document language from per-script character counts"""
+        total = sum(counts.values())
+        if total == 0:
+            return {"language": "unknown", "script": None, "scripts": {}}
+
+        shares = {script: count / total for script, count in counts.items()}
+        script = max(shares, key=shares.get)
+
+        # Indian-language contracts routinely embed English terms, so an Indic script
+        # above the threshold wins even when Latin letters are the majority
+        indic = {name: share for name, share in shares.items() if name not in ("latin", "arabic")}
+        if script == "latin" and indic:
+            top_indic = max(indic, key=indic.get)
+            if indic[top_indic] > self.indic_threshold:
+                script = top_indic
+
+        return {"language": SCRIPT_LANGUAGES[script], "script": script,
+                "scripts": {name: round(share, 4) for name, share in shares.items()}}
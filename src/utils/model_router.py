@@ -0,0 +1,262 @@
+import json
+import os
+import re
+import statistics
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from src.utils.clause_taxonomy import classify_clause
+
+
+class ModelSpec(NamedTuple):
+    """A model the router can send a stage to, with its list price per million tokens"""
+    name: str
+    tier: str  # fast, standard or strong
+    input_cost_per_mtok: float
+    output_cost_per_mtok: float
+
+    def cost(self, input_tokens: int, output_tokens: int) -> float:
+        return (input_tokens * self.input_cost_per_mtok + output_tokens * self.output_cost_per_mtok) / 1_000_000
+
+
+MODEL_CATALOG: Dict[str, Dict[str, ModelSpec]] = {
+    "gemini": {
+        "fast": ModelSpec("models/gemini-2.5-flash-lite", "fast", 0.10, 0.40),
+        "standard": ModelSpec("models/gemini-2.5-flash", "standard", 0.30, 2.50),
+        "strong": ModelSpec("models/gemini-2.5-pro", "strong", 1.25, 10.00),
+    },
+    "anthropic": {
+        "fast": ModelSpec("claude-3-5-haiku-20241022", "fast", 0.80, 4.00),
+        "standard": ModelSpec("claude-sonnet-4-20250514", "standard", 3.00, 15.00),
+        "strong": ModelSpec("claude-opus-4-20250514", "strong", 15.00, 75.00),
+    },
+}
+
+# Tier each stage runs on by default. Classification, entity extraction and clause
+# explanations are short structured tasks that the fast tier handles well.
+STAGE_TIERS: Dict[str, str] = {
+    "summary": "standard",
+    "contract_type": "fast",
+    "risk_assessment": "standard",
+    "entities": "fast",
+    "obligations_analysis": "standard",
+    "unfavorable_clauses": "standard",
+    "suggested_alternatives": "standard",
+    "clause_explanation": "fast",
+}
+
+# Stages moved to the strong tier when the contract looks hard
+ESCALATED_STAGES = ("risk_assessment", "unfavorable_clauses")
+
+# Clause types whose presence marks a contract as high-stakes in the pre-screen
+RISK_HEAVY_CLAUSES = ("Liability", "Indemnity", "Penalty", "Non-Compete", "Auto-Renewal", "Lock-in")
+
+# Wording that makes a clause one-sided, as opposed to merely present. Nearly every
+# commercial contract has liability and indemnity clauses, so escalation keys off
+# these instead of clause types.
+RED_FLAG_PATTERNS: Dict[str, "re.Pattern"] = {
+    "unlimited_liability": re.compile(
+        r"unlimited liability|liability\W+(?:\w+\W+){0,4}(?:shall be |is |will be )?unlimited"
+        r"|without (?:any )?limit(?:ation)? (?:of|on|to) (?:its |their )?liability", re.IGNORECASE),
+    "unilateral_termination": re.compile(
+        r"terminate\W+(?:\w+\W+){0,12}?(?:at (?:its|their) sole discretion|without (?:any )?(?:cause|reason|notice))"
+        r"|(?:at (?:its|their) sole discretion|without (?:any )?(?:cause|reason|notice))\W+(?:\w+\W+){0,8}?terminat",
+        re.IGNORECASE),
+    "indemnity_regardless_of_fault": re.compile(
+        r"indemnif\w*\W+(?:\w+\W+){0,30}?(?:regardless|irrespective) of (?:fault|negligence|cause)", re.IGNORECASE),
+    "forfeiture": re.compile(r"\bforfeit(?:s|ed|ure)?\b", re.IGNORECASE),
+    "waiver_of_rights": re.compile(r"waives? (?:all|any) (?:of (?:its|their) )?(?:rights?|claims?|remed)", re.IGNORECASE),
+}
+
+
+def prescreen(contract_text: str) -> Dict:
+    """Cheap local look at the contract used to decide on escalation before any LLM call"""
+    clause_types = classify_clause(contract_text)
+    return {
+        "clause_types": clause_types,
+        "risk_heavy_clauses": [clause_type for clause_type in clause_types if clause_type in RISK_HEAVY_CLAUSES],
+        "red_flags": [name for name, pattern in RED_FLAG_PATTERNS.items() if pattern.search(contract_text)],
+    }
+
+
+def load_price_table(value: Optional[str] = None) -> Dict[str, Tuple[float, float]]:
+    """USD per million (input, output) tokens by model, from MODEL_PRICES
+
+    MODEL_PRICES is a JSON object, inline or in a file it names, mapping model names
+    to [input, output] or {"input": ..., "output": ...}. Listed models override the
+    catalog prices; models not in the catalog become priceable.
+    """
+    value = value if value is not None else os.getenv("MODEL_PRICES", "")
+    value = value.strip()
+    if not value:
+        return {}
+    if not value.startswith("{"):
+        with open(value, encoding="utf-8") as file:
+            value = file.read()
+    prices = {}
+    for model, price in json.loads(value).items():
+        if isinstance(price, dict):
+            price = (price["input"], price["output"])
+        prices[str(model)] = (float(price[0]), float(price[1]))
+    return prices
+
+
+def _parse_stage_map(value: Optional[str]) -> Dict[str, str]:
+    """Parse 'stage=model,stage=model' or a JSON object"""
+    if not value:
+        return {}
+    value = value.strip()
+    if value.startswith("{"):
+        return {str(stage): str(model) for stage, model in json.loads(value).items()}
+    mapping = {}
+    for item in value.split(","):
+        if "=" in item:
+            stage, model = item.split("=", 1)
+            mapping[stage.strip()] = model.strip()
+    return mapping
+
+
+class ModelRouter:
+    """Chooses the model for each analysis stage
+
+    The base choice comes from the stage map. Unless escalate is off, stages in
+    ESCALATED_STAGES move to the escalation model when the classification came back
+    with low or no confidence, or the pre-screen finds at least escalate_threshold
+    kinds of one-sided wording (RED_FLAG_PATTERNS).
+    """
+
+    def __init__(self, provider: str = "gemini", stage_models: Optional[Dict[str, str]] = None,
+                 escalation_models: Optional[Dict[str, str]] = None, escalate: bool = True,
+                 escalate_threshold: int = 2, prices: Optional[Dict[str, Tuple[float, float]]] = None):
+        catalog = MODEL_CATALOG[provider]
+        self.provider = provider
+        self.specs: Dict[str, ModelSpec] = {spec.name: spec for spec in catalog.values()}
+        for model, (input_cost, output_cost) in (prices or {}).items():
+            tier = self.specs[model].tier if model in self.specs else "custom"
+            self.specs[model] = ModelSpec(model, tier, input_cost, output_cost)
+        self.default_model = catalog["standard"].name
+        self.stage_models = {stage: catalog[tier].name for stage, tier in STAGE_TIERS.items()}
+        self.stage_models.update(stage_models or {})
+        self.escalation_models = {stage: catalog["strong"].name for stage in ESCALATED_STAGES}
+        self.escalation_models.update(escalation_models or {})
+        self.escalate = escalate
+        self.escalate_threshold = escalate_threshold
+
+    @classmethod
+    def from_env(cls, provider: str = "gemini") -> "ModelRouter":
+        """Router configured by STAGE_MODELS, STAGE_ESCALATION_MODELS, ROUTING_ESCALATE and MODEL_PRICES"""
+        return cls(
+            provider,
+            stage_models=_parse_stage_map(os.getenv("STAGE_MODELS")),
+            escalation_models=_parse_stage_map(os.getenv("STAGE_ESCALATION_MODELS")),
+            escalate=os.getenv("ROUTING_ESCALATE", "true").lower() == "true",
+            escalate_threshold=int(os.getenv("ROUTING_ESCALATE_THRESHOLD", "2")),
+            prices=load_price_table(),
+        )
+
+    def should_escalate(self, context: Dict) -> bool:
+        if not self.escalate:
+            return False
+        # Only a classification that ran counts; stage subsets may skip it
+        classification = context.get("contract_type")
+        if classification is not None:
+            confidence = classification.get("confidence") if isinstance(classification, dict) else None
+            if str(confidence or "low").strip().lower() == "low":
+                return True
+        screen = context.get("prescreen") or {}
+        return len(screen.get("red_flags", [])) >= self.escalate_threshold
+
+    def model_for(self, stage: str, context: Optional[Dict] = None) -> str:
+        """Model for a stage given the results gathered so far in this analysis"""
+        if stage in self.escalation_models and self.should_escalate(context or {}):
+            return self.escalation_models[stage]
+        return self.stage_models.get(stage, self.default_model)
+
+    def cost(self, model: str, input_tokens: int, output_tokens: int) -> Optional[float]:
+        """Estimated USD cost, or None for models missing from the catalog"""
+        spec = self.specs.get(model)
+        return spec.cost(input_tokens, output_tokens) if spec else None
+
+
+class StageMetrics:
+    """Latency, tokens and cost of each LLM call made during one analysis
+
+    Records are also appended to the JSONL file at STAGE_METRICS_PATH, when set,
+    so the stage map can be tuned from production data.
+    """
+
+    _file_lock = threading.Lock()
+
+    def __init__(self, log_path: Optional[str] = None):
+        self.records: List[Dict] = []
+        self.log_path = log_path if log_path is not None else os.getenv("STAGE_METRICS_PATH")
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, model: str, started: float, input_tokens: int, output_tokens: int,
+               cost: Optional[float], ok: bool = True, **extra) -> Dict:
+        record = {
+            "stage": stage,
+            "model": model,
+            "latency_s": round(time.perf_counter() - started, 3),
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cost_usd": round(cost, 6) if cost is not None else None,
+            "ok": ok,
+            "timestamp": time.time(),
+        }
+        record.update(extra)
+        with self._lock:
+            self.records.append(record)
+        if self.log_path:
+            with self._file_lock, open(self.log_path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(record) + "\n")
+        return record
+
+    @property
+    def total_cost(self) -> float:
+        return sum(record["cost_usd"] or 0.0 for record in self.records)
+
+
+def summarize_metrics(records: Iterable[Dict]) -> List[Dict]:
+    """Per (stage, model) call count, latency percentiles, mean tokens and cost"""
+    groups: Dict[tuple, List[Dict]] = {}
+    for record in records:
+        groups.setdefault((record["stage"], record["model"]), []).append(record)
+
+    rows = []
+    for (stage, model), items in sorted(groups.items()):
+        latencies = sorted(item["latency_s"] for item in items)
+        costs = [item["cost_usd"] for item in items if item.get("cost_usd") is not None]
+        rows.append({
+            "stage": stage,
+            "model": model,
+            "calls": len(items),
+            "error_rate": round(sum(1 for item in items if not item.get("ok", True)) / len(items), 3),
+            "p50_latency_s": round(statistics.median(latencies), 3),
+            "p95_latency_s": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+            "mean_output_tokens": round(statistics.mean(item["output_tokens"] for item in items), 1),
+            "mean_cost_usd": round(statistics.mean(costs), 6) if costs else None,
+            "total_cost_usd": round(sum(costs), 6) if costs else None,
+        })
+    return rows
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarize per-stage latency and cost from a STAGE_METRICS_PATH log")
+    parser.add_argument("log", help="JSONL file written by StageMetrics")
+    args = parser.parse_args()
+
+    with open(args.log, encoding="utf-8") as file:
+        rows = summarize_metrics(json.loads(line) for line in file if line.strip())
+    print(f"{'stage':<24}{'model':<32}{'calls':>6}{'p50 s':>8}{'p95 s':>8}{'err':>6}{'mean $':>11}")
+    for row in rows:
+        mean_cost = f"{row['mean_cost_usd']:.5f}" if row["mean_cost_usd"] is not None else "n/a"
+        print(f"{row['stage']:<24}{row['model']:<32}{row['calls']:>6}{row['p50_latency_s']:>8.2f}"
+              f"{row['p95_latency_s']:>8.2f}{row['error_rate']:>6.0%}{mean_cost:>11}")
+
+
+if __name__ == "__main__":
+    main()
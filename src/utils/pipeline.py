@@ -0,0 +1,107 @@
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from src.utils.hedging import Deadline, DeadlineExceeded
+
+
+class Stage(NamedTuple):
+    """One node of the analysis graph
+
+    run(analyzer, contract_text, results) returns the stage result, where results
+    holds every stage finished so far, including everything in depends_on. Optional
+    stages are the first to go when an analysis runs short of budget.
+    """
+    key: str
+    label: str
+    run: Callable[[object, str, Dict[str, object]], object]
+    depends_on: Tuple[str, ...] = ()
+    optional: bool = False
+
+
+# Stages by result key, in execution order (the order users read the results)
+STAGE_GRAPH: Dict[str, Stage] = {}
+
+# Result key and progress label for each analysis stage, in execution order
+ANALYSIS_STAGES: List[Tuple[str, str]] = []
+
+
+def register_stage(stage: Stage):
+    """Add a stage to the graph, or replace the one with the same key
+
+    Plugins register here; their dependencies must already be registered.
+    """
+    missing = [dep for dep in stage.depends_on if dep not in STAGE_GRAPH]
+    if missing:
+        raise ValueError(f"Stage {stage.key} depends on unknown stage(s): {', '.join(missing)}")
+    if stage.key not in STAGE_GRAPH:
+        ANALYSIS_STAGES.append((stage.key, stage.label))
+    else:
+        ANALYSIS_STAGES[:] = [(key, stage.label if key == stage.key else label) for key, label in ANALYSIS_STAGES]
+    STAGE_GRAPH[stage.key] = stage
+
+
+def resolve_stages(requested: Optional[Iterable[str]] = None) -> List[str]:
+    """Requested stages plus everything they depend on, in execution order
+
+    None means every registered stage.
+    """
+    if requested is None:
+        return list(STAGE_GRAPH)
+
+    needed = set()
+    pending = list(requested)
+    while pending:
+        key = pending.pop()
+        if key not in STAGE_GRAPH:
+            raise ValueError(f"Unknown analysis stage: {key}. Choose from {', '.join(STAGE_GRAPH)}.")
+        if key not in needed:
+            needed.add(key)
+            pending.extend(STAGE_GRAPH[key].depends_on)
+    return [key for key in STAGE_GRAPH if key in needed]
+
+
+def run_stages(analyzer, contract_text: str, stages: Optional[Iterable[str]] = None,
+               on_result: Optional[Callable[[str, object], None]] = None,
+               deadline: Optional[Deadline] = None,
+               admit: Optional[Callable[[Stage, Dict[str, object]], bool]] = None) -> Dict[str, object]:
+    """Run the resolved stages in order and return their results by key
+
+    Once the deadline has passed, the remaining stages are left out of the results.
+    A stage that admit(stage, results) turns down is left out too, along with every
+    stage that depends on it.
+    """
+    results: Dict[str, object] = {}
+    for key in resolve_stages(stages):
+        if deadline is not None and deadline.expired:
+            break
+        stage = STAGE_GRAPH[key]
+        if admit is not None and not admit(stage, results):
+            continue
+        if any(dep not in results for dep in stage.depends_on):
+            continue
+        try:
+            results[key] = stage.run(analyzer, contract_text, results)
+        except DeadlineExceeded:
+            break
+        if on_result is not None:
+            on_result(key, results[key])
+    return results
+
+
+for _stage in [
+    Stage("summary", "Writing summary",
+          lambda analyzer, text, results: analyzer._generate_summary(text)),
+    Stage("contract_type", "Classifying contract",
+          lambda analyzer, text, results: analyzer._classify_contract(text)),
+    Stage("risk_assessment", "Assessing risks",
+          lambda analyzer, text, results: analyzer._assess_risks(text)),
+    Stage("entities", "Extracting entities",
+          lambda analyzer, text, results: analyzer._extract_entities(text)),
+    Stage("obligations_analysis", "Analyzing obligations",
+          lambda analyzer, text, results: analyzer._analyze_obligations(text)),
+    Stage("unfavorable_clauses", "Finding unfavorable clauses",
+          lambda analyzer, text, results: analyzer._identify_unfavorable_clauses(text)),
+    Stage("suggested_alternatives", "Suggesting alternatives",
+          lambda analyzer, text, results: analyzer._generate_alternatives(results["unfavorable_clauses"]),
+          depends_on=("unfavorable_clauses",), optional=True),
+]:
+    register_stage(_stage)
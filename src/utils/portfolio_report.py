@@ -0,0 +1,328 @@
+import heapq
+import json
+import multiprocessing
+import os
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from src.utils.report_model import DISCLAIMER, get_report_model
+
+RISK_LEVELS = ["Critical", "High", "Medium", "Low", "Unknown"]
+
+
+def iter_analysis_results(source: Union[str, Iterable[Dict]], owner_key: Optional[str] = None) -> Iterator[Dict]:
+    """Stream analysis results from a JSONL file, a directory of JSON files, a result store database or any iterable
+
+    From a result store, owner_key limits the results to those run with that API
+    key; without it every owner's analyses are read.
+    """
+    if not isinstance(source, str):
+        yield from source
+        return
+
+    if source.endswith(".db"):
+        from src.utils.result_store import ResultStore
+        store = ResultStore(source)
+        yield from store.iter_results(store.owner_for(owner_key) if owner_key else None)
+        return
+
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.endswith(".json"):
+                with open(os.path.join(source, name), encoding="utf-8") as file:
+                    result = json.load(file)
+                result.setdefault("document_name", name[:-5])
+                yield result
+        return
+
+    with open(source, encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _risk_score(value) -> Optional[float]:
+    try:
+        return float(str(value).split("/")[0])
+    except (TypeError, ValueError):
+        return None
+
+
+class PortfolioSummary:
+    """Running aggregates over a stream of analyses, kept in constant memory"""
+
+    def __init__(self, top_n: int = 25, max_tracked_issues: int = 500):
+        self.count = 0
+        self.levels = Counter()
+        self.score_buckets = Counter()
+        self.score_total = 0.0
+        self.scored = 0
+        self.issues = Counter()
+        self.top_n = top_n
+        self.max_tracked_issues = max_tracked_issues
+        self._riskiest: List[Tuple[float, int, str]] = []
+
+    def add(self, index: int, name: str, analysis_result: Dict):
+        model = get_report_model(analysis_result)
+        self.count += 1
+
+        level = str(model.risk["level"]).title()
+        self.levels[level if level in RISK_LEVELS else "Unknown"] += 1
+
+        score = _risk_score(model.risk["score"])
+        if score is not None:
+            self.scored += 1
+            self.score_total += score
+            self.score_buckets[min(int(score // 10) * 10, 90)] += 1
+            # Min-heap keeps only the highest-risk contracts
+            entry = (score, -index, name)
+            if len(self._riskiest) < self.top_n:
+                heapq.heappush(self._riskiest, entry)
+            else:
+                heapq.heappushpop(self._riskiest, entry)
+
+        for issue in model.risk["critical"] + model.risk["high"]:
+            self.issues[issue.strip().lower()[:120]] += 1
+        if len(self.issues) > self.max_tracked_issues:
+            # Forget the rarest half so tracking stays bounded on long runs
+            self.issues = Counter(dict(self.issues.most_common(self.max_tracked_issues // 2)))
+
+    @property
+    def average_score(self) -> Optional[float]:
+        return self.score_total / self.scored if self.scored else None
+
+    def riskiest(self) -> List[Tuple[str, float]]:
+        return [(name, score) for score, _, name in sorted(self._riskiest, reverse=True)]
+
+
+def _contract_name(index: int, analysis_result: Dict) -> str:
+    return str(analysis_result.get("document_name") or analysis_result.get("file_name") or f"Contract {index}")
+
+
+def _render_group(group: List[Tuple[int, str, Dict]], output_dir: str) -> str:
+    """Render one page group of per-contract sections to a part PDF (runs in a worker process)"""
+    from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer
+    from reportlab.lib.pagesizes import A4
+    from xml.sax.saxutils import escape
+    from src.utils.report_generator import ReportGenerator, _report_styles
+
+    styles = _report_styles()
+    elements = []
+    for index, name, analysis_result in group:
+        if elements:
+            elements.append(PageBreak())
+        elements.append(Paragraph(f"{index}. {escape(name)}", styles['title']))
+        elements.append(Spacer(1, 12))
+        elements.extend(ReportGenerator.build_elements(get_report_model(analysis_result), include_title=False))
+
+    path = os.path.join(output_dir, f"part_{group[0][0]:07d}.pdf")
+    doc = SimpleDocTemplate(path, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
+    doc.build(elements)
+    return path
+
+
+class PortfolioReportGenerator:
+    """Consolidated PDF across many analyzed contracts, rendered in page groups"""
+
+    def __init__(self, group_size: int = 25, workers: Optional[int] = None, max_pending_groups: Optional[int] = None):
+        self.group_size = group_size
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        # Bounds how many groups are queued or rendering, and therefore held in memory
+        self.max_pending_groups = max_pending_groups or self.workers * 2
+
+    def generate(self, source: Union[str, Iterable[Dict]], output_path: str) -> Dict:
+        """Render the portfolio report to output_path and return the summary statistics"""
+        summary = PortfolioSummary()
+        part_paths: List[str] = []
+
+        with tempfile.TemporaryDirectory(prefix="portfolio_") as work_dir:
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as pool:
+                pending = []
+                group: List[Tuple[int, str, Dict]] = []
+
+                for index, analysis_result in enumerate(iter_analysis_results(source), 1):
+                    name = _contract_name(index, analysis_result)
+                    summary.add(index, name, analysis_result)
+                    group.append((index, name, analysis_result))
+
+                    if len(group) >= self.group_size:
+                        pending.append(pool.submit(_render_group, group, work_dir))
+                        group = []
+                        # Wait for the oldest group before reading further input
+                        if len(pending) >= self.max_pending_groups:
+                            part_paths.append(pending.pop(0).result())
+
+                if group:
+                    pending.append(pool.submit(_render_group, group, work_dir))
+                part_paths.extend(future.result() for future in pending)
+
+            summary_path = os.path.join(work_dir, "summary.pdf")
+            self._render_summary(summary, summary_path)
+            self._merge([summary_path] + part_paths, output_path)
+
+        return {
+            "contracts": summary.count,
+            "risk_levels": dict(summary.levels),
+            "average_score": summary.average_score,
+            "output_path": output_path,
+        }
+
+    @staticmethod
+    def _render_summary(summary: PortfolioSummary, path: str):
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+        from xml.sax.saxutils import escape
+        from src.utils.report_generator import _report_styles
+
+        styles = _report_styles()
+        table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#e5e7eb')),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#9ca3af')),
+        ])
+        elements = [
+            Paragraph("Contract Portfolio Risk Report", styles['title']),
+            Paragraph(f"Generated on: {datetime.now().isoformat()}", styles['normal']),
+            Paragraph(f"Contracts analyzed: {summary.count}", styles['normal']),
+        ]
+        if summary.average_score is not None:
+            elements.append(Paragraph(f"Average risk score: {summary.average_score:.1f}/100", styles['normal']))
+        elements.append(Spacer(1, 12))
+
+        elements.append(Paragraph("Risk Level Distribution", styles['heading']))
+        rows = [["Risk Level", "Contracts"]] + [[level, str(summary.levels[level])] for level in RISK_LEVELS if summary.levels[level]]
+        elements.append(Table(rows, style=table_style))
+
+        if summary.score_buckets:
+            elements.append(Paragraph("Risk Score Distribution", styles['heading']))
+            rows = [["Score", "Contracts"]] + [[f"{bucket}-{bucket + 9 if bucket < 90 else 100}", str(count)]
+                                               for bucket, count in sorted(summary.score_buckets.items())]
+            elements.append(Table(rows, style=table_style))
+
+        riskiest = summary.riskiest()
+        if riskiest:
+            elements.append(Paragraph("Highest-Risk Contracts", styles['heading']))
+            rows = [["Contract", "Score"]] + [[Paragraph(escape(name), styles['normal']), f"{score:g}"] for name, score in riskiest]
+            elements.append(Table(rows, colWidths=[360, 60], style=table_style))
+
+        if summary.issues:
+            elements.append(Paragraph("Most Frequent High-Risk Findings", styles['heading']))
+            for issue, count in summary.issues.most_common(15):
+                elements.append(Paragraph(f"• ({count}) {escape(issue)}", styles['normal']))
+
+        elements.append(Spacer(1, 20))
+        elements.append(Paragraph(f"<i>{escape(DISCLAIMER)}</i>", styles['normal']))
+        SimpleDocTemplate(path, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18).build(elements)
+
+    @staticmethod
+    def _merge(paths: List[str], output_path: str):
+        """Concatenate the part PDFs, one part in memory at a time"""
+        concatenate_pdfs(paths, output_path)
+
+
+def concatenate_pdfs(paths: List[str], output_path: str):
+    """Stream PDFs into one file without holding more than one of them in memory
+
+    Each part's objects are renumbered and written straight to the output as its
+    pages are walked; the part is released before the next is opened. Only the
+    page numbers and object offsets are kept until the closing page tree and
+    cross-reference table, so memory stays flat however many parts there are.
+    """
+    from PyPDF2 import PdfReader
+    from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, NullObject, NumberObject
+
+    # offsets[n] is where object n starts; 1 is the catalog and 2 the page tree
+    offsets: List[int] = [0, 0, 0]
+    page_numbers: List[int] = []
+
+    with open(output_path, "wb") as output:
+        output.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+        def write_object(number: int, obj):
+            offsets[number] = output.tell()
+            output.write(f"{number} 0 obj\n".encode("ascii"))
+            obj.write_to_stream(output, None)
+            output.write(b"\nendobj\n")
+
+        for path in paths:
+            reader = PdfReader(path)
+            numbers: Dict[Tuple[int, int], int] = {}
+            queue: List[Tuple[int, object]] = []
+
+            def allocate(reference: IndirectObject, obj=None) -> int:
+                key = (reference.idnum, reference.generation)
+                if key not in numbers:
+                    numbers[key] = len(offsets)
+                    offsets.append(0)
+                    queue.append((numbers[key], obj if obj is not None else reference))
+                return numbers[key]
+
+            def renumber(value):
+                """Point the part's references at their numbers in the output, in place"""
+                if isinstance(value, IndirectObject):
+                    return IndirectObject(allocate(value), 0, None)
+                if isinstance(value, DictionaryObject):
+                    for key in list(value.keys()):
+                        value[key] = renumber(value[key])
+                elif isinstance(value, ArrayObject):
+                    for index, item in enumerate(value):
+                        value[index] = renumber(item)
+                return value
+
+            for page in reader.pages:
+                # The flattened page, which carries the attributes inherited from the part's page tree
+                page_numbers.append(allocate(page.indirect_ref, page))
+
+            while queue:
+                number, item = queue.pop()
+                obj = item.get_object() if isinstance(item, IndirectObject) else item
+                if obj is None:
+                    obj = NullObject()
+                is_page = isinstance(obj, DictionaryObject) and obj.get("/Type") == "/Page"
+                if is_page:
+                    obj.pop(NameObject("/Parent"), None)
+                obj = renumber(obj)
+                if is_page:
+                    obj[NameObject("/Parent")] = IndirectObject(2, 0, None)
+                write_object(number, obj)
+            del reader, numbers
+
+        page_tree = DictionaryObject({
+            NameObject("/Type"): NameObject("/Pages"),
+            NameObject("/Kids"): ArrayObject(IndirectObject(number, 0, None) for number in page_numbers),
+            NameObject("/Count"): NumberObject(len(page_numbers)),
+        })
+        write_object(2, page_tree)
+        write_object(1, DictionaryObject({
+            NameObject("/Type"): NameObject("/Catalog"),
+            NameObject("/Pages"): IndirectObject(2, 0, None),
+        }))
+
+        xref_offset = output.tell()
+        output.write(f"xref\n0 {len(offsets)}\n0000000000 65535 f \n".encode("ascii"))
+        for offset in offsets[1:]:
+            output.write(f"{offset:010d} 00000 n \n".encode("ascii"))
+        output.write(f"trailer\n<< /Size {len(offsets)} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("ascii"))
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build a consolidated risk report across many analyzed contracts")
+    parser.add_argument("source", help="JSONL file with one analysis result per line, a directory of JSON files, or a result store .db")
+    parser.add_argument("output", help="Path of the PDF to write")
+    parser.add_argument("--group-size", type=int, default=25, help="Contracts rendered per worker task")
+    parser.add_argument("--workers", type=int, default=None, help="Rendering processes (default: CPUs - 1)")
+    parser.add_argument("--owner-key", help="With a result store, only the analyses run with this API key")
+    args = parser.parse_args()
+
+    generator = PortfolioReportGenerator(group_size=args.group_size, workers=args.workers)
+    stats = generator.generate(iter_analysis_results(args.source, args.owner_key), args.output)
+    print(f"Wrote {stats['output_path']} covering {stats['contracts']} contracts")
+
+
+if __name__ == "__main__":
+    main()
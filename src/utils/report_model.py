@@ -0,0 +1,218 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from src.utils.pipeline import STAGE_GRAPH
+
+DISCLAIMER = ("Note: This analysis is for informational purposes only and does not constitute legal advice. "
+              "Please consult with a qualified legal professional before making any decisions based on this report.")
+
+
+class Block(NamedTuple):
+    """One renderable element of a report section"""
+    kind: str  # paragraph, field, subheading, list, note
+    text: str = ""
+    label: str = ""
+    items: Tuple[str, ...] = ()
+    ordered: bool = False
+
+
+class ReportSection(NamedTuple):
+    title: str
+    blocks: List[Block]
+    page_break_before: bool = False
+
+
+def clause_text(clause, default: str = "N/A") -> str:
+    """Text of a clause the LLM returned either as a string or as a dict"""
+    if isinstance(clause, dict):
+        return str(clause.get('clause', clause.get('description', default if default else str(clause))))
+    return str(clause)
+
+
+def _as_list(value) -> List:
+    if isinstance(value, list):
+        return value
+    return [value] if value else []
+
+
+class ReportModel:
+    """Analysis result normalized once into the shape every view and export renders"""
+
+    def __init__(self, analysis_result: Dict):
+        self.timestamp = analysis_result.get('timestamp', datetime.now().isoformat())
+
+        contract_type = analysis_result.get('contract_type', {})
+        contract_type = contract_type if isinstance(contract_type, dict) else {}
+        self.classification = {
+            "contract_type": contract_type.get('contract_type', 'N/A'),
+            "sub_type": contract_type.get('sub_type', 'N/A'),
+            "confidence": contract_type.get('confidence', 'N/A'),
+        }
+
+        summary = analysis_result.get('summary') or 'No summary available'
+        self.summary = str(summary)
+
+        risk = analysis_result.get('risk_assessment', {})
+        risk = risk if isinstance(risk, dict) else {}
+        self.risk = {
+            "score": risk.get('overall_risk_score', 'N/A'),
+            "level": risk.get('overall_risk_level', 'N/A'),
+            "high": [clause_text(c, None) for c in _as_list(risk.get('high_risk_clauses'))],
+            "medium": [clause_text(c, None) for c in _as_list(risk.get('medium_risk_clauses'))],
+            "low": [clause_text(c, None) for c in _as_list(risk.get('low_risk_clauses'))],
+            "critical": [str(issue) for issue in _as_list(risk.get('critical_issues'))],
+            "compliance": [str(item) for item in _as_list(risk.get('compliance_concerns'))],
+        }
+
+        entities = analysis_result.get('entities', {})
+        entities = entities if isinstance(entities, dict) else {}
+        self.entities: List[Tuple[str, List[str]]] = [
+            (key.replace('_', ' ').title(), [str(item) for item in _as_list(value)])
+            for key, value in entities.items() if value and key != 'spans'
+        ]
+
+        alternatives = _as_list(analysis_result.get('suggested_alternatives'))
+        self.unfavorable: List[Dict] = []
+        for idx, clause in enumerate(_as_list(analysis_result.get('unfavorable_clauses')), 1):
+            if not isinstance(clause, dict):
+                continue
+            alt = alternatives[idx - 1] if idx <= len(alternatives) and isinstance(alternatives[idx - 1], dict) else {}
+            self.unfavorable.append({
+                "clause": clause_text(clause),
+                "problem": str(clause.get('why_problematic', clause.get('problem', ''))),
+                "severity": str(clause.get('severity', 'N/A')),
+                "alternative": str(alt.get('alternative', alt.get('recommended_alternative', ''))),
+                "strategy": str(alt.get('negotiation_strategy', alt.get('why_better', ''))),
+            })
+
+        obligations = analysis_result.get('obligations_analysis', {})
+        obligations = obligations if isinstance(obligations, dict) else {}
+        self.obligations: Dict[str, List[Tuple[Optional[str], str]]] = {}
+        for category in ['obligations', 'rights', 'prohibitions']:
+            self.obligations[category] = [
+                (str(item.get('party', 'N/A')), str(item.get('description', item.get('clause', 'N/A'))))
+                if isinstance(item, dict) else (None, str(item))
+                for item in _as_list(obligations.get(category))
+            ]
+
+        self._sections: Optional[List[ReportSection]] = None
+
+    @property
+    def sections(self) -> List[ReportSection]:
+        """Render tree shared by all export formats, built on first use"""
+        if self._sections is None:
+            self._sections = self._build_sections()
+        return self._sections
+
+    def _build_sections(self) -> List[ReportSection]:
+        sections = []
+
+        sections.append(ReportSection("1. Contract Classification", [
+            Block("field", self.classification["contract_type"], label="Type"),
+            Block("field", self.classification["sub_type"], label="Sub-type"),
+            Block("field", self.classification["confidence"], label="Confidence"),
+        ]))
+
+        sections.append(ReportSection("2. Executive Summary", [
+            Block("paragraph", para.strip()) for para in self.summary.split('\n\n') if para.strip()
+        ]))
+
+        risk_blocks = [
+            Block("field", f"{self.risk['score']}/100", label="Overall Risk Score"),
+            Block("field", str(self.risk['level']), label="Risk Level"),
+        ]
+        for key, title in [("high", "High Risk Clauses"), ("medium", "Medium Risk Clauses"),
+                           ("critical", "Critical Issues to Address")]:
+            if self.risk[key]:
+                risk_blocks.append(Block("subheading", f"{title}:"))
+                risk_blocks.append(Block("list", items=tuple(self.risk[key]), ordered=True))
+        sections.append(ReportSection("3. Risk Assessment", risk_blocks))
+
+        entity_blocks = []
+        for label, values in self.entities:
+            entity_blocks.append(Block("subheading", f"{label}:"))
+            if len(values) == 1:
+                entity_blocks.append(Block("paragraph", values[0]))
+            else:
+                entity_blocks.append(Block("list", items=tuple(values)))
+        sections.append(ReportSection("4. Key Contract Entities", entity_blocks))
+
+        unfavorable_blocks = []
+        for idx, clause in enumerate(self.unfavorable, 1):
+            unfavorable_blocks.append(Block("subheading", f"Issue {idx}:"))
+            unfavorable_blocks.append(Block("field", clause["clause"], label="Clause"))
+            if clause["problem"]:
+                unfavorable_blocks.append(Block("field", clause["problem"], label="Problem"))
+            unfavorable_blocks.append(Block("field", clause["severity"], label="Severity"))
+            if clause["alternative"]:
+                unfavorable_blocks.append(Block("field", clause["alternative"], label="Recommended Alternative"))
+        sections.append(ReportSection("5. Unfavorable Clauses & Recommendations", unfavorable_blocks,
+                                      page_break_before=True))
+
+        obligation_blocks = []
+        for category, items in self.obligations.items():
+            if items:
+                obligation_blocks.append(Block("subheading", f"{category.title()}:"))
+                obligation_blocks.append(Block("list", items=tuple(
+                    f"[{party}] {text}" if party is not None else text for party, text in items
+                )))
+        sections.append(ReportSection("6. Obligations, Rights & Prohibitions", obligation_blocks,
+                                      page_break_before=True))
+
+        return sections
+
+    def to_dict(self) -> Dict:
+        """JSON-serialisable form of the normalized report"""
+        return {
+            "timestamp": self.timestamp,
+            "classification": self.classification,
+            "summary": self.summary,
+            "risk": self.risk,
+            "entities": [{"label": label, "values": values} for label, values in self.entities],
+            "unfavorable_clauses": self.unfavorable,
+            "obligations": {
+                category: [{"party": party, "text": text} for party, text in items]
+                for category, items in self.obligations.items()
+            },
+            "disclaimer": DISCLAIMER,
+        }
+
+
+_cache: "OrderedDict[Tuple, ReportModel]" = OrderedDict()
+_cache_lock = threading.Lock()
+_CACHE_SIZE = 64
+
+
+def report_cache_key(analysis_result: Dict) -> Optional[Tuple]:
+    """Cheap key for a finished analysis: its timestamp, name, stages and a hash of its summary
+
+    Partial results have no timestamp yet and are not cached.
+    """
+    timestamp = analysis_result.get('timestamp')
+    if not timestamp:
+        return None
+    summary = str(analysis_result.get('summary', '')).encode('utf-8')
+    stages = tuple(key for key in analysis_result if key in STAGE_GRAPH)
+    return timestamp, analysis_result.get('document_name'), stages, hashlib.sha256(summary).hexdigest()
+
+
+def get_report_model(analysis_result: Dict) -> ReportModel:
+    """Return the cached ReportModel for an analysis, building it on first use"""
+    key = report_cache_key(analysis_result)
+    if key is None:
+        return ReportModel(analysis_result)
+    with _cache_lock:
+        model = _cache.get(key)
+        if model is not None:
+            _cache.move_to_end(key)
+            return model
+
+    model = ReportModel(analysis_result)
+    with _cache_lock:
+        _cache[key] = model
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return model
@@ -0,0 +1,124 @@
+import html
+import io
+import json
+from typing import Callable, Dict, NamedTuple
+
+from src.utils.report_model import DISCLAIMER, ReportModel, get_report_model
+
+
+class Renderer(NamedTuple):
+    """Export format that turns a ReportModel into file bytes"""
+    label: str
+    extension: str
+    mime: str
+    render: Callable[[ReportModel], bytes]
+
+
+RENDERERS: Dict[str, Renderer] = {}
+
+
+def register_renderer(name: str, renderer: Renderer):
+    """Register (or replace) an export format"""
+    RENDERERS[name] = renderer
+
+
+def render_report(analysis_result: Dict, fmt: str) -> bytes:
+    """Render an analysis in the given format from its cached report model"""
+    if fmt not in RENDERERS:
+        raise ValueError(f"Unsupported report format: {fmt}. Choose from {', '.join(RENDERERS)}.")
+    return RENDERERS[fmt].render(get_report_model(analysis_result))
+
+
+def _render_pdf(model: ReportModel) -> bytes:
+    # ReportLab is only imported when a PDF is actually requested
+    from src.utils.report_generator import ReportGenerator
+    return ReportGenerator.render_pdf(model)
+
+
+def _render_html(model: ReportModel) -> bytes:
+    parts = [
+        "<!DOCTYPE html>",
+        "<html><head><meta charset=\"utf-8\"><title>Contract Analysis Report</title></head><body>",
+        "<h1>Contract Analysis Report</h1>",
+        f"<p>Generated on: {html.escape(str(model.timestamp))}</p>",
+    ]
+    for section in model.sections:
+        parts.append(f"<h2>{html.escape(section.title)}</h2>")
+        for block in section.blocks:
+            if block.kind == "subheading":
+                parts.append(f"<h3>{html.escape(block.text)}</h3>")
+            elif block.kind == "field":
+                parts.append(f"<p><b>{html.escape(block.label)}:</b> {html.escape(str(block.text))}</p>")
+            elif block.kind == "list":
+                tag = "ol" if block.ordered else "ul"
+                items = "".join(f"<li>{html.escape(item)}</li>" for item in block.items)
+                parts.append(f"<{tag}>{items}</{tag}>")
+            else:
+                parts.append(f"<p>{html.escape(block.text)}</p>")
+    parts.append(f"<p><i>{html.escape(DISCLAIMER)}</i></p>")
+    parts.append("</body></html>")
+    return "\n".join(parts).encode("utf-8")
+
+
+def _render_markdown(model: ReportModel) -> bytes:
+    lines = ["# Contract Analysis Report", "", f"Generated on: {model.timestamp}", ""]
+    for section in model.sections:
+        lines += [f"## {section.title}", ""]
+        for block in section.blocks:
+            if block.kind == "subheading":
+                lines += ["", f"### {block.text}", ""]
+            elif block.kind == "field":
+                lines.append(f"**{block.label}:** {block.text}  ")
+            elif block.kind == "list":
+                lines += [f"{idx}. {item}" if block.ordered else f"- {item}"
+                          for idx, item in enumerate(block.items, 1)]
+                lines.append("")
+            else:
+                lines += [block.text, ""]
+        lines.append("")
+    lines.append(f"_{DISCLAIMER}_")
+    return "\n".join(lines).encode("utf-8")
+
+
+def _render_docx(model: ReportModel) -> bytes:
+    import docx
+
+    document = docx.Document()
+    document.add_heading("Contract Analysis Report", level=0)
+    document.add_paragraph(f"Generated on: {model.timestamp}")
+    for section in model.sections:
+        if section.page_break_before:
+            document.add_page_break()
+        document.add_heading(section.title, level=1)
+        for block in section.blocks:
+            if block.kind == "subheading":
+                document.add_heading(block.text, level=2)
+            elif block.kind == "field":
+                paragraph = document.add_paragraph()
+                paragraph.add_run(f"{block.label}: ").bold = True
+                paragraph.add_run(str(block.text))
+            elif block.kind == "list":
+                style = "List Number" if block.ordered else "List Bullet"
+                for item in block.items:
+                    document.add_paragraph(item, style=style)
+            else:
+                document.add_paragraph(block.text)
+    document.add_paragraph().add_run(DISCLAIMER).italic = True
+
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def _render_json(model: ReportModel) -> bytes:
+    return json.dumps(model.to_dict(), indent=2, ensure_ascii=False).encode("utf-8")
+
+
+register_renderer("pdf", Renderer("PDF", "pdf", "application/pdf", _render_pdf))
+register_renderer("html", Renderer("HTML", "html", "text/html", _render_html))
+register_renderer("docx", Renderer(
+    "Word (DOCX)", "docx",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document", _render_docx
+))
+register_renderer("markdown", Renderer("Markdown", "md", "text/markdown", _render_markdown))
+register_renderer("json", Renderer("JSON", "json", "application/json", _render_json))
@@ -0,0 +1,247 @@
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import zlib
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Every row belongs to an owner, a salted hash of the API key it was analyzed with
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    owner TEXT NOT NULL DEFAULT '',
+    document_hash TEXT NOT NULL,
+    document_name TEXT,
+    contract_type TEXT COLLATE NOCASE,
+    risk_level TEXT COLLATE NOCASE,
+    risk_score REAL,
+    created_at TEXT NOT NULL,
+    result BLOB NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS analysis_parties (
+    analysis_id INTEGER NOT NULL REFERENCES analyses(id) ON DELETE CASCADE,
+    owner TEXT NOT NULL DEFAULT '',
+    party TEXT NOT NULL COLLATE NOCASE,
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS store_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Created after stores from before the owner column have been migrated
+_INDEXES = """
+DROP INDEX IF EXISTS idx_analyses_document;
+DROP INDEX IF EXISTS idx_analyses_type;
+DROP INDEX IF EXISTS idx_analyses_risk;
+DROP INDEX IF EXISTS idx_analyses_created;
+DROP INDEX IF EXISTS idx_parties_party;
+CREATE INDEX IF NOT EXISTS idx_analyses_owner_document ON analyses(owner, document_hash, created_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_owner_type ON analyses(owner, contract_type, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_analyses_owner_risk ON analyses(owner, risk_level, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_analyses_owner_created ON analyses(owner, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_analyses_created ON analyses(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_parties_owner_party ON analysis_parties(owner, party, created_at, analysis_id);
+CREATE INDEX IF NOT EXISTS idx_parties_analysis ON analysis_parties(analysis_id);
+"""
+
+_SUMMARY_COLUMNS = "a.id, a.document_hash, a.document_name, a.contract_type, a.risk_level, a.risk_score, a.created_at"
+
+
+def document_hash(contract_text: str) -> str:
+    """Hash identifying a document by its extracted text"""
+    return hashlib.sha256(contract_text.encode("utf-8")).hexdigest()
+
+
+def _party_names(entities) -> List[str]:
+    if not isinstance(entities, dict):
+        return []
+    parties = entities.get("parties", [])
+    parties = parties if isinstance(parties, list) else [parties]
+    names = []
+    for party in parties:
+        if isinstance(party, dict):
+            party = party.get("name") or party.get("party") or ""
+        party = str(party).strip()[:200]
+        if party and party.lower() not in (name.lower() for name in names):
+            names.append(party)
+    return names
+
+
+def _risk_score(value) -> Optional[float]:
+    try:
+        return float(str(value).split("/")[0])
+    except (TypeError, ValueError):
+        return None
+
+
+class ResultStore:
+    """Opt-in local history of analyses: SQLite index columns plus compressed JSON blobs
+
+    Each analysis is filed under an owner (see owner_for), and every lookup is
+    limited to one owner, so sessions with different API keys never see each
+    other's results. Analyses stored before owners were recorded belong to no one.
+    Passing owner=None to query or iter_results reads every owner's analyses and is
+    meant for operator tools only.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+            for table in ("analyses", "analysis_parties"):
+                columns = [row["name"] for row in conn.execute(f"PRAGMA table_info({table})")]
+                if "owner" not in columns:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN owner TEXT NOT NULL DEFAULT ''")
+            conn.executescript(_INDEXES)
+            conn.execute("INSERT OR IGNORE INTO store_meta (key, value) VALUES ('owner_salt', ?)",
+                         (secrets.token_hex(16),))
+            self._salt = conn.execute("SELECT value FROM store_meta WHERE key = 'owner_salt'").fetchone()["value"]
+
+    @classmethod
+    def from_env(cls) -> Optional["ResultStore"]:
+        """Store at RESULT_STORE_PATH, or None when history is not enabled"""
+        path = os.getenv("RESULT_STORE_PATH")
+        return cls(path) if path else None
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets readers run alongside a writer"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def owner_for(self, api_key: str) -> str:
+        """Owner ID for an API key: keyed with this store's salt, so keys cannot be recovered from it"""
+        return hmac.new(self._salt.encode("utf-8"), (api_key or "").encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def save(self, contract_text: str, analysis_result: Dict, owner: str, document_name: Optional[str] = None) -> int:
+        """Store an analysis under owner and return its ID"""
+        contract_type = analysis_result.get("contract_type", {})
+        contract_type = contract_type.get("contract_type") if isinstance(contract_type, dict) else None
+        risk = analysis_result.get("risk_assessment", {})
+        risk = risk if isinstance(risk, dict) else {}
+        created_at = analysis_result.get("timestamp") or datetime.now().isoformat()
+        blob = zlib.compress(json.dumps(analysis_result, default=str).encode("utf-8"), 6)
+
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "INSERT INTO analyses (owner, document_hash, document_name, contract_type, risk_level, risk_score, "
+                "created_at, result) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    owner,
+                    document_hash(contract_text),
+                    document_name or analysis_result.get("document_name"),
+                    contract_type,
+                    risk.get("overall_risk_level"),
+                    _risk_score(risk.get("overall_risk_score")),
+                    created_at,
+                    blob,
+                ),
+            )
+            analysis_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO analysis_parties (analysis_id, owner, party, created_at) VALUES (?, ?, ?, ?)",
+                [(analysis_id, owner, party, created_at) for party in _party_names(analysis_result.get("entities"))],
+            )
+        return analysis_id
+
+    def get(self, analysis_id: int, owner: Optional[str]) -> Optional[Dict]:
+        """Full analysis result by ID, if it belongs to owner (None: any owner)"""
+        sql, params = "SELECT result FROM analyses WHERE id = ?", [analysis_id]
+        if owner is not None:
+            sql, params = sql + " AND owner = ?", params + [owner]
+        row = self._connection().execute(sql, params).fetchone()
+        return json.loads(zlib.decompress(row["result"])) if row else None
+
+    def latest_for_document(self, contract_text: str, owner: str) -> Optional[Dict]:
+        """Most recent analysis of the same document text stored by owner, if any"""
+        row = self._connection().execute(
+            "SELECT id FROM analyses WHERE owner = ? AND document_hash = ? ORDER BY created_at DESC LIMIT 1",
+            (owner, document_hash(contract_text)),
+        ).fetchone()
+        return self.get(row["id"], owner) if row else None
+
+    def query(self, owner: Optional[str], contract_type: Optional[str] = None, risk_level: Optional[str] = None,
+              party: Optional[str] = None, document_hash: Optional[str] = None,
+              since: Optional[str] = None, until: Optional[str] = None,
+              limit: int = 20, cursor: Optional[Tuple[str, int]] = None) -> Tuple[List[Dict], Optional[Tuple[str, int]]]:
+        """Page through owner's stored analyses, newest first
+
+        Parties match exactly, ignoring case. Returns (summaries, next_cursor); pass
+        next_cursor back to get the following page. Keyset pagination keeps deep
+        pages as fast as the first one.
+        """
+        # Filtering by party walks that party's rows in time order instead of the whole table
+        order = ("p.created_at", "p.analysis_id") if party else ("a.created_at", "a.id")
+        source = "analyses a JOIN analysis_parties p ON p.analysis_id = a.id" if party else "analyses a"
+        clauses, params = [], []
+        if owner is not None:
+            clauses.append(f"{'p' if party else 'a'}.owner = ?")
+            params.append(owner)
+        for column, value in [("p.party", party), ("a.contract_type", contract_type),
+                              ("a.risk_level", risk_level), ("a.document_hash", document_hash)]:
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since:
+            clauses.append(f"{order[0]} >= ?")
+            params.append(since)
+        if until:
+            clauses.append(f"{order[0]} < ?")
+            params.append(until)
+        if cursor:
+            clauses.append(f"({order[0]}, {order[1]}) < (?, ?)")
+            params.extend(cursor)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connection().execute(
+            f"SELECT {_SUMMARY_COLUMNS} FROM {source} {where} "
+            f"ORDER BY {order[0]} DESC, {order[1]} DESC LIMIT ?",
+            params + [limit + 1],
+        ).fetchall()
+
+        summaries = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = summaries[-1]
+            next_cursor = (last["created_at"], last["id"])
+        return summaries, next_cursor
+
+    def parties(self, analysis_id: int, owner: str) -> List[str]:
+        rows = self._connection().execute(
+            "SELECT party FROM analysis_parties WHERE analysis_id = ? AND owner = ?", (analysis_id, owner)
+        ).fetchall()
+        return [row["party"] for row in rows]
+
+    def iter_results(self, owner: Optional[str], **filters) -> Iterator[Dict]:
+        """Stream owner's full results matching the query filters, page by page"""
+        cursor = None
+        while True:
+            summaries, cursor = self.query(owner, cursor=cursor, limit=200, **filters)
+            for summary in summaries:
+                result = self.get(summary["id"], owner)
+                if result is not None:
+                    result.setdefault("document_name", summary["document_name"])
+                    yield result
+            if cursor is None:
+                return
+
+    def delete(self, analysis_id: int, owner: str):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM analyses WHERE id = ? AND owner = ?", (analysis_id, owner))
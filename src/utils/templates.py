@@ -1,21 +1,29 @@
-from typing import Dict
+from typing import Dict, Optional
 
 class ContractTemplates:
     """Generate standardized SME-friendly contract templates"""
     
+    # Template text by key, built on first lookup and reused afterwards
+    _registry: Optional[Dict[str, str]] = None
+    
+    @classmethod
+    def _templates(cls) -> Dict[str, str]:
+        if cls._registry is None:
+            cls._registry = {
+                "service_contract": cls.service_contract_template(),
+                "vendor_contract": cls.vendor_contract_template(),
+                "employment_agreement": cls.employment_agreement_template(),
+                "nda": cls.nda_template(),
+                "partnership_deed": cls.partnership_deed_template(),
+                "general": cls.general_template(),
+            }
+        return cls._registry
+    
     @staticmethod
     def get_template(contract_type: str) -> str:
         """Get a template based on contract type"""
-        templates = {
-            "service_contract": ContractTemplates.service_contract_template(),
-            "vendor_contract": ContractTemplates.vendor_contract_template(),
-            "employment_agreement": ContractTemplates.employment_agreement_template(),
-            "nda": ContractTemplates.nda_template(),
-            "partnership_deed": ContractTemplates.partnership_deed_template(),
-        }
-        
-        return templates.get(contract_type.lower().replace(" ", "_"), 
-                            ContractTemplates.general_template())
+        templates = ContractTemplates._templates()
+        return templates.get(contract_type.lower().replace(" ", "_"), templates["general"])
     
     @staticmethod
     def service_contract_template() -> str:
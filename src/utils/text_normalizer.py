@@ -0,0 +1,188 @@
+import re
+from array import array
+from typing import Dict, List, Tuple
+
+# Separator placed between pages by DocumentProcessor so page furniture can be detected
+PAGE_BREAK = "\f"
+
+_TOKEN_RE = re.compile(r"\S+")
+_WHITESPACE_RE = re.compile(r"\s+")
+_DIGITS_RE = re.compile(r"\d+")
+_PAGE_NUMBER_RE = re.compile(
+    r"^(?:page|pg\.?|पृष्ठ)?\s*[-–(\[]?\s*\d{1,4}\s*[-–)\]]?(?:\s*(?:of|/)\s*\d{1,4})?$",
+    re.IGNORECASE
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (about 4 characters per token) used for budgeting"""
+    return (len(text) + 3) // 4
+
+
+class NormalizedText:
+    """Normalized document text with a mapping back to the original offsets"""
+
+    def __init__(self, text: str, offsets: array, stats: Dict):
+        self.text = text
+        self.offsets = offsets
+        self.stats = stats
+
+    def to_original(self, index: int) -> int:
+        """Map an offset in the normalized text to an offset in the original text"""
+        if not self.offsets:
+            return 0
+        index = min(max(index, 0), len(self.offsets) - 1)
+        return self.offsets[index]
+
+    def original_span(self, start: int, end: int) -> Tuple[int, int]:
+        """Map a [start, end) span of the normalized text back to the original text"""
+        if end <= start:
+            position = self.to_original(start)
+            return position, position
+        return self.to_original(start), self.to_original(end - 1) + 1
+
+
+class TextNormalizer:
+    """Remove extraction noise (page furniture, hyphenation, whitespace) in linear time"""
+
+    def __init__(self, edge_lines: int = 3, repeat_ratio: float = 0.5, min_repeat_pages: int = 2,
+                 max_furniture_length: int = 120):
+        self.edge_lines = edge_lines
+        self.repeat_ratio = repeat_ratio
+        self.min_repeat_pages = min_repeat_pages
+        self.max_furniture_length = max_furniture_length
+
+    def normalize(self, text: str) -> NormalizedText:
+        """Normalize text and report how many characters and tokens were saved"""
+        pages = self._split_lines(text)
+        removed = self._find_furniture(text, pages)
+
+        pieces: List[str] = []
+        offsets = array('q')
+        length = 0
+        hyphen_pending = -1
+        joined_hyphens = 0
+
+        for page_index, lines in enumerate(pages):
+            blank_seen = False
+            for line_index, (start, end) in enumerate(lines):
+                if (page_index, line_index) in removed:
+                    continue
+                tokens = list(_TOKEN_RE.finditer(text, start, end))
+                if not tokens:
+                    blank_seen = True
+                    continue
+
+                last = len(tokens) - 1
+                for token_index, match in enumerate(tokens):
+                    token = match.group()
+                    token_start = match.start()
+
+                    if length:
+                        if token_index == 0:
+                            if hyphen_pending >= 0 and not blank_seen and token[0].islower():
+                                separator = ""
+                                joined_hyphens += 1
+                            else:
+                                separator = "\n\n" if blank_seen else "\n"
+                        else:
+                            separator = " "
+                        if hyphen_pending >= 0 and separator:
+                            pieces.append("-")
+                            offsets.append(hyphen_pending)
+                            length += 1
+                        if separator:
+                            pieces.append(separator)
+                            offsets.extend([max(token_start - 1, 0)] * len(separator))
+                            length += len(separator)
+                    hyphen_pending = -1
+
+                    # Hold back a trailing hyphen until we know whether the word continues
+                    if (token_index == last and len(token) > 1 and token.endswith("-")
+                            and token[-2].isalpha()):
+                        hyphen_pending = match.end() - 1
+                        token = token[:-1]
+
+                    pieces.append(token)
+                    offsets.extend(range(token_start, token_start + len(token)))
+                    length += len(token)
+                blank_seen = False
+
+        if hyphen_pending >= 0:
+            pieces.append("-")
+            offsets.append(hyphen_pending)
+
+        normalized = "".join(pieces)
+        original_tokens = estimate_tokens(text)
+        normalized_tokens = estimate_tokens(normalized)
+        stats = {
+            "pages": len(pages),
+            "original_chars": len(text),
+            "normalized_chars": len(normalized),
+            "chars_saved": len(text) - len(normalized),
+            "original_tokens": original_tokens,
+            "normalized_tokens": normalized_tokens,
+            "tokens_saved": original_tokens - normalized_tokens,
+            "removed_lines": len(removed),
+            "joined_hyphens": joined_hyphens,
+        }
+        return NormalizedText(normalized, offsets, stats)
+
+    @staticmethod
+    def _split_lines(text: str) -> List[List[Tuple[int, int]]]:
+        """Split text into pages of (start, end) line spans without copying it"""
+        pages: List[List[Tuple[int, int]]] = [[]]
+        position = 0
+        size = len(text)
+        while position <= size:
+            newline = text.find("\n", position)
+            if newline == -1:
+                newline = size
+            page_break = text.find(PAGE_BREAK, position, newline)
+            if page_break != -1:
+                pages[-1].append((position, page_break))
+                pages.append([])
+                position = page_break + 1
+                continue
+            pages[-1].append((position, newline))
+            position = newline + 1
+        return pages
+
+    def _edge_lines(self, text: str, lines: List[Tuple[int, int]]) -> List[int]:
+        """Indexes of the first and last few non-blank lines of a page"""
+        non_blank = [i for i, (start, end) in enumerate(lines) if text[start:end].strip()]
+        if len(non_blank) <= 2 * self.edge_lines:
+            return non_blank
+        return non_blank[:self.edge_lines] + non_blank[-self.edge_lines:]
+
+    def _find_furniture(self, text: str, pages: List[List[Tuple[int, int]]]) -> set:
+        """Find page numbers and header/footer lines repeated across pages"""
+        removed = set()
+        if len(pages) < 2:
+            return removed
+
+        candidates = []
+        page_counts: Dict[str, int] = {}
+
+        for page_index, lines in enumerate(pages):
+            seen = set()
+            for line_index in self._edge_lines(text, lines):
+                start, end = lines[line_index]
+                line = _WHITESPACE_RE.sub(" ", text[start:end]).strip()
+                if len(line) > self.max_furniture_length:
+                    continue
+                if _PAGE_NUMBER_RE.match(line):
+                    removed.add((page_index, line_index))
+                    continue
+                # Digits are masked so "Page 3 of 10" style headers match across pages
+                key = _DIGITS_RE.sub("#", line.lower())
+                candidates.append((page_index, line_index, key))
+                if key not in seen:
+                    seen.add(key)
+                    page_counts[key] = page_counts.get(key, 0) + 1
+
+        threshold = max(self.min_repeat_pages, int(len(pages) * self.repeat_ratio + 0.5))
+        for page_index, line_index, key in candidates:
+            if page_counts[key] >= threshold:
+                removed.add((page_index, line_index))
+        return removed